@@ -0,0 +1,66 @@
+from Benchmarks.benchmark_tools import add_pipeline_arguments, load_pipeline_data, timed, print_results
+from animal_classifiers import HammingClassifier, HierarchicalClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.base import BaseEstimator
+from argparse import ArgumentParser
+import model_training as mt
+
+def get_classifiers(data:dict)->dict[str, BaseEstimator]:
+    """Classifiers of the animal class from the morphological features to compare
+
+    Args:
+        data (dict): Data of the pipeline (see load_pipeline_data)
+
+    Returns:
+        dict[str, BaseEstimator]: Unfitted classifier per name
+    """
+    tree, root = mt.build_class_tree(data['ontology'], mt.get_inid_mapping(data['inids']))
+    return {
+        'mlp': MLPClassifier(max_iter=1000, solver='lbfgs', alpha=1e-5),
+        'hamming': HammingClassifier(),
+        'hierarchical': HierarchicalClassifier(tree, root),
+        'hierarchical (beam 3)': HierarchicalClassifier(tree, root, beam_width=3)
+    }
+
+def benchmark_animal_classifiers(pipeline_name:str, classifiers:dict[str, BaseEstimator]=None, 
+                                 engine:str=mt.SEQUENTIAL_ENGINE, **data_kwargs)->list[dict]:
+    """Compare the accuracy and the latency of the animal classifiers on the predicted morphological features 
+        of the test images of a pipeline
+
+    Args:
+        pipeline_name (str): Name of the pipeline directory (ex: 'POC')
+        classifiers (dict[str, BaseEstimator], optional): Classifiers to compare. Defaults to get_classifiers(data).
+        engine (str, optional): Training engine of the morphological features models. Defaults to SEQUENTIAL_ENGINE.
+
+    Returns:
+        list[dict]: Fit time, prediction latency and accuracy per classifier
+    """
+    data = load_pipeline_data(pipeline_name, **data_kwargs)
+    classifiers = classifiers if classifiers else get_classifiers(data)
+    predicted = mt.predict_all_columns_df(data['x_test'], data['x_train'], data['y_train'],
+                                          data['x_morph_features'], data['y_morph_features'], engine=engine)
+    results = []
+    for name, classifier in classifiers.items():
+        _, fit_duration = timed(classifier.fit, data['x_morph_features'], data['y_morph_features'])
+        prediction, predict_duration = timed(classifier.predict, predicted)
+        results.append({
+            'pipeline': pipeline_name,
+            'classifier': name,
+            'classes': len(data['y_morph_features']),
+            'test images': len(predicted),
+            'fit (ms)': fit_duration*1000,
+            'predict (us/image)': predict_duration*1e6/max(len(predicted), 1),
+            'accuracy': float((prediction == data['y_test']).mean())
+        })
+    return results
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Compare the classifiers of the animal class from the predicted morphological features')
+    add_pipeline_arguments(parser)
+    parser.add_argument('--engine', default=mt.SEQUENTIAL_ENGINE, choices=mt.ENGINES)
+    args = parser.parse_args()
+    results = []
+    for pipeline_name in args.pipelines:
+        results += benchmark_animal_classifiers(pipeline_name, engine=args.engine, split_manifest_path=args.split_manifest, 
+                                                zip_file_path=args.zip, feature_store_path=args.feature_store)
+    print_results(results)
@@ -0,0 +1,64 @@
+from Benchmarks.benchmark_tools import (add_pipeline_arguments, load_pipeline_data, timed, 
+                                        morph_features_accuracy, classification_accuracy, print_results)
+from argparse import ArgumentParser
+import model_training as mt
+
+MAX_IMAGES_PER_CLASS = [None, 100, 50, 20, 10]
+
+def benchmark_sampling(pipeline_name:str, max_images_per_class:list[int]=MAX_IMAGES_PER_CLASS, 
+                       max_images_per_value:int=None, engine:str=mt.SEQUENTIAL_ENGINE, 
+                       seed:int=mt.SAMPLING_SEED, **data_kwargs)->list[dict]:
+    """Compare the training time and the accuracy of the morphological features models 
+        trained with class-balanced samples of the images to the models trained with all of them
+
+    Args:
+        pipeline_name (str): Name of the pipeline directory (ex: 'POC')
+        max_images_per_class (list[int], optional): Caps of images per class to compare. None is the full-data baseline.
+            Defaults to MAX_IMAGES_PER_CLASS.
+        max_images_per_value (int, optional): Cap of images per target value of each model. Defaults to None.
+        engine (str, optional): Training engine of the models. Defaults to SEQUENTIAL_ENGINE.
+        seed (int, optional): Seed of the sampling. Defaults to SAMPLING_SEED.
+
+    Returns:
+        list[dict]: Training time and accuracies per cap, relative to the full-data baseline
+    """
+    data = load_pipeline_data(pipeline_name, **data_kwargs)
+    results = []
+    baseline = None
+    for cap in max_images_per_class:
+        predicted, duration = timed(mt.predict_all_columns_df, data['x_test'], data['x_train'], data['y_train'],
+                                    data['x_morph_features'], data['y_morph_features'], engine=engine,
+                                    max_images_per_class=cap, max_images_per_value=max_images_per_value, 
+                                    sampling_seed=seed)
+        result = {
+            'pipeline': pipeline_name,
+            'images/class': cap if cap is not None else 'all',
+            'time (s)': duration,
+            'features accuracy': morph_features_accuracy(predicted, data),
+            'accuracy': classification_accuracy(predicted, data)
+        }
+        if cap is None:
+            baseline = result
+        if baseline:
+            result['speedup'] = baseline['time (s)'] / duration
+            result['accuracy delta'] = result['accuracy'] - baseline['accuracy']
+        results.append(result)
+    return results
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Report the accuracy/time tradeoff of the class-balanced sampling '
+                                        'of the morphological features models against the full-data baseline')
+    add_pipeline_arguments(parser)
+    parser.add_argument('--caps', nargs='+', type=int, default=[cap for cap in MAX_IMAGES_PER_CLASS if cap],
+                        help='Maximum numbers of images per class to compare to the baseline (default: %(default)s)')
+    parser.add_argument('--max-images-per-value', type=int, default=None)
+    parser.add_argument('--engine', default=mt.SEQUENTIAL_ENGINE, 
+                        choices=mt.ENGINES)
+    parser.add_argument('--seed', type=int, default=mt.SAMPLING_SEED)
+    args = parser.parse_args()
+    results = []
+    for pipeline_name in args.pipelines:
+        results += benchmark_sampling(pipeline_name, [None]+args.caps, args.max_images_per_value, args.engine, args.seed,
+                                      split_manifest_path=args.split_manifest, zip_file_path=args.zip, 
+                                      feature_store_path=args.feature_store)
+    print_results(results)
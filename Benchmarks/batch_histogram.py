@@ -0,0 +1,59 @@
+from Benchmarks.benchmark_tools import timed, print_results
+from feature_extraction import hsv_histogram, batch_hsv_histograms, THUMBNAIL_SIZE
+from pixel_cache import PixelCache, PIXEL_CACHE_PATH
+from argparse import ArgumentParser
+import numpy as np
+
+def per_image_histograms(hsv_frames:np.ndarray, bins:int=8)->np.ndarray:
+    """Compute the histograms of a stack of frames one at a time, with OpenCV
+
+    Args:
+        hsv_frames (np.ndarray): uint8 array of shape (N, H, W, 3) of frames in HSV format
+        bins (int, optional): Number of bins per channel. Defaults to 8.
+
+    Returns:
+        np.ndarray: float32 array of shape (N, bins**3)
+    """
+    return np.array([hsv_histogram(frame, None, bins) for frame in hsv_frames], dtype=np.float32)
+
+def benchmark_batch_histogram(hsv_frames:np.ndarray, bins_list:list[int]=[4, 8, 16], repeats:int=3)->list[dict]:
+    """Compare the vectorized batch histogram to the per-image histogram, in time and in values
+
+    Args:
+        hsv_frames (np.ndarray): uint8 array of shape (N, H, W, 3) of frames in HSV format
+        bins_list (list[int], optional): Numbers of bins per channel to compare. Defaults to [4, 8, 16].
+        repeats (int, optional): Number of runs per function, the fastest one is kept. Defaults to 3.
+
+    Returns:
+        list[dict]: Time of each method, speedup and maximum difference of the histograms per number of bins
+    """
+    results = []
+    for bins in bins_list:
+        runs = [timed(per_image_histograms, hsv_frames, bins) for _ in range(repeats)]
+        expected, per_image_duration = runs[0][0], min(duration for _, duration in runs)
+        runs = [timed(batch_hsv_histograms, hsv_frames, bins) for _ in range(repeats)]
+        actual, batch_duration = runs[0][0], min(duration for _, duration in runs)
+        results.append({
+            'bins': bins,
+            'frames': len(hsv_frames),
+            'per image (ms)': per_image_duration*1000,
+            'batch (ms)': batch_duration*1000,
+            'speedup': per_image_duration / batch_duration,
+            'max difference': float(np.abs(expected - actual).max()) if len(hsv_frames) else 0.0,
+            'allclose': bool(np.allclose(expected, actual, rtol=1e-5, atol=1e-7))
+        })
+    return results
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Compare the vectorized batch histogram to the per-image OpenCV histogram')
+    parser.add_argument('--frames', type=int, default=4096, help='Number of frames (default: %(default)s)')
+    parser.add_argument('--pixel-cache', default=None, 
+                        help='Read the frames from a pixel cache (ex: '+PIXEL_CACHE_PATH+') instead of random frames')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.pixel_cache:
+        cache = PixelCache(args.pixel_cache)
+        hsv_frames = cache.read_pixels(cache.image_ids()[:args.frames])
+    else:
+        hsv_frames = np.random.default_rng(args.seed).integers(0, 256, (args.frames, THUMBNAIL_SIZE, THUMBNAIL_SIZE, 3), dtype=np.uint8)
+    print_results(benchmark_batch_histogram(hsv_frames))
@@ -0,0 +1,111 @@
+from ontology import get_ontology, SPLIT_MANIFEST_PATH
+from image_dataset import ZipImageDataset
+from feature_store import FEATURE_STORE_PATH
+from sklearn.neural_network import MLPClassifier
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from typing import Callable
+from pandas import DataFrame
+import model_training as mt
+import time
+
+DATA_PATH       = 'Data/'
+PIPELINE_NAMES  = ['POC', 'KaggleChallenge']
+
+def add_pipeline_arguments(parser:ArgumentParser):
+    """Add the arguments selecting the pipelines and the images to benchmark on to a parser
+
+    Args:
+        parser (ArgumentParser): Parser of the benchmark script
+    """
+    parser.add_argument('--pipelines', nargs='+', default=PIPELINE_NAMES, 
+                        help='Names of the pipeline directories in '+DATA_PATH+' (default: %(default)s)')
+    parser.add_argument('--split-manifest', default=SPLIT_MANIFEST_PATH, 
+                        help='Train/test split manifest of the images (default: %(default)s)')
+    parser.add_argument('--zip', default=None, 
+                        help='Read the images from the Kaggle Challenge zip file instead of the extracted directories')
+    parser.add_argument('--feature-store', default=FEATURE_STORE_PATH, 
+                        help='Directory of the feature store (default: %(default)s)')
+
+def load_pipeline_data(pipeline_name:str, split_manifest_path:str=SPLIT_MANIFEST_PATH, 
+                       zip_file_path:str=None, feature_store_path:str=FEATURE_STORE_PATH, **extraction_kwargs)->dict:
+    """Load the image features and the class morphological features of a pipeline
+
+    Args:
+        pipeline_name (str): Name of the pipeline directory in DATA_PATH (ex: 'POC')
+        split_manifest_path (str, optional): Train/test split manifest of the images. Defaults to SPLIT_MANIFEST_PATH.
+        zip_file_path (str, optional): If set, images are read from the zip file. Defaults to None.
+        feature_store_path (str, optional): Directory of the feature store. If None, all the features are extracted.
+            Defaults to FEATURE_STORE_PATH.
+        extraction_kwargs: Other arguments of get_images_test_train (ex: decode_scale)
+
+    Returns:
+        dict: Data of the pipeline, with keys x_train, x_test, y_train, y_test (image datasets),
+            x_morph_features, y_morph_features (class morphological features), inids, ontology
+            and extraction_duration (wall time of the extraction of the image features in seconds)
+    """
+    ontology = get_ontology(DATA_PATH+pipeline_name+'/animal_ontology_structure.ttl')
+    morph_features_df = mt.build_class_morph_features_df(ontology)
+    inids = list(morph_features_df['inid'])
+    with ZipImageDataset(zip_file_path, inids) if zip_file_path else nullcontext() as dataset:
+        (x_train, x_test, y_train, y_test), extraction_duration = timed(mt.get_images_test_train,
+            inids=inids, split_manifest_path=split_manifest_path, dataset=dataset, feature_store_path=feature_store_path, 
+            **extraction_kwargs)
+    return {
+        'x_train': x_train, 'x_test': x_test, 'y_train': y_train, 'y_test': y_test,
+        'x_morph_features': morph_features_df[morph_features_df.columns.drop('inid')],
+        'y_morph_features': morph_features_df['inid'].map(mt.get_inid_mapping(inids)).to_numpy(),
+        'inids': inids,
+        'extraction_duration': extraction_duration,
+        'ontology': ontology
+    }
+
+def timed(function:Callable, *args, **kwargs)->tuple[object, float]:
+    """Execute a function and measure its wall time
+
+    Args:
+        function (Callable): Function to execute
+
+    Returns:
+        tuple[object, float]: Result of the function and wall time in seconds
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def morph_features_accuracy(predicted:DataFrame, data:dict)->float:
+    """Accuracy of predicted morphological features of the test images, averaged over all the features
+
+    Args:
+        predicted (DataFrame): Predicted morphological features of the test images
+        data (dict): Data of the pipeline (see load_pipeline_data)
+
+    Returns:
+        float: Mean accuracy
+    """
+    x_morph_features = data['x_morph_features']
+    rows = mt.map_target_to_rows(data['y_test'], data['y_morph_features'])
+    expected = x_morph_features.to_numpy()[rows]
+    return float((predicted[x_morph_features.columns].to_numpy() == expected).mean())
+
+def classification_accuracy(predicted:DataFrame, data:dict)->float:
+    """Accuracy of the default animal classifier fed with predicted morphological features of the test images
+
+    Args:
+        predicted (DataFrame): Predicted morphological features of the test images
+        data (dict): Data of the pipeline (see load_pipeline_data)
+
+    Returns:
+        float: Accuracy of the classification of the test images
+    """
+    classifier = MLPClassifier(max_iter=1000, solver='lbfgs', alpha=1e-5)
+    classifier.fit(data['x_morph_features'], data['y_morph_features'])
+    return float(classifier.score(predicted, data['y_test']))
+
+def print_results(results:list[dict]):
+    """Print benchmark results as a table
+
+    Args:
+        results (list[dict]): One dict per benchmark run, with the same keys
+    """
+    print(DataFrame(results).to_string(index=False, float_format=lambda value: '{:.3f}'.format(value)))
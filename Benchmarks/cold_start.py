@@ -0,0 +1,79 @@
+from Benchmarks.benchmark_tools import print_results
+from argparse import ArgumentParser
+from statistics import median
+import subprocess
+import time
+import sys
+
+COLD_START_RUNS = 5
+# Modules loaded by main.py before the subcommand CLI, when all the steps were imported at the top of the file
+EAGER_MODULES = ['synset_mapper', 'animal_graph', 'ontology', 'model_training', 'sklearn.ensemble']
+# Modules loaded by each subcommand of main.py, including the ones its step imports when it runs
+SUBCOMMAND_MODULES = {
+    'help': [],
+    'map': ['synset_mapper', 'nltk.corpus', 'pandas'],
+    'patterns': ['animal_graph'],
+    'arcs': ['animal_graph', 'pandas'],
+    'structure': ['ontology'],
+    'populate': ['ontology'],
+    'features': ['ontology', 'model_training'],
+    'train': ['ontology', 'model_training'],
+    'predict': ['model_inference']
+}
+
+def import_time(modules:list[str], runs:int=COLD_START_RUNS)->tuple[float, int]:
+    """Measure the cold start of main.py with some modules, each run in a new Python process
+
+    Args:
+        modules (list[str]): Modules imported after main
+        runs (int, optional): Number of runs. Defaults to COLD_START_RUNS.
+
+    Raises:
+        RuntimeError: If the modules can't be imported
+
+    Returns:
+        tuple[float, int]: Median wall time of the runs in seconds and number of modules loaded
+    """
+    code = 'import sys, main'+''.join(', '+module for module in modules)+'; print(len(sys.modules))'
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        durations.append(time.perf_counter() - start)
+        if process.returncode != 0:
+            raise RuntimeError('Import of '+', '.join(['main']+modules)+' failed:\n'+process.stderr)
+    return median(durations), int(process.stdout)
+
+def benchmark_cold_start(subcommands:list[str], runs:int=COLD_START_RUNS)->list[dict]:
+    """Compare the cold start of the subcommands of main.py to the cold start with all the steps imported
+
+    Args:
+        subcommands (list[str]): Names of the subcommands in SUBCOMMAND_MODULES
+        runs (int, optional): Number of runs per subcommand. Defaults to COLD_START_RUNS.
+
+    Raises:
+        ValueError: If a subcommand is unknown
+
+    Returns:
+        list[dict]: Median wall time, number of modules loaded and speedup of each subcommand
+    """
+    unknown = [s for s in subcommands if s not in SUBCOMMAND_MODULES]
+    if unknown:
+        raise ValueError('Unknown subcommands: '+', '.join(unknown))
+    eager_duration, eager_modules = import_time(EAGER_MODULES, runs)
+    results = [{'subcommand': 'eager imports', 'wall (s)': eager_duration, 'modules': eager_modules, 'speedup': 1.0}]
+    for subcommand in subcommands:
+        duration, modules = import_time(SUBCOMMAND_MODULES[subcommand], runs)
+        results.append({'subcommand': subcommand, 'wall (s)': duration, 'modules': modules,
+                        'speedup': eager_duration / duration})
+    return results
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Measure the cold start of the subcommands of main.py, '
+                                        'compared to importing all the steps of the pipeline up front')
+    parser.add_argument('--subcommands', nargs='+', default=list(SUBCOMMAND_MODULES), choices=list(SUBCOMMAND_MODULES),
+                        help='Subcommands to measure (default: all)')
+    parser.add_argument('--runs', type=int, default=COLD_START_RUNS,
+                        help='Number of runs per subcommand, the median is reported (default: %(default)s)')
+    args = parser.parse_args()
+    print_results(benchmark_cold_start(args.subcommands, args.runs))
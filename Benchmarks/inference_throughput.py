@@ -0,0 +1,46 @@
+from Benchmarks.benchmark_tools import timed, print_results
+from model_inference import list_image_files, predict_images
+from model_training import load_model_bundle, MODEL_BUNDLE_FILE_PATH
+from feature_extraction import extract_features_parallel
+from argparse import ArgumentParser
+import os
+
+def benchmark_inference(bundle_file_path:str, image_paths:list[str], workers:list[int], repeats:int=1)->list[dict]:
+    """Measure the throughput of the batch inference of a model bundle, and of the feature extraction alone
+
+    Args:
+        bundle_file_path (str): Path of the model bundle
+        image_paths (list[str]): Images to classify
+        workers (list[int]): Numbers of extraction processes to compare
+        repeats (int, optional): Number of runs per configuration, the fastest one is kept. Defaults to 1.
+
+    Returns:
+        list[dict]: Load time, extraction and inference throughput per number of processes
+    """
+    bundle, load_duration = timed(load_model_bundle, bundle_file_path)
+    results = []
+    for nb_workers in workers:
+        extraction_duration = min(timed(extract_features_parallel, image_paths, workers=nb_workers, progress_bar=False)[1]
+                                  for _ in range(repeats))
+        inference_duration = min(timed(predict_images, bundle, image_paths, workers=nb_workers, progress_bar=False)[1]
+                                 for _ in range(repeats))
+        results.append({
+            'workers': nb_workers,
+            'images': len(image_paths),
+            'bundle load (s)': load_duration,
+            'extraction (images/s)': len(image_paths) / extraction_duration,
+            'inference (images/s)': len(image_paths) / inference_duration
+        })
+    return results
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Measure the throughput of the batch inference in images per second')
+    parser.add_argument('paths', nargs='+', help='Image files or directories of images')
+    parser.add_argument('--bundle', default=MODEL_BUNDLE_FILE_PATH, help='Model bundle file (default: %(default)s)')
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, os.cpu_count()], 
+                        help='Numbers of extraction processes to compare (default: %(default)s)')
+    parser.add_argument('--limit', type=int, default=None, help='Maximum number of images')
+    parser.add_argument('--repeats', type=int, default=1)
+    args = parser.parse_args()
+    image_paths = list_image_files(args.paths)[:args.limit]
+    print_results(benchmark_inference(args.bundle, image_paths, args.workers, args.repeats))
@@ -0,0 +1,106 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from rdflib import Graph, Namespace, RDFS
+from threading import Thread, Lock
+import Tools.sparql_tools as sp
+
+# Prefixes predefined by the WikiData Query Service and used by the queries of the pipeline
+WIKIDATA_NAMESPACES = {
+    'wd': Namespace(sp.WD_ENTITY_URI),
+    'wdt': Namespace('http://www.wikidata.org/prop/direct/'),
+    'p': Namespace('http://www.wikidata.org/prop/'),
+    'pq': Namespace('http://www.wikidata.org/prop/qualifier/'),
+    'rdfs': RDFS
+}
+SPARQL_RESULTS_CONTENT_TYPE = 'application/sparql-results+json'
+
+class LocalSparqlEndpoint:
+    """Local stand-in of the WikiData SPARQL endpoint, answering the queries with an in-memory rdflib graph.
+        While the endpoint is open, every query sent by Tools.sparql_tools without an explicit API URL is sent to it,
+        so that the WikiData steps of the pipeline can be run offline, on synthetic data, at a reproducible speed.
+
+    Args:
+        graph (Graph): Graph of the triples to serve, with the WikiData IRIs (see WIKIDATA_NAMESPACES)
+        host (str, optional): Host of the HTTP server. Defaults to '127.0.0.1'.
+        port (int, optional): Port of the HTTP server. 0 means any free port. Defaults to 0.
+
+    Example:
+        with LocalSparqlEndpoint(graph):
+            create_graph_arcs(synsets, graph_file_path)
+    """
+
+    def __init__(self, graph:Graph, host:str='127.0.0.1', port:int=0):
+        self.graph = graph
+        self.lock = Lock()
+        self.server = ThreadingHTTPServer((host, port), self.request_handler())
+        self.url = 'http://'+host+':'+str(self.server.server_port)+'/sparql'
+        self.queries = 0
+        self.previous_url = None
+
+    def request_handler(self)->type:
+        endpoint = self
+
+        class SparqlRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.answer(parse_qs(urlparse(self.path).query))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                self.answer(parse_qs(body))
+
+            def answer(self, params:dict):
+                if 'query' not in params:
+                    self.send_error(400, 'Missing query parameter')
+                    return
+                try:
+                    content = endpoint.query(params['query'][0])
+                except Exception as e:
+                    self.send_error(400, 'Query failed: '+str(e))
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', SPARQL_RESULTS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return SparqlRequestHandler
+
+    def query(self, query:str)->bytes:
+        """Execute a query on the graph
+
+        Args:
+            query (str): SPARQL SELECT or ASK query
+
+        Returns:
+            bytes: Result of the query in SPARQL JSON results format
+        """
+        with self.lock:
+            self.queries += 1
+            return self.graph.query(query, initNs=WIKIDATA_NAMESPACES).serialize(format='json')
+
+    def open(self)->str:
+        """Start the server and send the queries of Tools.sparql_tools to it
+
+        Returns:
+            str: URL of the endpoint
+        """
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.previous_url = sp.SPARQL_API_URL
+        sp.SPARQL_API_URL = self.url
+        return self.url
+
+    def close(self):
+        """Stop the server and restore the previous endpoint of Tools.sparql_tools"""
+        sp.SPARQL_API_URL = self.previous_url
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self)->'LocalSparqlEndpoint':
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,43 @@
+from Benchmarks.benchmark_tools import (add_pipeline_arguments, load_pipeline_data, timed, 
+                                        morph_features_accuracy, classification_accuracy, print_results)
+from argparse import ArgumentParser
+import model_training as mt
+
+ENGINES = mt.ENGINES
+
+def benchmark_engines(pipeline_name:str, engines:list[str]=ENGINES, **data_kwargs)->list[dict]:
+    """Compare the training engines of predict_all_columns_df on a pipeline
+
+    Args:
+        pipeline_name (str): Name of the pipeline directory (ex: 'POC')
+        engines (list[str], optional): Engines to compare. Defaults to ENGINES.
+
+    Returns:
+        list[dict]: Training time and accuracies per engine
+    """
+    data = load_pipeline_data(pipeline_name, **data_kwargs)
+    results = []
+    for engine in engines:
+        predicted, duration = timed(mt.predict_all_columns_df, data['x_test'], data['x_train'], data['y_train'],
+                                    data['x_morph_features'], data['y_morph_features'], engine=engine)
+        results.append({
+            'pipeline': pipeline_name,
+            'engine': engine,
+            'train_images': len(data['x_train']),
+            'features': len(data['x_morph_features'].columns),
+            'time (s)': duration,
+            'features accuracy': morph_features_accuracy(predicted, data),
+            'accuracy': classification_accuracy(predicted, data)
+        })
+    return results
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Compare the training engines of the morphological features models')
+    add_pipeline_arguments(parser)
+    parser.add_argument('--engines', nargs='+', default=ENGINES, choices=ENGINES)
+    args = parser.parse_args()
+    results = []
+    for pipeline_name in args.pipelines:
+        results += benchmark_engines(pipeline_name, args.engines, split_manifest_path=args.split_manifest, 
+                                     zip_file_path=args.zip, feature_store_path=args.feature_store)
+    print_results(results)
@@ -0,0 +1,244 @@
+from Benchmarks.benchmark_tools import timed, print_results
+from Benchmarks.synthetic_data import write_synthetic_pipeline, synthetic_wikidata_graph, synthetic_features
+from Benchmarks.local_sparql import LocalSparqlEndpoint
+from ontology import initialize_ontology_structure, populate_ontology
+from animal_graph import create_graph_arcs, get_animal_mapping
+from feature_extraction import extract_features_parallel, FEATURES_SIZE
+from pipeline_telemetry import peak_rss_mb
+from multiprocessing import Process, Queue
+from argparse import ArgumentParser
+from csv import DictReader
+import model_training as mt
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+BASELINE_PATH           = 'Benchmarks/pipeline_baseline.json'
+REGRESSION_THRESHOLD    = 0.2
+# Scales of the synthetic inputs, in format name: (number of classes, number of images per class)
+SCALES = {
+    'small': (16, 10),
+    'medium': (64, 25),
+    'large': (256, 50)
+}
+
+def benchmark_graph_arcs(paths:dict, work_dir_path:str)->tuple[int, float]:
+    """Build the graph arcs of the synthetic classes, with the WikiData queries answered by a local endpoint
+
+    Args:
+        paths (dict): Paths of the synthetic inputs (see write_synthetic_pipeline)
+        work_dir_path (str): Directory of the files written by the stage
+
+    Returns:
+        tuple[int, float]: Number of classes processed and wall time of the stage in seconds
+    """
+    synsets = get_animal_mapping(paths['mapping'])
+    with open(paths['arcs'], 'r') as arcs_file:
+        wikidata = synthetic_wikidata_graph(list(DictReader(arcs_file)))
+    arcs_file_path = os.path.join(work_dir_path, 'graph_arcs.csv')
+    if os.path.exists(arcs_file_path):
+        os.remove(arcs_file_path)
+    with LocalSparqlEndpoint(wikidata):
+        _, duration = timed(create_graph_arcs, synsets, arcs_file_path)
+    return len(synsets), duration
+
+def benchmark_ontology_structure(paths:dict, work_dir_path:str)->tuple[int, float]:
+    """Initialize the ontology structure of the synthetic classes
+
+    Args:
+        paths (dict): Paths of the synthetic inputs (see write_synthetic_pipeline)
+        work_dir_path (str): Directory of the files written by the stage
+
+    Returns:
+        tuple[int, float]: Number of classes processed and wall time of the stage in seconds
+    """
+    _, duration = timed(initialize_ontology_structure, paths['arcs'], paths['morph_features'], paths['mapping'])
+    return len(get_animal_mapping(paths['mapping'])), duration
+
+def benchmark_population(paths:dict, work_dir_path:str)->tuple[int, float]:
+    """Populate the ontology structure with the synthetic images and annotations
+
+    Args:
+        paths (dict): Paths of the synthetic inputs (see write_synthetic_pipeline)
+        work_dir_path (str): Directory of the files written by the stage
+
+    Returns:
+        tuple[int, float]: Number of images processed and wall time of the stage in seconds
+    """
+    ontology = initialize_ontology_structure(paths['arcs'], paths['morph_features'], paths['mapping'])
+    _, duration = timed(populate_ontology, ontology, paths['images'], paths['annotations'])
+    return len(paths['image_paths']), duration
+
+def benchmark_feature_extraction(paths:dict, work_dir_path:str)->tuple[int, float]:
+    """Extract the features of the synthetic images with the parallel extractor
+
+    Args:
+        paths (dict): Paths of the synthetic inputs (see write_synthetic_pipeline)
+        work_dir_path (str): Directory of the files written by the stage
+
+    Returns:
+        tuple[int, float]: Number of images processed and wall time of the stage in seconds
+    """
+    _, duration = timed(extract_features_parallel, paths['image_paths'], progress_bar=False)
+    return len(paths['image_paths']), duration
+
+def benchmark_morph_features_training(paths:dict, work_dir_path:str)->tuple[int, float]:
+    """Train the morphological features models on a random features matrix of the size of the synthetic images
+
+    Args:
+        paths (dict): Paths of the synthetic inputs (see write_synthetic_pipeline)
+        work_dir_path (str): Directory of the files written by the stage
+
+    Returns:
+        tuple[int, float]: Number of training images and wall time of the stage in seconds
+    """
+    data = synthetic_features(len(paths['image_paths']), len(get_animal_mapping(paths['mapping'])), FEATURES_SIZE)
+    _, duration = timed(mt.predict_all_columns_df, data['x_test'], data['x_train'], data['y_train'],
+                        data['x_morph_features'], data['y_morph_features'])
+    return len(data['x_train']), duration
+
+STAGES = {
+    'create_graph_arcs': benchmark_graph_arcs,
+    'initialize_ontology_structure': benchmark_ontology_structure,
+    'populate_ontology': benchmark_population,
+    'extract_features_parallel': benchmark_feature_extraction,
+    'predict_all_columns_df': benchmark_morph_features_training
+}
+
+def run_stage(stage_name:str, paths:dict, work_dir_path:str, queue:Queue):
+    """Run a benchmark stage and put its measures in a queue. Executed in its own process
+
+    Args:
+        stage_name (str): Name of the stage in STAGES
+        paths (dict): Paths of the synthetic inputs
+        work_dir_path (str): Directory of the files written by the stage
+        queue (Queue): Queue to put the measures in
+    """
+    items, duration = STAGES[stage_name](paths, work_dir_path)
+    queue.put({'items': items, 'wall (s)': duration, 'peak RSS (MB)': peak_rss_mb(),
+               'items/s': items / duration if duration else float('inf')})
+
+def benchmark_stage(stage_name:str, paths:dict, work_dir_path:str)->dict:
+    """Run a benchmark stage in a new process, so that its peak RSS isn't mixed up with the other stages
+
+    Args:
+        stage_name (str): Name of the stage in STAGES
+        paths (dict): Paths of the synthetic inputs
+        work_dir_path (str): Directory of the files written by the stage
+
+    Raises:
+        RuntimeError: If the stage fails
+
+    Returns:
+        dict: Number of items processed, wall time, peak RSS and throughput of the stage
+    """
+    queue = Queue()
+    process = Process(target=run_stage, args=(stage_name, paths, work_dir_path, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError('Stage "'+stage_name+'" failed with exit code '+str(process.exitcode))
+    return queue.get()
+
+def benchmark_pipeline(scales:list[str], stages:list[str]=list(STAGES), work_dir_path:str=None)->list[dict]:
+    """Benchmark the pipeline stages on synthetic inputs at several scales
+
+    Args:
+        scales (list[str]): Names of the scales in SCALES
+        stages (list[str], optional): Names of the stages in STAGES. Defaults to all the stages.
+        work_dir_path (str, optional): Directory of the synthetic inputs. If None, a temporary directory
+            deleted at the end. Defaults to None.
+
+    Raises:
+        ValueError: If a scale or a stage is unknown
+
+    Returns:
+        list[dict]: Measures per scale and stage
+    """
+    unknown = [s for s in scales if s not in SCALES] + [s for s in stages if s not in STAGES]
+    if unknown:
+        raise ValueError('Unknown scales or stages: '+', '.join(unknown))
+    temporary = work_dir_path is None
+    if temporary:
+        work_dir_path = tempfile.mkdtemp(prefix='pipeline_suite_')
+    results = []
+    try:
+        for scale in scales:
+            nb_classes, images_per_class = SCALES[scale]
+            scale_dir_path = os.path.join(work_dir_path, scale)
+            print('Generating the '+scale+' synthetic inputs ('+str(nb_classes)+' classes, '+
+                  str(nb_classes*images_per_class)+' images)...')
+            paths = write_synthetic_pipeline(scale_dir_path, nb_classes, images_per_class)
+            for stage in stages:
+                print('Benchmarking '+stage+' ('+scale+')...')
+                results.append({'scale': scale, 'stage': stage, **benchmark_stage(stage, paths, scale_dir_path)})
+    finally:
+        if temporary:
+            shutil.rmtree(work_dir_path, ignore_errors=True)
+    return results
+
+def save_baseline(results:list[dict], baseline_path:str=BASELINE_PATH):
+    """Save benchmark results as the baseline of the next runs
+
+    Args:
+        results (list[dict]): Measures per scale and stage (see benchmark_pipeline)
+        baseline_path (str, optional): Path of the baseline file. Defaults to BASELINE_PATH.
+    """
+    baseline = {}
+    for result in results:
+        baseline.setdefault(result['scale'], {})[result['stage']] = {
+            key: result[key] for key in ['items', 'wall (s)', 'peak RSS (MB)', 'items/s']}
+    with open(baseline_path, 'w') as baseline_file:
+        json.dump(baseline, baseline_file, indent=4)
+
+def compare_to_baseline(results:list[dict], baseline_path:str=BASELINE_PATH,
+                        threshold:float=REGRESSION_THRESHOLD)->list[dict]:
+    """Compare benchmark results to a stored baseline.
+        A stage regresses if its wall time or its peak RSS is more than 'threshold' above the baseline
+
+    Args:
+        results (list[dict]): Measures per scale and stage (see benchmark_pipeline)
+        baseline_path (str, optional): Path of the baseline file. Defaults to BASELINE_PATH.
+        threshold (float, optional): Relative tolerance of the measures. Defaults to REGRESSION_THRESHOLD.
+
+    Returns:
+        list[dict]: Results with the ratios of the wall time and of the peak RSS to the baseline
+            (NaN if the stage isn't in the baseline) and a regression flag
+    """
+    with open(baseline_path, 'r') as baseline_file:
+        baseline = json.load(baseline_file)
+    compared = []
+    for result in results:
+        reference = baseline.get(result['scale'], {}).get(result['stage'])
+        ratios = {
+            'wall ratio': result['wall (s)'] / reference['wall (s)'] if reference else float('nan'),
+            'RSS ratio': result['peak RSS (MB)'] / reference['peak RSS (MB)'] if reference else float('nan')
+        }
+        compared.append({**result, **ratios, 'regression': any(ratio > 1+threshold for ratio in ratios.values())})
+    return compared
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Benchmark the pipeline stages on synthetic inputs, with the WikiData queries '
+                                        'answered by a local SPARQL endpoint, and compare them to a stored baseline')
+    parser.add_argument('--scales', nargs='+', default=['small', 'medium'], choices=list(SCALES),
+                        help='Scales of the synthetic inputs (default: %(default)s)')
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES),
+                        help='Stages to benchmark (default: all)')
+    parser.add_argument('--work-dir', default=None,
+                        help='Directory of the synthetic inputs, kept after the run (default: a temporary directory)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline file (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='Save the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Relative tolerance before a stage is reported as a regression (default: %(default)s)')
+    args = parser.parse_args()
+    results = benchmark_pipeline(args.scales, args.stages, args.work_dir)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print('Baseline saved to file "'+args.baseline+'"')
+    elif os.path.exists(args.baseline):
+        results = compare_to_baseline(results, args.baseline, args.threshold)
+    print_results(results)
+    if any(result.get('regression') for result in results):
+        sys.exit(1)
@@ -0,0 +1,52 @@
+from Benchmarks.benchmark_tools import (add_pipeline_arguments, load_pipeline_data, 
+                                        morph_features_accuracy, classification_accuracy, print_results)
+from argparse import ArgumentParser
+import model_training as mt
+
+EXTRACTION_MODES = [(1, False), (2, False), (4, False), (8, False), (1, True), (4, True)]
+
+def benchmark_extraction_modes(pipeline_name:str, modes:list[tuple[int, bool]]=EXTRACTION_MODES, 
+                               workers:int=None, **data_kwargs)->list[dict]:
+    """Compare the extraction time and the accuracy of the decoding scales and of the bounding box regions.
+        No feature store is used, so that every mode extracts all the features
+
+    Args:
+        pipeline_name (str): Name of the pipeline directory (ex: 'POC')
+        modes (list[tuple[int, bool]], optional): Extraction modes to compare, in format (decode_scale, roi).
+            The first one is the baseline. Defaults to EXTRACTION_MODES.
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+
+    Returns:
+        list[dict]: Extraction time, speedup and accuracies per mode
+    """
+    results = []
+    for decode_scale, roi in modes:
+        data = load_pipeline_data(pipeline_name, feature_store_path=None, decode_scale=decode_scale, roi=roi, 
+                                  workers=workers, **data_kwargs)
+        predicted = mt.predict_all_columns_df(data['x_test'], data['x_train'], data['y_train'],
+                                              data['x_morph_features'], data['y_morph_features'])
+        result = {
+            'pipeline': pipeline_name,
+            'scale': '1/'+str(decode_scale),
+            'roi': roi,
+            'images': len(data['x_train']) + len(data['x_test']),
+            'extraction (s)': data['extraction_duration'],
+            'features accuracy': morph_features_accuracy(predicted, data),
+            'accuracy': classification_accuracy(predicted, data)
+        }
+        result['speedup'] = results[0]['extraction (s)'] / result['extraction (s)'] if results else 1.0
+        result['accuracy delta'] = result['accuracy'] - results[0]['accuracy'] if results else 0.0
+        results.append(result)
+    return results
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Report the speedup and the accuracy effect of the reduced-resolution decoding '
+                                        'and of the bounding box regions')
+    add_pipeline_arguments(parser)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    results = []
+    for pipeline_name in args.pipelines:
+        results += benchmark_extraction_modes(pipeline_name, workers=args.workers, 
+                                              split_manifest_path=args.split_manifest, zip_file_path=args.zip)
+    print_results(results)
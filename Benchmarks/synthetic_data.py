@@ -0,0 +1,223 @@
+from Benchmarks.local_sparql import WIKIDATA_NAMESPACES
+from image_dataset import IMAGE_FILE_EXT, ANNOT_FILE_EXT
+from animal_graph import ANIMAL_WDID
+from rdflib import Graph, Literal
+from pandas import DataFrame
+import numpy as np
+import json
+import cv2
+import os
+
+SYNTHETIC_SEED      = 0
+SYNTHETIC_BRANCHING = 4
+SYNTHETIC_FEATURES  = 40
+IMAGE_SIZE          = (160, 120)
+FIRST_SYNTHETIC_ID  = 90000000
+
+def synthetic_class_tree(nb_classes:int, branching:int=SYNTHETIC_BRANCHING)->tuple[list[dict], list[dict]]:
+    """Generate a balanced tree of WikiData-like classes under the animal class.
+        Leaves are the ImageNet classes, and each inner class has at most 'branching' subclasses
+
+    Args:
+        nb_classes (int): Number of leaf classes
+        branching (int, optional): Maximum number of subclasses per class. Defaults to SYNTHETIC_BRANCHING.
+
+    Returns:
+        tuple[list[dict], list[dict]]: Synsets of the leaves, in the format of the synset mapping
+            { synset:list[str], inid:str, wnid:str, wdid:str, label:str, animal_pattern:str },
+            and arcs of the tree in format { parent:str, child:str, parentLabel:str, childLabel:str }
+    """
+    def new_class()->dict:
+        index = FIRST_SYNTHETIC_ID + len(classes)
+        classes.append({'wdid': 'Q'+str(index), 'label': 'Synthetic Class '+str(len(classes))})
+        return classes[-1]
+
+    classes = []
+    arcs = []
+    level = [new_class() for _ in range(nb_classes)]
+    synsets = [{
+        'synset': [c['label'].lower()],
+        'inid': 'n'+str(FIRST_SYNTHETIC_ID+i),
+        'wnid': str(FIRST_SYNTHETIC_ID+i)+'-n',
+        'wdid': c['wdid'],
+        'label': c['label'],
+        'animal_pattern': 'subclass'
+    } for i, c in enumerate(level)]
+    while len(level) > branching:
+        parents = []
+        for start in range(0, len(level), branching):
+            parents.append(new_class())
+            for child in level[start:start+branching]:
+                arcs.append({'parent': parents[-1]['wdid'], 'child': child['wdid'],
+                             'parentLabel': parents[-1]['label'], 'childLabel': child['label']})
+        level = parents
+    for child in level:
+        arcs.append({'parent': ANIMAL_WDID, 'child': child['wdid'], 'parentLabel': 'Animal', 'childLabel': child['label']})
+    return synsets, arcs
+
+def synthetic_wikidata_graph(arcs:list[dict])->Graph:
+    """Build the WikiData triples of a class tree: English labels and subclass links (wdt:P279)
+
+    Args:
+        arcs (list[dict]): Arcs of the tree in format { parent:str, child:str, parentLabel:str, childLabel:str }
+
+    Returns:
+        Graph: WikiData-like graph to serve with a LocalSparqlEndpoint
+    """
+    wd, wdt, rdfs = WIKIDATA_NAMESPACES['wd'], WIKIDATA_NAMESPACES['wdt'], WIKIDATA_NAMESPACES['rdfs']
+    graph = Graph()
+    for arc in arcs:
+        graph.add((wd[arc['child']], wdt.P279, wd[arc['parent']]))
+        graph.add((wd[arc['child']], rdfs.label, Literal(arc['childLabel'].lower(), lang='en')))
+        graph.add((wd[arc['parent']], rdfs.label, Literal(arc['parentLabel'].lower(), lang='en')))
+    return graph
+
+def synthetic_morph_features(arcs:list[dict], nb_features:int=SYNTHETIC_FEATURES,
+                             seed:int=SYNTHETIC_SEED)->dict[str, list[str]]:
+    """Draw the morphological features of the classes of a tree.
+        Each feature is given to one class and inherited by its subclasses, as in animal_features.json
+
+    Args:
+        arcs (list[dict]): Arcs of the tree
+        nb_features (int, optional): Number of distinct features. Defaults to SYNTHETIC_FEATURES.
+        seed (int, optional): Seed of the random draw. Defaults to SYNTHETIC_SEED.
+
+    Returns:
+        dict[str, list[str]]: Morphological features per class label
+    """
+    rng = np.random.default_rng(seed)
+    labels = sorted(set([a['childLabel'] for a in arcs]))
+    features = {label: [] for label in labels}
+    for feature in range(nb_features):
+        features[labels[rng.integers(len(labels))]].append('synthetic feature '+str(feature))
+    return features
+
+def synthetic_image(rng:np.random.Generator, size:tuple[int, int]=IMAGE_SIZE)->tuple[np.ndarray, list[int]]:
+    """Draw a small image: a colored background with a colored rectangle, and some noise
+
+    Args:
+        rng (np.random.Generator): Random generator
+        size (tuple[int, int], optional): Size of the image in format (width, height). Defaults to IMAGE_SIZE.
+
+    Returns:
+        tuple[np.ndarray, list[int]]: BGR image and bounding box of the rectangle in format [xmin, ymin, xmax, ymax]
+    """
+    width, height = size
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = rng.integers(0, 256, 3)
+    xmin, ymin = int(rng.integers(0, width//2)), int(rng.integers(0, height//2))
+    xmax, ymax = int(rng.integers(xmin+width//4, width)), int(rng.integers(ymin+height//4, height))
+    image[ymin:ymax, xmin:xmax] = rng.integers(0, 256, 3)
+    noise = rng.integers(-16, 16, image.shape)
+    return np.clip(image.astype(np.int16)+noise, 0, 255).astype(np.uint8), [xmin, ymin, xmax, ymax]
+
+def annotation_xml(image_id:str, inid:str, size:tuple[int, int], box:list[int])->str:
+    """Write the annotation of an image in the XML format of the ImageNet annotations
+
+    Args:
+        image_id (str): ID of the image
+        inid (str): ImageNet ID of the class of the image
+        size (tuple[int, int]): Size of the image in format (width, height)
+        box (list[int]): Bounding box of the object in format [xmin, ymin, xmax, ymax]
+
+    Returns:
+        str: Content of the annotation file
+    """
+    coordinates = ''.join('<'+key+'>'+str(value)+'</'+key+'>' for key, value in zip(['xmin', 'ymin', 'xmax', 'ymax'], box))
+    return ('<annotation><folder>'+inid+'</folder><filename>'+image_id+'</filename>'
+            '<size><width>'+str(size[0])+'</width><height>'+str(size[1])+'</height><depth>3</depth></size>'
+            '<object><name>'+inid+'</name><bndbox>'+coordinates+'</bndbox></object></annotation>')
+
+def write_synthetic_images(images_dir_path:str, annot_dir_path:str, inids:list[str], images_per_class:int,
+                           size:tuple[int, int]=IMAGE_SIZE, seed:int=SYNTHETIC_SEED)->list[str]:
+    """Write JPEG images and their XML annotations, with one directory per ImageNet ID like the extracted challenge files
+
+    Args:
+        images_dir_path (str): Directory of the images
+        annot_dir_path (str): Directory of the annotations
+        inids (list[str]): ImageNet IDs of the classes
+        images_per_class (int): Number of images per class
+        size (tuple[int, int], optional): Size of the images in format (width, height). Defaults to IMAGE_SIZE.
+        seed (int, optional): Seed of the random images. Defaults to SYNTHETIC_SEED.
+
+    Returns:
+        list[str]: Paths of the image files
+    """
+    rng = np.random.default_rng(seed)
+    image_paths = []
+    for inid in inids:
+        os.makedirs(os.path.join(images_dir_path, inid), exist_ok=True)
+        os.makedirs(os.path.join(annot_dir_path, inid), exist_ok=True)
+        for i in range(images_per_class):
+            image_id = inid+'_'+str(i)
+            image, box = synthetic_image(rng, size)
+            image_path = os.path.join(images_dir_path, inid, image_id+IMAGE_FILE_EXT)
+            with open(image_path, 'wb') as image_file:
+                image_file.write(cv2.imencode('.jpg', image)[1].tobytes())
+            with open(os.path.join(annot_dir_path, inid, image_id+ANNOT_FILE_EXT), 'w') as annot_file:
+                annot_file.write(annotation_xml(image_id, inid, size, box))
+            image_paths.append(image_path)
+    return image_paths
+
+def write_synthetic_pipeline(dir_path:str, nb_classes:int, images_per_class:int,
+                             branching:int=SYNTHETIC_BRANCHING, seed:int=SYNTHETIC_SEED)->dict:
+    """Write the input files of the pipeline stages for a synthetic set of classes:
+        synset mapping, graph arcs, morphological features, images and annotations
+
+    Args:
+        dir_path (str): Directory to write the files in
+        nb_classes (int): Number of ImageNet classes
+        images_per_class (int): Number of images per class
+        branching (int, optional): Maximum number of subclasses per class. Defaults to SYNTHETIC_BRANCHING.
+        seed (int, optional): Seed of the random data. Defaults to SYNTHETIC_SEED.
+
+    Returns:
+        dict: Paths of the files (mapping, arcs, morph_features, images, annotations, image_paths).
+            The WikiData graph of the classes is built from the arcs file by synthetic_wikidata_graph
+    """
+    synsets, arcs = synthetic_class_tree(nb_classes, branching)
+    paths = {
+        'mapping': os.path.join(dir_path, 'synset_mapping.json'),
+        'arcs': os.path.join(dir_path, 'graph_arcs.csv'),
+        'morph_features': os.path.join(dir_path, 'animal_features.json'),
+        'images': os.path.join(dir_path, 'Images', ''),
+        'annotations': os.path.join(dir_path, 'Annotations', '')
+    }
+    os.makedirs(dir_path, exist_ok=True)
+    with open(paths['mapping'], 'w') as file:
+        json.dump(synsets, file)
+    DataFrame(arcs, columns=['parent', 'child', 'parentLabel', 'childLabel']).to_csv(
+        paths['arcs'], index=False, header=True, lineterminator='\n')
+    with open(paths['morph_features'], 'w') as file:
+        json.dump(synthetic_morph_features(arcs, seed=seed), file)
+    paths['image_paths'] = write_synthetic_images(paths['images'], paths['annotations'],
+                                                  [s['inid'] for s in synsets], images_per_class, seed=seed)
+    return paths
+
+def synthetic_features(nb_images:int, nb_classes:int, nb_features:int, nb_columns:int=SYNTHETIC_FEATURES,
+                       seed:int=SYNTHETIC_SEED)->dict:
+    """Draw a random image features matrix, with the class targets and boolean morphological features of the classes.
+        The features of each class are centered on their own point, so that the models have something to learn
+
+    Args:
+        nb_images (int): Number of images
+        nb_classes (int): Number of classes
+        nb_features (int): Number of image features per image (ex: FEATURES_SIZE)
+        nb_columns (int, optional): Number of morphological features. Defaults to SYNTHETIC_FEATURES.
+        seed (int, optional): Seed of the random draw. Defaults to SYNTHETIC_SEED.
+
+    Returns:
+        dict: x_train, y_train, x_test (float32 features and int targets of the images),
+            x_morph_features (DataFrame of the morphological features per class) and y_morph_features (codes of the classes)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.random((nb_classes, nb_features), dtype=np.float32)
+    y = rng.integers(0, nb_classes, nb_images)
+    x = centers[y] + rng.normal(0, 0.1, (nb_images, nb_features)).astype(np.float32)
+    nb_train = nb_images*4//5
+    return {
+        'x_train': x[:nb_train], 'y_train': y[:nb_train], 'x_test': x[nb_train:],
+        'x_morph_features': DataFrame(rng.random((nb_classes, nb_columns)) < 0.3,
+                                      columns=['feature_'+str(c) for c in range(nb_columns)]),
+        'y_morph_features': np.arange(nb_classes)
+    }
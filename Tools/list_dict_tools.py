@@ -1,6 +1,5 @@
 from typing import Callable
 import json
-import pandas as pd
 from pprint import pprint
 from time import sleep
 from tqdm import tqdm
@@ -71,6 +70,7 @@ def ld_join(left_list:list[dict], right_list:list[dict], on:str, join_type='inne
     Returns:
         list[dict]: joined list of dicts
     """
+    import pandas as pd
     left_df = pd.DataFrame(left_list)
     right_df = pd.DataFrame(right_list)
     full_df = left_df.join(right_df.set_index(on), on, how=join_type)
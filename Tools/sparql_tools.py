@@ -8,9 +8,11 @@ TAXON_PROP = 'wdt:P171'
 SUBCLASS_PROP = 'wdt:P279'
 INSTANCE_PROP = 'wdt:P31'
 LABEL_PROP = 'rdfs:label'
+# Endpoint of the queries sent without an explicit API URL (ex: a local endpoint serving a copy of the data)
+SPARQL_API_URL = 'https://query.wikidata.org/sparql'
 
 def bulk_select(values_list:list[str], unformatted_query:str, return_keys:list[str]
-                   , prefix:str=None, step=400, sparql_api_url:str="https://query.wikidata.org/sparql"):
+                   , prefix:str=None, step=400, sparql_api_url:str=None):
     """Execute a select query with a VALUES list which is too long to be executed all at once
 
     Args:
@@ -22,7 +24,7 @@ def bulk_select(values_list:list[str], unformatted_query:str, return_keys:list[s
         prefix (str, optional): prefix of each element of the VALUES list. 
         If 'str', values are put in between quotation marks. Defaults to None.
         step (int, optional): Number of values to put into each run of the query. Defaults to 400.
-        sparql_api_url (str, optional): API endpoint to send the query to. Defaults to "https://query.wikidata.org/sparql".
+        sparql_api_url (str, optional): API endpoint to send the query to. If None, SPARQL_API_URL. Defaults to None.
 
     Returns:
         list[dict]: Return the result of the query in list dict format. Each dict has all the key names of 'return_keys'
@@ -44,18 +46,18 @@ def bulk_select(values_list:list[str], unformatted_query:str, return_keys:list[s
         start_index = end_index
     return full_result
 
-def select_query(query:str, return_keys:list[str], sparql_api_url:str="https://query.wikidata.org/sparql")->list[dict]:
+def select_query(query:str, return_keys:list[str], sparql_api_url:str=None)->list[dict]:
     """Send a SELECT query to an API endpoint and return the formatted result of the query
 
     Args:
         query (str): SPARQL SELECT query to execute
         return_keys (list[str]): The list of returned variable names of the query (ex: SELECT ?o ?p --> ['o', 'p'])
-        sparql_api_url (str, optional): API endpoint to send the query to. Defaults to "https://query.wikidata.org/sparql".
+        sparql_api_url (str, optional): API endpoint to send the query to. If None, SPARQL_API_URL. Defaults to None.
 
     Returns:
         list[dict]: Return the result of the query in list dict format. Each dict has all the key names of 'return_keys'
     """
-    sparql = SPARQLWrapper(sparql_api_url)
+    sparql = SPARQLWrapper(sparql_api_url or SPARQL_API_URL)
     sparql.setReturnFormat(JSON)
     sparql.setQuery(query)
     result = sparql.query().convert()['results']['bindings']
@@ -67,17 +69,17 @@ def select_query(query:str, return_keys:list[str], sparql_api_url:str="https://q
             mapped_result.append(r_dict)
     return mapped_result
 
-def ask_query(query:str, sparql_api_url:str="https://query.wikidata.org/sparql")->bool:
+def ask_query(query:str, sparql_api_url:str=None)->bool:
     """Send an ASK query to an API endpoint and return the result   
 
     Args:
         query (str): SPARQL ASK query to execute
-        sparql_api_url (str, optional): API endpoint to send the query to. Defaults to "https://query.wikidata.org/sparql".
+        sparql_api_url (str, optional): API endpoint to send the query to. If None, SPARQL_API_URL. Defaults to None.
 
     Returns:
         bool: Result of the query
     """
-    sparql = SPARQLWrapper(sparql_api_url)
+    sparql = SPARQLWrapper(sparql_api_url or SPARQL_API_URL)
     sparql.setReturnFormat(JSON)
     sparql.setQuery(query)
     return sparql.query().convert()['boolean']
@@ -0,0 +1,267 @@
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.neural_network import MLPClassifier
+from joblib import Parallel, delayed
+import numpy as np
+
+HAMMING_BATCH_SIZE = 1024
+POPCOUNT_TABLE = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+def pack_bits(x:np.ndarray)->np.ndarray:
+    """Pack the rows of a boolean matrix into 64-bit words
+
+    Args:
+        x (np.ndarray): Boolean matrix of shape (nb_rows, nb_bits)
+
+    Returns:
+        np.ndarray: uint64 matrix of shape (nb_rows, ceil(nb_bits/64))
+    """
+    x = np.asarray(x, dtype=bool)
+    nb_words = max((x.shape[1] + 63) // 64, 1)
+    packed = np.zeros((x.shape[0], nb_words*8), dtype=np.uint8)
+    packed[:, :(x.shape[1] + 7) // 8] = np.packbits(x, axis=1, bitorder='little')
+    return packed.view(np.uint64)
+
+def popcount(words:np.ndarray)->np.ndarray:
+    """Count the bits set in each 64-bit word of an array
+
+    Args:
+        words (np.ndarray): uint64 array
+
+    Returns:
+        np.ndarray: Number of bits set in each word
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return POPCOUNT_TABLE[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+class HammingClassifier(ClassifierMixin, BaseEstimator):
+    """Nearest-prototype classifier of boolean feature vectors. Each class is represented by its row of features 
+        (ex: the morphological features of the animal class), packed in 64-bit words, 
+        and a row is classified as the class at the smallest Hamming distance, computed by XOR and popcount.
+        With feature weights or with a per-row confidence, the distance is the sum of the weights of the differing features.
+        Ties are resolved in favour of the first class.
+
+    Args:
+        feature_weights (np.ndarray, optional): Weight of each feature in the distance (ex: accuracy of the prediction
+            of the feature). If None, the plain Hamming distance is used. Defaults to None.
+        batch_size (int, optional): Number of rows classified at once. Defaults to HAMMING_BATCH_SIZE.
+    """
+
+    def __init__(self, feature_weights:np.ndarray=None, batch_size:int=HAMMING_BATCH_SIZE):
+        self.feature_weights = feature_weights
+        self.batch_size = batch_size
+
+    def fit(self, x, y):
+        """Store the prototype of each class
+
+        Args:
+            x (DataFrame|np.ndarray): Boolean features of each class, one row per class
+            y (np.ndarray): Class of each row
+
+        Returns:
+            HammingClassifier: The fitted classifier
+        """
+        self.feature_names_ = list(x.columns) if hasattr(x, 'columns') else None
+        self.prototypes_ = np.asarray(x, dtype=bool)
+        self.packed_prototypes_ = pack_bits(self.prototypes_)
+        self.classes_ = np.asarray(y)
+        return self
+
+    def distances(self, x, confidence:np.ndarray=None)->np.ndarray:
+        """Compute the distance of rows to each class prototype
+
+        Args:
+            x (DataFrame|np.ndarray): Boolean features of the rows, with the same columns as the fitted ones
+            confidence (np.ndarray, optional): Confidence of each predicted feature of each row, of the shape of x.
+                Multiplied by the feature weights if both are set. Defaults to None.
+
+        Returns:
+            np.ndarray: float32 distances of shape (nb_rows, nb_classes)
+        """
+        if self.feature_names_ is not None and hasattr(x, 'columns'):
+            x = x[self.feature_names_]
+        x = np.asarray(x, dtype=bool)
+        weighted = confidence is not None or self.feature_weights is not None
+        distances = np.empty((len(x), len(self.classes_)), dtype=np.float32)
+        for start in range(0, len(x), self.batch_size):
+            x_batch = x[start:start+self.batch_size]
+            if not weighted:
+                xor = pack_bits(x_batch)[:, None, :] ^ self.packed_prototypes_[None, :, :]
+                distances[start:start+len(x_batch)] = popcount(xor).sum(axis=-1)
+                continue
+            weights = np.ones(x_batch.shape, dtype=np.float32)
+            if confidence is not None:
+                weights *= np.asarray(confidence[start:start+self.batch_size], dtype=np.float32)
+            if self.feature_weights is not None:
+                weights *= np.asarray(self.feature_weights, dtype=np.float32)
+            # sum_f w_f*(x_f XOR p_f) = sum_f w_f*x_f + sum_f w_f*(1-2*x_f)*p_f
+            distances[start:start+len(x_batch)] = ((weights*x_batch).sum(axis=1)[:, None] + 
+                                                   (weights*(1 - 2*x_batch.astype(np.float32))) @ self.prototypes_.T)
+        return distances
+
+    def predict(self, x, confidence:np.ndarray=None)->np.ndarray:
+        """Classify rows as the class of the nearest prototype
+
+        Args:
+            x (DataFrame|np.ndarray): Boolean features of the rows, with the same columns as the fitted ones
+            confidence (np.ndarray, optional): Confidence of each predicted feature of each row (see distances). 
+                Defaults to None.
+
+        Returns:
+            np.ndarray: Class of each row
+        """
+        return self.classes_[np.argmin(self.distances(x, confidence), axis=1)]
+
+class HierarchicalClassifier(ClassifierMixin, BaseEstimator):
+    """Top-down classifier following a class tree. A local classifier is trained at each internal node of the tree
+        to choose the child subtree of a row, and a row is classified by routing it from the root to a leaf, 
+        which costs O(depth x branching) local predictions instead of scoring every class.
+        Subtrees without training classes are pruned, and nodes with a single child are skipped.
+        The local classifiers are trained in parallel processes.
+
+    Args:
+        tree (dict[object, list]): Children of each internal node. Leaves are the classes (values of the target),
+            and are not keys of the dict (see model_training.build_class_tree)
+        root (object): Root node of the tree
+        classifier (BaseEstimator, optional): Local classifier, cloned at each node. Defaults to MLPClassifier.
+        beam_width (int, optional): Number of paths kept per row while going down the tree. 
+            With 1, each row greedily follows the most likely child. Above 1, the local classifier must support 
+            predict_proba and the leaf of highest probability among the kept paths is chosen. Defaults to 1.
+        n_jobs (int, optional): Number of processes training the local classifiers. -1 means one per core. Defaults to -1.
+    """
+
+    def __init__(self, tree:dict, root:object, classifier:BaseEstimator=None, beam_width:int=1, n_jobs:int=-1):
+        self.tree = tree
+        self.root = root
+        self.classifier = classifier
+        self.beam_width = beam_width
+        self.n_jobs = n_jobs
+
+    def fit(self, x, y):
+        """Train the local classifier of each internal node
+
+        Args:
+            x (DataFrame|np.ndarray): Training features
+            y (np.ndarray): Class of each row, leaf of the tree
+
+        Raises:
+            ValueError: If no class of the target is a leaf of the tree
+
+        Returns:
+            HierarchicalClassifier: The fitted classifier
+        """
+        self.feature_names_ = list(x.columns) if hasattr(x, 'columns') else None
+        x = np.asarray(x)
+        y = np.asarray(y)
+        self.classes_ = np.unique(y)
+        train_classes = set(self.classes_.tolist())
+
+        # Nodes are numbered, a leaf has a class and no children, an internal node has children and no class.
+        # A node reachable from several parents is only kept below the first one
+        self.node_children_ = []
+        self.node_class_ = []
+        node_leaves = []
+        visited = set()
+        def build_node(node)->int:
+            visited.add(node)
+            if node not in self.tree:
+                if node not in train_classes:
+                    return None
+                self.node_children_.append([])
+                self.node_class_.append(node)
+                node_leaves.append({node})
+                return len(self.node_children_) - 1
+            children = [build_node(child) for child in self.tree[node] if child not in visited]
+            children = [child for child in children if child is not None]
+            if len(children) <= 1:
+                return children[0] if children else None
+            self.node_children_.append(children)
+            self.node_class_.append(None)
+            node_leaves.append(set().union(*[node_leaves[child] for child in children]))
+            return len(self.node_children_) - 1
+        self.root_ = build_node(self.root)
+        if self.root_ is None:
+            raise ValueError('None of the classes of the target is a leaf of the tree')
+
+        internal_nodes = [node for node, children in enumerate(self.node_children_) if children]
+        jobs = []
+        for node in internal_nodes:
+            child_index = {}
+            for i, child in enumerate(self.node_children_[node]):
+                for leaf_class in node_leaves[child]:
+                    child_index[leaf_class] = i
+            rows = np.flatnonzero(np.isin(y, list(child_index)))
+            target = np.array([child_index[value] for value in y[rows].tolist()], dtype=np.int64)
+            jobs.append((x[rows], target))
+        classifier = self.classifier if self.classifier is not None else MLPClassifier(max_iter=1000, solver='lbfgs', alpha=1e-5)
+        models = Parallel(n_jobs=self.n_jobs)(delayed(fit_local_classifier)(clone(classifier), x_node, target) 
+                                              for x_node, target in jobs)
+        self.node_model_ = [None]*len(self.node_children_)
+        for node, model in zip(internal_nodes, models):
+            self.node_model_[node] = model
+        return self
+
+    def predict(self, x)->np.ndarray:
+        """Classify rows by routing them down the tree
+
+        Args:
+            x (DataFrame|np.ndarray): Features of the rows, with the same columns as the fitted ones
+
+        Returns:
+            np.ndarray: Class of each row
+        """
+        if self.feature_names_ is not None and hasattr(x, 'columns'):
+            x = x[self.feature_names_]
+        x = np.asarray(x)
+        # Each path going down the tree is a (row, node, log probability) hypothesis
+        hyp_rows = np.arange(len(x))
+        hyp_nodes = np.full(len(x), self.root_, dtype=np.int64)
+        hyp_scores = np.zeros(len(x))
+        is_leaf = np.array([not children for children in self.node_children_])
+        while not is_leaf[hyp_nodes].all():
+            at_leaf = is_leaf[hyp_nodes]
+            new_rows, new_nodes, new_scores = [hyp_rows[at_leaf]], [hyp_nodes[at_leaf]], [hyp_scores[at_leaf]]
+            for node in np.unique(hyp_nodes[~at_leaf]):
+                selection = np.flatnonzero(hyp_nodes == node)
+                rows = hyp_rows[selection]
+                children = np.array(self.node_children_[node], dtype=np.int64)
+                model = self.node_model_[node]
+                if self.beam_width == 1:
+                    new_rows.append(rows)
+                    new_nodes.append(children[np.asarray(model.predict(x[rows]), dtype=np.int64)])
+                    new_scores.append(hyp_scores[selection])
+                    continue
+                log_proba = np.log(np.clip(model.predict_proba(x[rows]), 1e-12, None))
+                child_index = np.asarray(model.classes_, dtype=np.int64)
+                new_rows.append(np.repeat(rows, len(child_index)))
+                new_nodes.append(np.tile(children[child_index], len(rows)))
+                new_scores.append((hyp_scores[selection][:, None] + log_proba).ravel())
+            hyp_rows, hyp_nodes, hyp_scores = np.concatenate(new_rows), np.concatenate(new_nodes), np.concatenate(new_scores)
+            if self.beam_width > 1:
+                # Keep the beam_width best hypotheses of each row
+                order = np.lexsort((-hyp_scores, hyp_rows))
+                hyp_rows, hyp_nodes, hyp_scores = hyp_rows[order], hyp_nodes[order], hyp_scores[order]
+                row_starts = np.searchsorted(hyp_rows, hyp_rows, side='left')
+                kept = np.arange(len(hyp_rows)) - row_starts < self.beam_width
+                hyp_rows, hyp_nodes, hyp_scores = hyp_rows[kept], hyp_nodes[kept], hyp_scores[kept]
+
+        # Best hypothesis of each row
+        order = np.lexsort((-hyp_scores, hyp_rows))
+        first = np.r_[True, hyp_rows[order][1:] != hyp_rows[order][:-1]] if len(order) else np.zeros(0, dtype=bool)
+        best_nodes = np.empty(len(x), dtype=np.int64)
+        best_nodes[hyp_rows[order][first]] = hyp_nodes[order][first]
+        node_class = np.array(self.node_class_, dtype=object)
+        return node_class[best_nodes].astype(self.classes_.dtype)
+
+def fit_local_classifier(classifier:BaseEstimator, x:np.ndarray, y:np.ndarray)->BaseEstimator:
+    """Fit the local classifier of a node of a HierarchicalClassifier
+
+    Args:
+        classifier (BaseEstimator): Classifier to fit
+        x (np.ndarray): Features of the rows of the classes below the node
+        y (np.ndarray): Index of the child of the node containing the class of each row
+
+    Returns:
+        BaseEstimator: Fitted classifier
+    """
+    return classifier.fit(x, y)
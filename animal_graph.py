@@ -3,7 +3,6 @@ import Tools.list_dict_tools as LDtools
 import Tools.sparql_tools as sp
 from csv import DictReader
 from tqdm import tqdm
-import pandas as pd
 import json
 import os
 
@@ -115,6 +114,9 @@ def create_graph_arcs(synsets:list[dict], tree_structure_file_path:str=GRAPH_ARC
         KeyError: If the synsets have been correctly instantiated. 
             They need 'wdid', a valid 'animal_pattern' and the matching animal path mapping 
     """
+    # Imported here, so that the other WikiData steps start without loading pandas
+    import pandas as pd
+
     def child_exists(tree_df:pd.DataFrame, child:str)->bool:
         return (tree_df['child']==child).any()
         
@@ -0,0 +1,460 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Thread, Event
+from queue import Queue, Full
+from typing import Callable
+from hashlib import blake2b
+from functools import cached_property
+from tqdm import tqdm
+import numpy as np
+import inspect
+import cv2
+import os
+
+FEATURES_SIZE           = 512
+EXTRACTION_CHUNK_SIZE   = 64
+PREFETCH_CHUNKS         = 8
+IO_THREADS              = 4
+# Seconds the prefetch thread waits for room in the queue before checking whether the extraction stopped
+PREFETCH_POLL_TIMEOUT   = 0.1
+OPENCV_THREADS          = 1
+FEATURE_EXTRACTOR_VERSION = '1'
+DECODE_FLAGS            = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 
+                           4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+DEFAULT_EXTRACTOR       = 'hsv_histogram'
+HOG_WINDOW_SIZE         = 64
+EDGE_ORIENTATION_BINS   = 18
+THUMBNAIL_SIZE          = 64
+
+# Registry of the feature extractors: name -> (function computing the features of an ImageFrame, number of features)
+FEATURE_EXTRACTORS = {}
+# Vectorized versions of extractors: name -> function computing the features of a stack of equal-size HSV frames
+BATCH_EXTRACTORS = {}
+
+def extract_image_features(image_path:str):
+    """Extract an array of features from an image
+
+    Args:
+        image_path (str): Path of the image to get the features of
+
+    Returns:
+        ndarray: array of shape(512, ) containing the features of the image
+    """
+    return compute_image_features(cv2.imread(image_path))
+
+def compute_image_features(image, mask=None):
+    """Compute the array of features of a decoded image
+
+    Args:
+        image (ndarray): Image decoded in BGR format (ex: by cv2.imread or cv2.imdecode)
+        mask (ndarray, optional): uint8 mask of the pixels to compute the features of. If None, the whole image. Defaults to None.
+
+    Returns:
+        ndarray: array of shape(512, ) containing the features of the image
+    """
+    return hsv_histogram(cv2.cvtColor(image, cv2.COLOR_BGR2HSV), mask, 8)
+
+def hsv_histogram(hsv_image, mask=None, bins:int=8):
+    """Compute the normalized 3D histogram of an HSV image
+
+    Args:
+        hsv_image (ndarray): Image in HSV format
+        mask (ndarray, optional): uint8 mask of the pixels to count. If None, the whole image. Defaults to None.
+        bins (int, optional): Number of bins per channel. Defaults to 8.
+
+    Returns:
+        ndarray: array of shape(bins**3, ) containing the histogram
+    """
+    hist = cv2.calcHist([hsv_image], [0, 1, 2], mask, [bins, bins, bins], [0, 256, 0, 256, 0, 256])
+    hist = cv2.normalize(hist, hist).flatten()
+    return hist
+
+class ImageFrame:
+    """Decoded image shared by all the feature extractors. The color conversions are computed once, 
+        on the first access, and reused by every extractor needing them
+
+    Args:
+        image (ndarray): Image decoded in BGR format. Can be None if hsv is set.
+        mask (ndarray, optional): uint8 mask of the region to compute the features of. If None, the whole image. 
+            Defaults to None.
+        hsv (ndarray, optional): Image in HSV format, if already converted (ex: read from the pixel cache). Defaults to None.
+    """
+
+    def __init__(self, image, mask=None, hsv=None):
+        self.mask = mask
+        if image is not None:
+            self.bgr = image
+        if hsv is not None:
+            self.hsv = hsv
+
+    @cached_property
+    def bgr(self):
+        return cv2.cvtColor(self.hsv, cv2.COLOR_HSV2BGR)
+
+    @cached_property
+    def hsv(self):
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2HSV)
+
+    @cached_property
+    def gray(self):
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def region(self)->tuple[int, int, int, int]:
+        """Bounding rectangle (x, y, width, height) of the mask, or the whole image if there is no mask"""
+        if self.mask is None:
+            height, width = (self.hsv if 'hsv' in self.__dict__ else self.bgr).shape[:2]
+            return 0, 0, width, height
+        return cv2.boundingRect(self.mask)
+
+def register_extractor(name:str, size:int)->Callable:
+    """Decorator adding a feature extractor to the registry. The extractor takes an ImageFrame 
+        and returns an array of 'size' features
+
+    Args:
+        name (str): Name of the extractor, used as name of its block in the feature store
+        size (int): Number of features computed by the extractor
+
+    Returns:
+        Callable: Decorator registering the function
+    """
+    def decorator(function:Callable)->Callable:
+        FEATURE_EXTRACTORS[name] = (function, size)
+        return function
+    return decorator
+
+def batch_hsv_histograms(hsv_frames:np.ndarray, bins:int=8, masks:np.ndarray=None)->np.ndarray:
+    """Compute the normalized 3D histograms of a stack of HSV frames at once. Channels are quantized with integer 
+        arithmetic, all the histograms are counted by a single bincount over the bins offset by the index of the frame,
+        and normalized together. The result matches hsv_histogram applied to each frame
+
+    Args:
+        hsv_frames (np.ndarray): uint8 array of shape (N, H, W, 3) of frames in HSV format
+        bins (int, optional): Number of bins per channel. Defaults to 8.
+        masks (np.ndarray, optional): uint8 array of shape (N, H, W) of the pixels to count. If None, all the pixels.
+            Defaults to None.
+
+    Returns:
+        np.ndarray: float32 array of shape (N, bins**3) containing the histograms
+    """
+    nb_frames = len(hsv_frames)
+    hist_size = bins**3
+    # Same bin as calcHist with the uniform range [0, 256): floor(value*bins/256)
+    quantized = (hsv_frames.astype(np.uint16) * bins) >> 8
+    indexes = ((quantized[..., 0].astype(np.int64) * bins + quantized[..., 1]) * bins + quantized[..., 2]).reshape(nb_frames, -1)
+    indexes += np.arange(nb_frames, dtype=np.int64)[:, None] * hist_size
+    if masks is not None:
+        indexes = indexes[np.asarray(masks).reshape(nb_frames, -1) > 0]
+    counts = np.bincount(indexes.ravel(), minlength=nb_frames*hist_size).reshape(nb_frames, hist_size).astype(np.float64)
+    # L2 normalization, as cv2.normalize with its default arguments
+    norms = np.sqrt(np.square(counts).sum(axis=1, keepdims=True))
+    return (counts / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+def register_batch_extractor(name:str)->Callable:
+    """Decorator adding the vectorized version of a registered extractor. It takes a uint8 array of shape (N, H, W, 3) 
+        of HSV frames and an optional uint8 array of shape (N, H, W) of masks, and returns an array of shape (N, size)
+
+    Args:
+        name (str): Name of the extractor
+
+    Returns:
+        Callable: Decorator registering the function
+    """
+    def decorator(function:Callable)->Callable:
+        BATCH_EXTRACTORS[name] = function
+        return function
+    return decorator
+
+@register_extractor('hsv_histogram', 512)
+def hsv_histogram_8(frame:ImageFrame):
+    """Normalized HSV histogram with 8 bins per channel"""
+    return hsv_histogram(frame.hsv, frame.mask, 8)
+
+@register_extractor('hsv_histogram_4', 64)
+def hsv_histogram_4(frame:ImageFrame):
+    """Normalized HSV histogram with 4 bins per channel"""
+    return hsv_histogram(frame.hsv, frame.mask, 4)
+
+@register_extractor('hsv_histogram_16', 4096)
+def hsv_histogram_16(frame:ImageFrame):
+    """Normalized HSV histogram with 16 bins per channel"""
+    return hsv_histogram(frame.hsv, frame.mask, 16)
+
+@register_batch_extractor('hsv_histogram')
+def batch_hsv_histogram_8(hsv_frames:np.ndarray, masks:np.ndarray=None)->np.ndarray:
+    return batch_hsv_histograms(hsv_frames, 8, masks)
+
+@register_batch_extractor('hsv_histogram_4')
+def batch_hsv_histogram_4(hsv_frames:np.ndarray, masks:np.ndarray=None)->np.ndarray:
+    return batch_hsv_histograms(hsv_frames, 4, masks)
+
+@register_batch_extractor('hsv_histogram_16')
+def batch_hsv_histogram_16(hsv_frames:np.ndarray, masks:np.ndarray=None)->np.ndarray:
+    return batch_hsv_histograms(hsv_frames, 16, masks)
+
+@register_extractor('color_moments', 9)
+def color_moments(frame:ImageFrame):
+    """Mean, standard deviation and skewness (cube root of the third central moment) of each HSV channel"""
+    pixels = (frame.hsv[frame.mask > 0] if frame.mask is not None else frame.hsv.reshape(-1, 3)).astype(np.float32)
+    mean = pixels.mean(axis=0)
+    centered = pixels - mean
+    return np.concatenate([mean, np.sqrt((centered**2).mean(axis=0)), np.cbrt((centered**3).mean(axis=0))])
+
+HOG_DESCRIPTOR = cv2.HOGDescriptor((HOG_WINDOW_SIZE, HOG_WINDOW_SIZE), (16, 16), (8, 8), (8, 8), 9)
+
+@register_extractor('hog', 1764)
+def hog(frame:ImageFrame):
+    """Histogram of oriented gradients of the region, resized to HOG_WINDOW_SIZE x HOG_WINDOW_SIZE pixels"""
+    x, y, width, height = frame.region
+    window = cv2.resize(frame.gray[y:y+height, x:x+width], (HOG_WINDOW_SIZE, HOG_WINDOW_SIZE), interpolation=cv2.INTER_AREA)
+    return HOG_DESCRIPTOR.compute(window).flatten()
+
+@register_extractor('edge_orientation_histogram', EDGE_ORIENTATION_BINS)
+def edge_orientation_histogram(frame:ImageFrame):
+    """Histogram of the orientations (modulo 180 degrees) of the gradients, weighted by their magnitude"""
+    gray = frame.gray.astype(np.float32)
+    magnitude, angle = cv2.cartToPolar(cv2.Sobel(gray, cv2.CV_32F, 1, 0), cv2.Sobel(gray, cv2.CV_32F, 0, 1), angleInDegrees=True)
+    if frame.mask is not None:
+        magnitude = magnitude[frame.mask > 0]
+        angle = angle[frame.mask > 0]
+    bins = (np.mod(angle.ravel(), 180) * EDGE_ORIENTATION_BINS / 180).astype(np.int64) % EDGE_ORIENTATION_BINS
+    hist = np.bincount(bins, weights=magnitude.ravel(), minlength=EDGE_ORIENTATION_BINS).astype(np.float32)
+    total = hist.sum()
+    return hist / total if total > 0 else hist
+
+@register_extractor('hsv_thumbnail', THUMBNAIL_SIZE*THUMBNAIL_SIZE*3)
+def hsv_thumbnail(frame:ImageFrame):
+    """Region of the image resized to THUMBNAIL_SIZE x THUMBNAIL_SIZE pixels, in HSV format (values of 0 to 255).
+        Used to fill the pixel cache (see pixel_cache.py)"""
+    x, y, width, height = frame.region
+    thumbnail = cv2.resize(frame.bgr[y:y+height, x:x+width], (THUMBNAIL_SIZE, THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(thumbnail, cv2.COLOR_BGR2HSV).ravel()
+
+def get_extractor(name:str)->tuple[Callable, int]:
+    """Get a feature extractor of the registry
+
+    Args:
+        name (str): Name of the extractor
+
+    Raises:
+        ValueError: If no extractor has this name
+
+    Returns:
+        tuple[Callable, int]: Function of the extractor and number of features it computes
+    """
+    if name not in FEATURE_EXTRACTORS:
+        raise ValueError('Feature extractor "'+name+'" is not registered ('+', '.join(FEATURE_EXTRACTORS)+')')
+    return FEATURE_EXTRACTORS[name]
+
+def get_extractor_version(name:str=DEFAULT_EXTRACTOR)->str:
+    """Get the version tag of a feature extractor. It changes with FEATURE_EXTRACTOR_VERSION 
+        and with the source code of the extraction functions, which invalidates the stored features
+
+    Args:
+        name (str, optional): Name of the extractor. Defaults to DEFAULT_EXTRACTOR.
+
+    Returns:
+        str: Version tag of the extraction
+    """
+    functions = [extract_image_features, compute_image_features, hsv_histogram, ImageFrame, boxes_mask, get_extractor(name)[0]]
+    source = ''.join(inspect.getsource(function) for function in functions)
+    return FEATURE_EXTRACTOR_VERSION+'-'+blake2b(source.encode(), digest_size=8).hexdigest()
+
+def read_file(file_path:str)->bytes:
+    """Read the content of a file
+
+    Args:
+        file_path (str): Path of the file
+
+    Returns:
+        bytes: Content of the file
+    """
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+def get_feature_block(decode_scale:int=1, roi:bool=False, block:str='hsv_histogram')->str:
+    """Get the name of the feature store block of an extraction mode. Each mode has its own block, 
+        as the features of an image differ from one mode to another
+
+    Args:
+        decode_scale (int, optional): Decoding scale of the images (see DECODE_FLAGS). Defaults to 1.
+        roi (bool, optional): if true, the features are restricted to the bounding boxes. Defaults to False.
+        block (str, optional): Name of the block of the full resolution, whole image features. Defaults to 'hsv_histogram'.
+
+    Returns:
+        str: Name of the block
+    """
+    return block + ('_scale'+str(decode_scale) if decode_scale != 1 else '') + ('_roi' if roi else '')
+
+def boxes_mask(image_shape:tuple, boxes:list[tuple[int, int, int, int]], full_size:tuple[int, int]=None):
+    """Build the mask of the bounding boxes of an image, possibly decoded at a reduced scale
+
+    Args:
+        image_shape (tuple): Shape of the decoded image
+        boxes (list[tuple[int, int, int, int]]): Bounding boxes (xmin, ymin, xmax, ymax) in pixels of the full size image
+        full_size (tuple[int, int], optional): (width, height) of the full size image, used to scale the boxes. 
+            If None, the boxes are in pixels of the decoded image. Defaults to None.
+
+    Returns:
+        ndarray: uint8 mask of the pixels in at least one box. None if there is no box or if the boxes are empty
+    """
+    if not boxes:
+        return None
+    height, width = image_shape[:2]
+    scale_x, scale_y = (width/full_size[0], height/full_size[1]) if full_size and all(full_size) else (1, 1)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for xmin, ymin, xmax, ymax in boxes:
+        mask[max(int(ymin*scale_y), 0):int(np.ceil((ymax+1)*scale_y)), max(int(xmin*scale_x), 0):int(np.ceil((xmax+1)*scale_x))] = 255
+    return mask if mask.any() else None
+
+def init_extraction_worker(opencv_threads:int=OPENCV_THREADS):
+    """Initialize an extraction process. Limits the number of threads used by OpenCV in the process,
+        to avoid having every process start one thread per core
+
+    Args:
+        opencv_threads (int, optional): Number of threads OpenCV can use. Defaults to OPENCV_THREADS.
+    """
+    cv2.setNumThreads(opencv_threads)
+
+def compute_encoded_images_blocks(encoded_images:list[bytes], extractors:list[str]=[DEFAULT_EXTRACTOR], 
+                                  decode_scale:int=1, regions:list[tuple]=None)->dict[str, np.ndarray]:
+    """Decode a chunk of images and compute their features with several extractors. 
+        Each image is decoded once, and the color conversions are shared by the extractors (see ImageFrame)
+
+    Args:
+        encoded_images (list[bytes]): Content of the image files
+        extractors (list[str], optional): Names of the extractors (see FEATURE_EXTRACTORS). Defaults to [DEFAULT_EXTRACTOR].
+        decode_scale (int, optional): Scale at which JPEG images are decoded (1, 2, 4 or 8). The reduced scales
+            are decoded directly by libjpeg (DCT scaling), which is faster than a full decoding. Defaults to 1.
+        regions (list[tuple], optional): Region of each image, in format (boxes, (width, height)) 
+            (see boxes_mask), or None for the whole image. If None, whole images. Defaults to None.
+
+    Returns:
+        dict[str, np.ndarray]: float32 array of shape (len(encoded_images), size of the extractor) per extractor
+    """
+    functions = [get_extractor(name) for name in extractors]
+    blocks = {name: np.empty((len(encoded_images), size), dtype=np.float32) for name, (_, size) in zip(extractors, functions)}
+    for i, encoded_image in enumerate(encoded_images):
+        image = cv2.imdecode(np.frombuffer(encoded_image, np.uint8), DECODE_FLAGS[decode_scale])
+        frame = ImageFrame(image, boxes_mask(image.shape, *regions[i]) if regions and regions[i] else None)
+        for name, (function, _) in zip(extractors, functions):
+            blocks[name][i] = function(frame)
+    return blocks
+
+def compute_encoded_images_features(encoded_images:list[bytes], decode_scale:int=1, 
+                                    regions:list[tuple]=None)->np.ndarray:
+    """Decode a chunk of images and compute their features with the default extractor
+
+    Args:
+        encoded_images (list[bytes]): Content of the image files
+        decode_scale (int, optional): Scale at which images are decoded (see compute_encoded_images_blocks). Defaults to 1.
+        regions (list[tuple], optional): Region of each image (see compute_encoded_images_blocks). Defaults to None.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(encoded_images), FEATURES_SIZE)
+    """
+    return compute_encoded_images_blocks(encoded_images, [DEFAULT_EXTRACTOR], decode_scale, regions)[DEFAULT_EXTRACTOR]
+
+def extract_features_parallel(items:list, read_item:Callable=read_file, workers:int=None,
+                              chunk_size:int=EXTRACTION_CHUNK_SIZE, prefetch_chunks:int=PREFETCH_CHUNKS,
+                              io_threads:int=IO_THREADS, opencv_threads:int=OPENCV_THREADS,
+                              progress_bar:bool=True, out:np.ndarray=None,
+                              decode_scale:int=1, read_region:Callable=None, 
+                              extractors:list[str]=None)->np.ndarray|dict[str, np.ndarray]:
+    """Extract the features of a list of images with a pool of processes.
+        A prefetch thread reads the content of the images chunk by chunk, ahead of the processes decoding them.
+        The number of chunks read in advance is bounded, which bounds the memory used by the prefetch.
+        Features are written in the order of the items, whatever the order in which the chunks are processed.
+        If the extraction fails or is interrupted, the prefetch thread is stopped and the chunks not yet processed are cancelled.
+
+    Args:
+        items (list): Items to extract the features of (ex: paths of the image files)
+        read_item (Callable, optional): Function returning the content (bytes) of the image file of an item.
+            Only called from threads of the current process. Defaults to read_file.
+        workers (int, optional): Number of decoding processes. If None, one per core. Defaults to None.
+        chunk_size (int, optional): Number of images sent at once to a process. Defaults to EXTRACTION_CHUNK_SIZE.
+        prefetch_chunks (int, optional): Maximum number of chunks read in advance. Defaults to PREFETCH_CHUNKS.
+        io_threads (int, optional): Number of threads reading the images of a chunk. Defaults to IO_THREADS.
+        opencv_threads (int, optional): Number of threads used by OpenCV in each process. Defaults to OPENCV_THREADS.
+        progress_bar (bool, optional): if true, displays a tqdm progress bar of the task. Defaults to True.
+        out (np.ndarray|dict[str, np.ndarray], optional): Preallocated array of shape (len(items), FEATURES_SIZE) 
+            to write the features into (ex: a memory-mapped array), or one array per extractor if 'extractors' is set. 
+            If None, new arrays are allocated. Defaults to None.
+        decode_scale (int, optional): Scale at which images are decoded (see compute_encoded_images_features). Defaults to 1.
+        read_region (Callable, optional): Function returning the region of an item to compute the features of, 
+            in format (boxes, (width, height)), or None for the whole image. Called from the prefetch threads.
+            If None, features of whole images are computed. Defaults to None.
+        extractors (list[str], optional): Names of the extractors computing the features (see FEATURE_EXTRACTORS). 
+            Each image is read and decoded once for all of them. If None, only the default extractor. Defaults to None.
+
+    Raises:
+        ValueError: If the decoding scale isn't supported
+        ValueError: If an extractor isn't registered
+
+    Returns:
+        np.ndarray|dict[str, np.ndarray]: float32 array of shape (len(items), FEATURES_SIZE),
+            or if 'extractors' is set, float32 array of shape (len(items), size of the extractor) per extractor
+    """
+    if decode_scale not in DECODE_FLAGS:
+        raise ValueError('Decoding scale '+str(decode_scale)+' is not supported ('+', '.join(map(str, DECODE_FLAGS))+')')
+    workers = workers if workers else os.cpu_count()
+    nb_items = len(items)
+    names = extractors if extractors is not None else [DEFAULT_EXTRACTOR]
+    if extractors is None and out is not None:
+        out = {DEFAULT_EXTRACTOR: out}
+    features = {}
+    for name in names:
+        size = get_extractor(name)[1]
+        features[name] = out[name] if out is not None and name in out else np.empty((nb_items, size), dtype=np.float32)
+    if nb_items == 0 or not names:
+        return features if extractors is not None else features[DEFAULT_EXTRACTOR]
+
+    chunk_queue = Queue(maxsize=prefetch_chunks)
+    stop = Event()
+    def put_chunk(chunk)->bool:
+        while not stop.is_set():
+            try:
+                chunk_queue.put(chunk, timeout=PREFETCH_POLL_TIMEOUT)
+                return True
+            except Full:
+                pass
+        return False
+    def prefetch_chunks_content():
+        try:
+            with ThreadPoolExecutor(max_workers=io_threads) as io_executor:
+                for start in range(0, nb_items, chunk_size):
+                    chunk_items = items[start:start+chunk_size]
+                    regions = list(io_executor.map(read_region, chunk_items)) if read_region else None
+                    if not put_chunk((start, list(io_executor.map(read_item, chunk_items)), regions)):
+                        return
+        except Exception as e:
+            put_chunk(e)
+            return
+        put_chunk(None)
+    Thread(target=prefetch_chunks_content, daemon=True).start()
+
+    pending = {}
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_extraction_worker, initargs=(opencv_threads,))
+    try:
+        with tqdm(total=nb_items, disable=not progress_bar) as pbar:
+            def collect_completed():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, chunk_length = pending.pop(future)
+                    for name, chunk_features in future.result().items():
+                        features[name][start:start+chunk_length] = chunk_features
+                    pbar.update(chunk_length)
+
+            while (chunk := chunk_queue.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                start, encoded_images, regions = chunk
+                pending[executor.submit(compute_encoded_images_blocks, encoded_images, names, decode_scale, regions)] = \
+                    (start, len(encoded_images))
+                while len(pending) >= 2*workers:
+                    collect_completed()
+            while pending:
+                collect_completed()
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+    return features if extractors is not None else features[DEFAULT_EXTRACTOR]
@@ -0,0 +1,136 @@
+from feature_extraction import get_extractor_version
+from feature_store import FEATURE_STORE_PATH, DEFAULT_BLOCK
+from sklearn.decomposition import IncrementalPCA
+from sklearn.random_projection import GaussianRandomProjection
+from sklearn.base import TransformerMixin
+from hashlib import blake2b
+import numpy as np
+import joblib
+import os
+
+PCA_REDUCTION               = 'pca'
+RANDOM_PROJECTION_REDUCTION = 'random_projection'
+REDUCTION_COMPONENTS        = 64
+REDUCTION_BATCH_SIZE        = 4096
+REDUCTION_SEED              = 0
+
+def fit_reduction(x_train:np.ndarray, method:str=PCA_REDUCTION, n_components:int=REDUCTION_COMPONENTS,
+                  seed:int=REDUCTION_SEED, batch_size:int=REDUCTION_BATCH_SIZE)->TransformerMixin:
+    """Fit a dimensionality reduction of image features. The PCA is fitted incrementally by batches of rows,
+        so the training matrix can be a memory-mapped array bigger than the memory
+
+    Args:
+        x_train (np.ndarray): Training features
+        method (str, optional): PCA_REDUCTION or RANDOM_PROJECTION_REDUCTION. Defaults to PCA_REDUCTION.
+        n_components (int, optional): Number of features after the reduction. Defaults to REDUCTION_COMPONENTS.
+        seed (int, optional): Seed of the random projection. Defaults to REDUCTION_SEED.
+        batch_size (int, optional): Number of rows per batch of the incremental PCA. Defaults to REDUCTION_BATCH_SIZE.
+
+    Raises:
+        ValueError: If the method isn't a recognized reduction method
+        ValueError: If there is no training image
+
+    Returns:
+        TransformerMixin: Fitted reduction
+    """
+    if len(x_train) == 0:
+        raise ValueError('The reduction of the image features can\'t be fitted without training images')
+    if method == PCA_REDUCTION:
+        # A PCA can't have more components than training images or features (ex: small POC subset)
+        max_components = min(len(x_train), x_train.shape[1])
+        if n_components > max_components:
+            print('Warning : '+str(n_components)+' PCA components requested for '+str(len(x_train))+' training images of '+
+                  str(x_train.shape[1])+' features, the PCA is reduced to '+str(max_components)+' components')
+            n_components = max_components
+        reduction = IncrementalPCA(n_components=n_components)
+        bounds = list(range(0, len(x_train), max(batch_size, n_components))) + [len(x_train)]
+        # A last batch smaller than the number of components can't be fitted, it is merged with the previous one
+        if len(bounds) > 2 and bounds[-1] - bounds[-2] < n_components:
+            del bounds[-2]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            reduction.partial_fit(x_train[start:end])
+        return reduction
+    if method == RANDOM_PROJECTION_REDUCTION:
+        return GaussianRandomProjection(n_components=n_components, random_state=seed).fit(x_train[:1])
+    raise ValueError('Reduction method "'+method+'" is not a recognized method ('+
+                     ', '.join([PCA_REDUCTION, RANDOM_PROJECTION_REDUCTION])+')')
+
+def get_reduction_components(reduction:TransformerMixin)->int:
+    """Get the number of features after a fitted reduction
+
+    Args:
+        reduction (TransformerMixin): Fitted reduction (see fit_reduction)
+
+    Returns:
+        int: Number of components of the reduction
+    """
+    return reduction.n_components_ if hasattr(reduction, 'n_components_') else reduction.n_components
+
+def reduce_features(reduction:TransformerMixin, x:np.ndarray, batch_size:int=REDUCTION_BATCH_SIZE, 
+                    out:np.ndarray=None)->np.ndarray:
+    """Apply a fitted reduction to features, batch by batch. Only one batch of a memory-mapped matrix is read at once
+
+    Args:
+        reduction (TransformerMixin): Fitted reduction (see fit_reduction)
+        x (np.ndarray): Features to reduce
+        batch_size (int, optional): Number of rows reduced at once. Defaults to REDUCTION_BATCH_SIZE.
+        out (np.ndarray, optional): Preallocated array to write the reduced features into (ex: a memory-mapped array). 
+            Defaults to None.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(x), n_components)
+    """
+    reduced = out if out is not None else np.empty((len(x), get_reduction_components(reduction)), dtype=np.float32)
+    for start in range(0, len(x), batch_size):
+        reduced[start:start+batch_size] = reduction.transform(x[start:start+batch_size])
+    return reduced
+
+def features_fingerprint(x:np.ndarray, batch_size:int=REDUCTION_BATCH_SIZE)->str:
+    """Hash of a feature matrix, computed batch by batch
+
+    Args:
+        x (np.ndarray): Feature matrix
+        batch_size (int, optional): Number of rows hashed at once. Defaults to REDUCTION_BATCH_SIZE.
+
+    Returns:
+        str: Hexadecimal hash of the shape and the values of the matrix
+    """
+    digest = blake2b(str(x.shape).encode(), digest_size=16)
+    for start in range(0, len(x), batch_size):
+        digest.update(np.ascontiguousarray(x[start:start+batch_size], dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+def get_reduction(x_train:np.ndarray, method:str=PCA_REDUCTION, n_components:int=REDUCTION_COMPONENTS,
+                  store_dir_path:str=FEATURE_STORE_PATH, block:str=DEFAULT_BLOCK, seed:int=REDUCTION_SEED)->TransformerMixin:
+    """Get the reduction of a block of the feature store fitted on training features. 
+        The fitted reduction is cached in the feature store directory (<block>.<method>.joblib), 
+        and fitted again only if the training features, the parameters or the extractor version changed
+
+    Args:
+        x_train (np.ndarray): Training features
+        method (str, optional): PCA_REDUCTION or RANDOM_PROJECTION_REDUCTION. Defaults to PCA_REDUCTION.
+        n_components (int, optional): Number of features after the reduction. Defaults to REDUCTION_COMPONENTS.
+        store_dir_path (str, optional): Directory of the feature store. If None, the reduction isn't cached. 
+            Defaults to FEATURE_STORE_PATH.
+        block (str, optional): Block of the features in the store. Defaults to DEFAULT_BLOCK.
+        seed (int, optional): Seed of the random projection. Defaults to REDUCTION_SEED.
+
+    Returns:
+        TransformerMixin: Fitted reduction
+    """
+    if not store_dir_path:
+        return fit_reduction(x_train, method, n_components, seed)
+    cache_path = os.path.join(store_dir_path, block+'.'+method+'.joblib')
+    key = '-'.join([get_extractor_version(), method, str(n_components), str(seed), features_fingerprint(x_train)])
+    if os.path.exists(cache_path):
+        cache = joblib.load(cache_path)
+        if cache['key'] == key:
+            print('Reduction loaded from "'+cache_path+'"')
+            return cache['reduction']
+    print('Fitting '+method+' reduction to '+str(n_components)+' components...', end='')
+    reduction = fit_reduction(x_train, method, n_components, seed)
+    print('Done')
+    os.makedirs(store_dir_path, exist_ok=True)
+    joblib.dump({'key': key, 'reduction': reduction}, cache_path+'.tmp')
+    os.replace(cache_path+'.tmp', cache_path)
+    return reduction
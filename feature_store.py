@@ -0,0 +1,309 @@
+from feature_extraction import (extract_features_parallel, get_extractor_version, get_extractor, get_feature_block, 
+                                read_file, FEATURES_SIZE)
+from image_dataset import ImageDataset
+from typing import Callable
+import numpy as np
+import json
+import os
+
+FEATURE_STORE_PATH  = 'Data/FeatureStore/'
+DEFAULT_BLOCK       = 'hsv_histogram'
+INITIAL_CAPACITY    = 1024
+# Images extracted between two saves of the store, so that a crash during the extraction only loses the current batch
+STORE_BATCH_SIZE    = 4096
+
+class FeatureStore:
+    """On-disk store of image features. Features are kept in a memory-mapped float32 matrix (one row per image),
+        and an index maps each image key (path or URI) to its row, with the size and modification time of the file.
+        The store is tagged with the version of the extractor: if it changes, the store is emptied.
+
+    Args:
+        store_dir_path (str, optional): Directory of the store. Defaults to FEATURE_STORE_PATH.
+        block (str, optional): Name of the block of features, used as file name of the matrix and of the index.
+            Defaults to DEFAULT_BLOCK.
+        version (str, optional): Version tag of the extractor of the features. Defaults to get_extractor_version().
+        features_size (int, optional): Number of features per image. Defaults to FEATURES_SIZE.
+        row_shape (tuple, optional): Shape of the features of an image, if not a vector (ex: (64, 64, 3) for a thumbnail).
+            Its number of values must be features_size. Defaults to (features_size, ).
+        dtype (type, optional): Type of the features. Defaults to np.float32.
+    """
+
+    def __init__(self, store_dir_path:str=FEATURE_STORE_PATH, block:str=DEFAULT_BLOCK,
+                 version:str=None, features_size:int=FEATURES_SIZE, row_shape:tuple=None, dtype:type=np.float32):
+        self.store_dir_path = store_dir_path
+        self.block = block
+        self.version = version if version else get_extractor_version()
+        self.features_size = features_size
+        self.row_shape = tuple(row_shape) if row_shape else (features_size, )
+        self.dtype = dtype
+        self.matrix_path = os.path.join(store_dir_path, block+'.npy')
+        self.index_path = os.path.join(store_dir_path, block+'.json')
+        os.makedirs(store_dir_path, exist_ok=True)
+        index = None
+        if os.path.exists(self.index_path) and os.path.exists(self.matrix_path):
+            with open(self.index_path) as index_file:
+                index = json.load(index_file)
+        if index and index['version'] == self.version and index['features_size'] == features_size and \
+                index.get('row_shape', [features_size]) == list(self.row_shape):
+            self.rows = index['rows']
+            self.nb_rows = index['nb_rows']
+            self.matrix = np.load(self.matrix_path, mmap_mode='r+')
+        else:
+            if index:
+                print('Feature store "'+self.matrix_path+'" was built by another extractor version, it is reset')
+            self.rows = {}
+            self.nb_rows = 0
+            self.matrix = np.lib.format.open_memmap(self.matrix_path, mode='w+', dtype=dtype,
+                                                    shape=(INITIAL_CAPACITY, ) + self.row_shape)
+            self.save_index()
+
+    def lookup(self, keys:list[str], stats:list[tuple[int, float]])->np.ndarray:
+        """Find the rows of images in the store
+
+        Args:
+            keys (list[str]): Keys of the images
+            stats (list[tuple[int, float]]): Size and modification time of each image file
+
+        Returns:
+            np.ndarray: int64 array with the row of each image, -1 if the image isn't stored or was modified
+        """
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        for i, (key, (size, mtime)) in enumerate(zip(keys, stats)):
+            entry = self.rows.get(key)
+            if entry and entry[1] == size and entry[2] == mtime:
+                rows[i] = entry[0]
+        return rows
+
+    def add(self, keys:list[str], stats:list[tuple[int, float]], features:np.ndarray)->np.ndarray:
+        """Add the features of images to the store. Modified images keep their row, which is overwritten,
+            so that the matrix only grows with new images
+
+        Args:
+            keys (list[str]): Keys of the images
+            stats (list[tuple[int, float]]): Size and modification time of each image file
+            features (np.ndarray): Features of the images, of shape (len(keys), features_size) or (len(keys), ) + row_shape
+
+        Returns:
+            np.ndarray: int64 array with the row of each image
+        """
+        rows = np.empty(len(keys), dtype=np.int64)
+        new_rows = {}
+        for i, key in enumerate(keys):
+            if key in self.rows:
+                rows[i] = self.rows[key][0]
+            else:
+                rows[i] = new_rows.setdefault(key, self.nb_rows + len(new_rows))
+        self.reserve(self.nb_rows + len(new_rows))
+        self.matrix[rows] = np.reshape(features, (len(keys), ) + self.row_shape)
+        for key, (size, mtime), row in zip(keys, stats, rows):
+            self.rows[key] = [int(row), size, mtime]
+        self.nb_rows += len(new_rows)
+        self.matrix.flush()
+        self.save_index()
+        return rows
+
+    def read(self, rows:np.ndarray, out:np.ndarray=None)->np.ndarray:
+        """Read rows of the store
+
+        Args:
+            rows (np.ndarray): Rows to read
+            out (np.ndarray, optional): Preallocated array to read the rows into. Defaults to None.
+
+        Returns:
+            np.ndarray: Array of shape (len(rows), ) + row_shape
+        """
+        if out is None:
+            return np.asarray(self.matrix[rows], dtype=self.dtype)
+        np.take(self.matrix, rows, axis=0, out=out)
+        return out
+
+    def reserve(self, capacity:int):
+        """Grow the matrix file so that it can hold at least 'capacity' rows. The capacity is at least doubled
+
+        Args:
+            capacity (int): Number of rows needed
+        """
+        if capacity <= self.matrix.shape[0]:
+            return
+        new_capacity = max(capacity, 2*self.matrix.shape[0])
+        tmp_path = self.matrix_path.replace('.npy', '.tmp.npy')
+        new_matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.dtype,
+                                               shape=(new_capacity, ) + self.row_shape)
+        new_matrix[:self.nb_rows] = self.matrix[:self.nb_rows]
+        new_matrix.flush()
+        del new_matrix
+        del self.matrix
+        os.replace(tmp_path, self.matrix_path)
+        self.matrix = np.load(self.matrix_path, mmap_mode='r+')
+
+    def save_index(self):
+        """Save the index of the store. The file is replaced atomically"""
+        tmp_path = self.index_path+'.tmp'
+        with open(tmp_path, 'w') as index_file:
+            json.dump({'version': self.version, 'features_size': self.features_size, 'row_shape': list(self.row_shape),
+                       'nb_rows': self.nb_rows, 'rows': self.rows}, index_file)
+        os.replace(tmp_path, self.index_path)
+
+def extract_features_with_store(store:FeatureStore, items:list, keys:list[str], stats:list[tuple[int, float]],
+                                read_item:Callable=read_file, workers:int=None, out:np.ndarray=None,
+                                decode_scale:int=1, read_region:Callable=None)->np.ndarray:
+    """Get the features of images from a store, and extract only the ones which are missing or outdated.
+        Missing images are extracted by batches of STORE_BATCH_SIZE, the store being saved after each batch
+
+    Args:
+        store (FeatureStore): Store to read the features from and add the extracted features into
+        items (list): Items to get the features of (ex: paths of the image files)
+        keys (list[str]): Key of each item in the store
+        stats (list[tuple[int, float]]): Size and modification time of the image file of each item
+        read_item (Callable, optional): Function returning the content of the image file of an item. Defaults to read_file.
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+        out (np.ndarray, optional): Preallocated array to write the features into. Defaults to None.
+        decode_scale (int, optional): Scale at which images are decoded (see extract_features_parallel). 
+            The store must be the block of this scale (see get_feature_block). Defaults to 1.
+        read_region (Callable, optional): Function returning the region of an item (see extract_features_parallel). 
+            Defaults to None.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(items), features_size)
+    """
+    rows = store.lookup(keys, stats)
+    missing = np.flatnonzero(rows < 0)
+    if missing.size:
+        print(str(missing.size)+' images out of '+str(len(items))+' are not in the feature store, extracting them...')
+        for batch_start in range(0, missing.size, STORE_BATCH_SIZE):
+            batch = missing[batch_start:batch_start+STORE_BATCH_SIZE]
+            features = extract_features_parallel([items[i] for i in batch], read_item, workers, 
+                                                 decode_scale=decode_scale, read_region=read_region)
+            rows[batch] = store.add([keys[i] for i in batch], [stats[i] for i in batch], features)
+    return store.read(rows, out)
+
+def extract_files_features(store:FeatureStore, file_paths:list[str], workers:int=None, out:np.ndarray=None,
+                           decode_scale:int=1)->np.ndarray:
+    """Get the features of image files through a feature store
+
+    Args:
+        store (FeatureStore): Feature store
+        file_paths (list[str]): Paths of the image files
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+        out (np.ndarray, optional): Preallocated array to write the features into. Defaults to None.
+        decode_scale (int, optional): Scale at which images are decoded (see extract_features_parallel). Defaults to 1.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(file_paths), features_size)
+    """
+    stats = []
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        stats.append((stat.st_size, stat.st_mtime))
+    keys = [os.path.abspath(file_path) for file_path in file_paths]
+    return extract_features_with_store(store, file_paths, keys, stats, read_file, workers, out, decode_scale)
+
+def extract_dataset_features(store:FeatureStore, dataset:ImageDataset, image_ids:list[str], 
+                             workers:int=None, out:np.ndarray=None, decode_scale:int=1, roi:bool=False)->np.ndarray:
+    """Get the features of images of a dataset through a feature store
+
+    Args:
+        store (FeatureStore): Feature store
+        dataset (ImageDataset): Dataset containing the images
+        image_ids (list[str]): IDs of the images
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+        out (np.ndarray, optional): Preallocated array to write the features into. Defaults to None.
+        decode_scale (int, optional): Scale at which images are decoded (see extract_features_parallel). Defaults to 1.
+        roi (bool, optional): if true, the features of annotated images are restricted to their bounding boxes. 
+            Defaults to False.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(image_ids), features_size)
+    """
+    keys = [dataset.image_uri(image_id) for image_id in image_ids]
+    stats = [dataset.image_stat(image_id) for image_id in image_ids]
+    return extract_features_with_store(store, image_ids, keys, stats, dataset.read_image, workers, out, 
+                                       decode_scale, dataset.image_region if roi else None)
+
+def extract_blocks_with_store(store_dir_path:str, extractors:list[str], items:list, keys:list[str], 
+                              stats:list[tuple[int, float]], read_item:Callable=read_file, workers:int=None,
+                              decode_scale:int=1, read_region:Callable=None)->dict[str, np.ndarray]:
+    """Get the features of images computed by several extractors, each one stored in its own block of the feature store.
+        The images missing from at least one block are read and decoded once, and only the extractors
+        of the blocks they are missing from are computed. They are extracted by batches of STORE_BATCH_SIZE, 
+        the blocks being saved after each batch
+
+    Args:
+        store_dir_path (str): Directory of the feature store
+        extractors (list[str]): Names of the extractors (see feature_extraction.FEATURE_EXTRACTORS)
+        items (list): Items to get the features of (ex: paths of the image files)
+        keys (list[str]): Key of each item in the store
+        stats (list[tuple[int, float]]): Size and modification time of the image file of each item
+        read_item (Callable, optional): Function returning the content of the image file of an item. Defaults to read_file.
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+        decode_scale (int, optional): Scale at which images are decoded (see extract_features_parallel). Defaults to 1.
+        read_region (Callable, optional): Function returning the region of an item (see extract_features_parallel). 
+            Defaults to None.
+
+    Returns:
+        dict[str, np.ndarray]: float32 array of shape (len(items), size of the extractor) per extractor
+    """
+    stores = {}
+    rows = {}
+    for name in extractors:
+        block = get_feature_block(decode_scale, read_region is not None, name)
+        stores[name] = FeatureStore(store_dir_path, block, get_extractor_version(name), get_extractor(name)[1])
+        rows[name] = stores[name].lookup(keys, stats)
+    missing_extractors = [name for name in extractors if (rows[name] < 0).any()]
+    if missing_extractors:
+        missing = np.flatnonzero(np.any([rows[name] < 0 for name in missing_extractors], axis=0))
+        print(str(missing.size)+' images out of '+str(len(items))+' are missing from the blocks '+
+              ', '.join(missing_extractors)+' of the feature store, extracting them...')
+        for batch_start in range(0, missing.size, STORE_BATCH_SIZE):
+            batch = missing[batch_start:batch_start+STORE_BATCH_SIZE]
+            blocks = extract_features_parallel([items[i] for i in batch], read_item, workers, decode_scale=decode_scale,
+                                               read_region=read_region, extractors=missing_extractors)
+            for name in missing_extractors:
+                block_missing = rows[name][batch] < 0
+                rows[name][batch[block_missing]] = stores[name].add([keys[i] for i in batch[block_missing]], 
+                                                                    [stats[i] for i in batch[block_missing]], 
+                                                                    blocks[name][block_missing])
+    return {name: stores[name].read(rows[name]) for name in extractors}
+
+def extract_files_blocks(store_dir_path:str, extractors:list[str], file_paths:list[str], workers:int=None, 
+                         decode_scale:int=1)->dict[str, np.ndarray]:
+    """Get the features of image files computed by several extractors through the feature store
+
+    Args:
+        store_dir_path (str): Directory of the feature store
+        extractors (list[str]): Names of the extractors (see feature_extraction.FEATURE_EXTRACTORS)
+        file_paths (list[str]): Paths of the image files
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+        decode_scale (int, optional): Scale at which images are decoded (see extract_features_parallel). Defaults to 1.
+
+    Returns:
+        dict[str, np.ndarray]: float32 array of shape (len(file_paths), size of the extractor) per extractor
+    """
+    stats = []
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        stats.append((stat.st_size, stat.st_mtime))
+    keys = [os.path.abspath(file_path) for file_path in file_paths]
+    return extract_blocks_with_store(store_dir_path, extractors, file_paths, keys, stats, read_file, workers, decode_scale)
+
+def extract_dataset_blocks(store_dir_path:str, extractors:list[str], dataset:ImageDataset, image_ids:list[str], 
+                           workers:int=None, decode_scale:int=1, roi:bool=False)->dict[str, np.ndarray]:
+    """Get the features of images of a dataset computed by several extractors through the feature store
+
+    Args:
+        store_dir_path (str): Directory of the feature store
+        extractors (list[str]): Names of the extractors (see feature_extraction.FEATURE_EXTRACTORS)
+        dataset (ImageDataset): Dataset containing the images
+        image_ids (list[str]): IDs of the images
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+        decode_scale (int, optional): Scale at which images are decoded (see extract_features_parallel). Defaults to 1.
+        roi (bool, optional): if true, the features of annotated images are restricted to their bounding boxes. 
+            Defaults to False.
+
+    Returns:
+        dict[str, np.ndarray]: float32 array of shape (len(image_ids), size of the extractor) per extractor
+    """
+    keys = [dataset.image_uri(image_id) for image_id in image_ids]
+    stats = [dataset.image_stat(image_id) for image_id in image_ids]
+    return extract_blocks_with_store(store_dir_path, extractors, image_ids, keys, stats, dataset.read_image, workers,
+                                     decode_scale, dataset.image_region if roi else None)
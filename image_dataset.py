@@ -0,0 +1,410 @@
+from zipfile import ZipFile, ZipInfo, ZIP_STORED, ZIP_DEFLATED
+from threading import Lock
+import numpy as np
+import xmltodict
+import struct
+import time
+import zlib
+import os
+
+ZIP_FILE_PATH       = 'imagenet-object-localization-challenge.zip'
+ZIP_ANNOT_PATH      = 'ILSVRC/Annotations/CLS-LOC/train/'
+ZIP_IMAGES_PATH     = 'ILSVRC/Data/CLS-LOC/train/'
+IMAGE_FILE_EXT      = '.JPEG'
+ANNOT_FILE_EXT      = '.xml'
+LOCAL_HEADER_FORMAT = '<4sHHHHHIIIHH'
+LOCAL_HEADER_SIZE   = struct.calcsize(LOCAL_HEADER_FORMAT)
+
+def image_id_to_inid(image_id:str)->str:
+    """Get the ImageNet ID of the class of an image from the ID of the image (ex: n02114367_10043 -> n02114367)
+
+    Args:
+        image_id (str): ID of the image, which is the name of its file without extension
+
+    Returns:
+        str: ImageNet ID of the class of the image
+    """
+    return image_id.split('_', 1)[0]
+
+def index_zip_members(zip_file:ZipFile, inids:list[str]=None,
+                      zip_subdirectories:list[str]=[ZIP_ANNOT_PATH, ZIP_IMAGES_PATH])->dict[str, dict[str, list[ZipInfo]]]:
+    """Index the members of a zip file by subdirectory and ImageNet ID in a single pass over its central directory
+
+    Args:
+        zip_file (ZipFile): Opened Kaggle Challenge Zip file
+        inids (list[str], optional): list of ImageNet IDs to index the members of. If None, all of the classes are indexed.
+            Defaults to None.
+        zip_subdirectories (list[str], optional): Subdirectories of the zip file containing one directory per ImageNet ID.
+            Defaults to [ZIP_ANNOT_PATH, ZIP_IMAGES_PATH].
+
+    Returns:
+        dict[str, dict[str, list[ZipInfo]]]: Members of the zip file in format { zip_subdirectory: { inid: list[ZipInfo] } }
+    """
+    selected_inids = None if inids is None else set(str(inid) for inid in inids)
+    members_index = {zip_subdirectory: {} for zip_subdirectory in zip_subdirectories}
+    for member in zip_file.infolist():
+        if member.is_dir():
+            continue
+        for zip_subdirectory in zip_subdirectories:
+            if member.filename.startswith(zip_subdirectory):
+                inid = member.filename[len(zip_subdirectory):].split('/', 1)[0]
+                if selected_inids is None or inid in selected_inids:
+                    members_index[zip_subdirectory].setdefault(inid, []).append(member)
+                break
+    return members_index
+
+def parse_annotation(annotation:bytes)->dict:
+    """Parse the content of an annotation file
+
+    Args:
+        annotation (bytes): Content of the XML annotation file
+
+    Returns:
+        dict: 'annotation' element of the XML file. None if annotation is None
+    """
+    if annotation is None:
+        return None
+    return xmltodict.parse(annotation)['annotation']
+
+def annotation_boxes(annotation:dict)->list[tuple[int, int, int, int]]:
+    """Get the bounding boxes of the objects of a parsed annotation
+
+    Args:
+        annotation (dict): Parsed annotation (see parse_annotation)
+
+    Returns:
+        list[tuple[int, int, int, int]]: Bounding boxes in format (xmin, ymin, xmax, ymax), in pixels of the full size image.
+            Empty if annotation is None or has no objects
+    """
+    if not annotation or 'object' not in annotation:
+        return []
+    objects = annotation['object'] if type(annotation['object'])==list else [annotation['object']]
+    return [tuple(int(object['bndbox'][key]) for key in ['xmin', 'ymin', 'xmax', 'ymax']) for object in objects]
+
+class ImageDataset:
+    """Set of annotated animal images, grouped by ImageNet ID.
+        Images and annotations are identified by the ID of the image (name of the file without extension).
+        Subclasses only have to implement the access to the raw bytes of the resources.
+    """
+
+    def inids(self)->list[str]:
+        """Get the ImageNet IDs of the classes having images in the dataset
+
+        Returns:
+            list[str]: ImageNet IDs of the classes
+        """
+        raise NotImplementedError
+
+    def image_ids(self, inid:str)->list[str]:
+        """Get the IDs of the images of a class
+
+        Args:
+            inid (str): ImageNet ID of the class
+
+        Returns:
+            list[str]: IDs of the images of the class. Empty if the class has no images
+        """
+        raise NotImplementedError
+
+    def read_image(self, image_id:str)->bytes:
+        """Read the raw content of an image file
+
+        Args:
+            image_id (str): ID of the image
+
+        Returns:
+            bytes: Encoded content of the image file
+        """
+        raise NotImplementedError
+
+    def read_annotation(self, image_id:str)->bytes:
+        """Read the raw content of the annotation file of an image
+
+        Args:
+            image_id (str): ID of the image
+
+        Returns:
+            bytes: Content of the annotation file of the image. None if the image isn't annoted
+        """
+        raise NotImplementedError
+
+    def image_uri(self, image_id:str)->str:
+        """Get the URI of an image file, used to reference the image in the ontology
+
+        Args:
+            image_id (str): ID of the image
+
+        Returns:
+            str: URI of the image file
+        """
+        raise NotImplementedError
+
+    def image_stat(self, image_id:str)->tuple[int, float]:
+        """Get the size and the modification time of an image file, used to detect modified images
+
+        Args:
+            image_id (str): ID of the image
+
+        Returns:
+            tuple[int, float]: Size of the file in bytes and modification timestamp
+        """
+        raise NotImplementedError
+
+    def all_image_ids(self)->list[str]:
+        """Get the IDs of all the images of the dataset, grouped by class
+
+        Returns:
+            list[str]: IDs of the images
+        """
+        return [image_id for inid in self.inids() for image_id in self.image_ids(inid)]
+
+    def load_image(self, image_id:str, flags:int=None):
+        """Decode an image of the dataset
+
+        Args:
+            image_id (str): ID of the image
+            flags (int, optional): OpenCV imread flags. If None, cv2.IMREAD_COLOR. Defaults to None.
+
+        Returns:
+            ndarray: Decoded image
+        """
+        # OpenCV is imported on use, so that the ontology steps reading the annotations don't load it
+        import cv2
+        if flags is None:
+            flags = cv2.IMREAD_COLOR
+        return cv2.imdecode(np.frombuffer(self.read_image(image_id), np.uint8), flags)
+
+    def load_annotation(self, image_id:str)->dict:
+        """Parse the annotation of an image
+
+        Args:
+            image_id (str): ID of the image
+
+        Returns:
+            dict: 'annotation' element of the XML file. None if the image isn't annoted
+        """
+        return parse_annotation(self.read_annotation(image_id))
+
+    def image_region(self, image_id:str)->tuple[list[tuple[int, int, int, int]], tuple[int, int]]:
+        """Get the annotated region of an image: its bounding boxes and the size of the image they refer to
+
+        Args:
+            image_id (str): ID of the image
+
+        Returns:
+            tuple[list[tuple[int, int, int, int]], tuple[int, int]]: Bounding boxes (see annotation_boxes) and 
+                (width, height) of the image. None if the image isn't annoted or has no bounding box
+        """
+        annotation = self.load_annotation(image_id)
+        boxes = annotation_boxes(annotation)
+        if not boxes:
+            return None
+        size = annotation.get('size') or {}
+        return boxes, (int(size.get('width', 0)), int(size.get('height', 0)))
+
+    def subset(self, image_ids:list[str])->'ImageDataset':
+        """Restrict the dataset to a selection of images
+
+        Args:
+            image_ids (list[str]): IDs of the images to keep
+
+        Returns:
+            ImageDataset: Dataset containing only the selected images
+        """
+        return ImageDatasetSubset(self, image_ids)
+
+    def __len__(self)->int:
+        return sum(len(self.image_ids(inid)) for inid in self.inids())
+
+    def close(self):
+        """Release the resources of the dataset (ex: open files). Nothing to release by default"""
+
+    def __enter__(self)->'ImageDataset':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ImageDatasetSubset(ImageDataset):
+    """Selection of images of another dataset. Resources are read from the source dataset"""
+
+    def __init__(self, dataset:ImageDataset, image_ids:list[str]):
+        self.dataset = dataset
+        self.images = {}
+        for image_id in image_ids:
+            self.images.setdefault(image_id_to_inid(image_id), []).append(image_id)
+
+    def inids(self)->list[str]:
+        return list(self.images)
+
+    def image_ids(self, inid:str)->list[str]:
+        return self.images.get(str(inid), [])
+
+    def read_image(self, image_id:str)->bytes:
+        return self.dataset.read_image(image_id)
+
+    def read_annotation(self, image_id:str)->bytes:
+        return self.dataset.read_annotation(image_id)
+
+    def image_uri(self, image_id:str)->str:
+        return self.dataset.image_uri(image_id)
+
+    def image_stat(self, image_id:str)->tuple[int, float]:
+        return self.dataset.image_stat(image_id)
+
+class DirectoryImageDataset(ImageDataset):
+    """Images and annotations extracted in directories, with one subdirectory per ImageNet ID
+
+    Args:
+        images_dir_path (str): Path of the directory containing one directory of images per ImageNet ID
+        annot_dir_path (str): Path of the directory containing one directory of annotations per ImageNet ID
+    """
+
+    def __init__(self, images_dir_path:str, annot_dir_path:str):
+        self.images_dir_path = images_dir_path
+        self.annot_dir_path = annot_dir_path
+        self.images = {}
+
+    def inids(self)->list[str]:
+        if not os.path.exists(self.images_dir_path):
+            return []
+        return [inid for inid in os.listdir(self.images_dir_path)
+                if os.path.isdir(os.path.join(self.images_dir_path, inid)) and self.image_ids(inid)]
+
+    def image_ids(self, inid:str)->list[str]:
+        inid = str(inid)
+        if inid not in self.images:
+            inid_dir_path = os.path.join(self.images_dir_path, inid)
+            self.images[inid] = [image.replace(IMAGE_FILE_EXT, '') for image in os.listdir(inid_dir_path)
+                                 if image.endswith(IMAGE_FILE_EXT)] if os.path.isdir(inid_dir_path) else []
+        return self.images[inid]
+
+    def image_path(self, image_id:str)->str:
+        return os.path.join(self.images_dir_path, image_id_to_inid(image_id), image_id+IMAGE_FILE_EXT)
+
+    def annotation_path(self, image_id:str)->str:
+        return os.path.join(self.annot_dir_path, image_id_to_inid(image_id), image_id+ANNOT_FILE_EXT)
+
+    def read_image(self, image_id:str)->bytes:
+        with open(self.image_path(image_id), 'rb') as image_file:
+            return image_file.read()
+
+    def image_stat(self, image_id:str)->tuple[int, float]:
+        stat = os.stat(self.image_path(image_id))
+        return stat.st_size, stat.st_mtime
+
+    def read_annotation(self, image_id:str)->bytes:
+        annotation_path = self.annotation_path(image_id)
+        if not os.path.exists(annotation_path):
+            return None
+        with open(annotation_path, 'rb') as annotation_file:
+            return annotation_file.read()
+
+    def image_uri(self, image_id:str)->str:
+        image_dir_path = os.path.abspath(os.path.join(self.images_dir_path, image_id_to_inid(image_id)))
+        return 'file:///'+image_dir_path.replace('\\', '/')+'/'+image_id+IMAGE_FILE_EXT
+
+class ZipImageDataset(ImageDataset):
+    """Images and annotations read directly from the Kaggle Challenge zip file, without extracting it.
+        The central directory is indexed once, then each member is read at its offset in the archive.
+        Reads don't share any file position, which makes the dataset safe to use from multiple threads.
+        The zip file stays open until the dataset is closed, which the dataset does when used as a context manager:
+        'with ZipImageDataset(zip_file_path) as dataset:'
+
+    Args:
+        zip_file_path (str, optional): Path of the Kaggle Challenge Zip file. Defaults to ZIP_FILE_PATH.
+        inids (list[str], optional): ImageNet IDs of the classes to index. If None, all the classes are indexed.
+            Defaults to None.
+
+    Raises:
+        ValueError: If the zip file doesn't exist
+    """
+
+    def __init__(self, zip_file_path:str=ZIP_FILE_PATH, inids:list[str]=None):
+        if not os.path.exists(zip_file_path):
+            raise ValueError('Path '+zip_file_path+' doesn\'t exist\n'+
+                             'Download the zip file of the challenge with the command: '+
+                             'kaggle competitions download -c imagenet-object-localization-challenge')
+        self.zip_file_path = zip_file_path
+        with ZipFile(zip_file_path, 'r') as zip_file:
+            members_index = index_zip_members(zip_file, inids)
+        self.image_members = {}
+        self.annotation_members = {}
+        self.images = {}
+        for zip_subdirectory, members, file_ext in [
+                (ZIP_IMAGES_PATH, self.image_members, IMAGE_FILE_EXT),
+                (ZIP_ANNOT_PATH, self.annotation_members, ANNOT_FILE_EXT)]:
+            for inid, inid_members in members_index[zip_subdirectory].items():
+                for member in inid_members:
+                    members[os.path.basename(member.filename).replace(file_ext, '')] = member
+        for image_id in self.image_members:
+            self.images.setdefault(image_id_to_inid(image_id), []).append(image_id)
+        self.file_descriptor = os.open(zip_file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        self.read_lock = Lock()
+
+    def inids(self)->list[str]:
+        return list(self.images)
+
+    def image_ids(self, inid:str)->list[str]:
+        return self.images.get(str(inid), [])
+
+    def read_image(self, image_id:str)->bytes:
+        if image_id not in self.image_members:
+            raise ValueError('Image "'+image_id+'" not found in zip file "'+self.zip_file_path+'"')
+        return self.read_member(self.image_members[image_id])
+
+    def image_stat(self, image_id:str)->tuple[int, float]:
+        member = self.image_members[image_id]
+        return member.file_size, time.mktime(member.date_time + (0, 0, -1))
+
+    def read_annotation(self, image_id:str)->bytes:
+        if image_id not in self.annotation_members:
+            return None
+        return self.read_member(self.annotation_members[image_id])
+
+    def image_uri(self, image_id:str)->str:
+        zip_path = os.path.abspath(self.zip_file_path).replace('\\', '/')
+        return 'jar:file:///'+zip_path.lstrip('/')+'!/'+self.image_members[image_id].filename
+
+    def read_bytes(self, offset:int, size:int)->bytes:
+        """Read bytes at an offset of the zip file. Uses pread where available, a lock otherwise"""
+        if hasattr(os, 'pread'):
+            return os.pread(self.file_descriptor, size, offset)
+        with self.read_lock:
+            os.lseek(self.file_descriptor, offset, os.SEEK_SET)
+            return os.read(self.file_descriptor, size)
+
+    def read_member(self, member:ZipInfo)->bytes:
+        """Read and decompress a member of the zip file from its offset in the central directory
+
+        Args:
+            member (ZipInfo): Member to read
+
+        Raises:
+            ValueError: If the member is compressed with an unsupported method or is corrupted
+
+        Returns:
+            bytes: Uncompressed content of the member
+        """
+        header = struct.unpack(LOCAL_HEADER_FORMAT, self.read_bytes(member.header_offset, LOCAL_HEADER_SIZE))
+        if header[0] != b'PK\x03\x04':
+            raise ValueError('Bad local header for member "'+member.filename+'"')
+        name_length, extra_length = header[9], header[10]
+        data_offset = member.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+        data = self.read_bytes(data_offset, member.compress_size)
+        if member.compress_type == ZIP_DEFLATED:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+        elif member.compress_type != ZIP_STORED:
+            raise ValueError('Compression method '+str(member.compress_type)+' of member "'+member.filename+'" is not supported')
+        if zlib.crc32(data) != member.CRC:
+            raise ValueError('Bad CRC for member "'+member.filename+'"')
+        return data
+
+    def close(self):
+        """Close the file descriptor of the zip file. Subsets of the dataset can't be read afterwards"""
+        if getattr(self, 'file_descriptor', None) is not None:
+            os.close(self.file_descriptor)
+            self.file_descriptor = None
+
+    def __del__(self):
+        self.close()
@@ -1,11 +1,19 @@
-import synset_mapper as sm
-import animal_graph as ag
-import ontology as onto
-import model_training as mt
-from sklearn.ensemble import RandomForestClassifier
+from pipeline_telemetry import PipelineTelemetry, RUN_REPORT_FILE_NAME, PROFILE_DIR_NAME
+from pipeline_dag import PipelineDag, PipelineStage, PIPELINE_STATE_FILE_NAME, DAG_WORKERS
+from argparse import ArgumentParser
 
+# The modules of the pipeline steps are imported by the functions using them, 
+# so that a subcommand only loads the libraries of its step (ex: no sklearn nor OpenCV to build the graph arcs)
+DEFAULT_PIPELINE_DIR = 'Data/POC/'
+TEST_RATE = 0.1
 
 def full_commented_pipeline():
+    import synset_mapper as sm
+    import animal_graph as ag
+    import ontology as onto
+    import model_training as mt
+    from sklearn.ensemble import RandomForestClassifier
+
     # A : Full Mapping of the synsets
     # Map as well as possible the synsets in 3 different applications : ImageNet, Wordnet (different from ImageNet since version 3.1), WikiData
     # the result is stored in the Data/synset_mapping.json file
@@ -70,11 +78,12 @@ def full_commented_pipeline():
     onto.unzip_images_annotations_files([s['inid'] for s in animal_synsets])
 
     ### c : Split the images into testing and training datasets
-    onto.train_test_split(0.1) 
+    # The split is saved in the 'Data/split_manifest.csv' file, files stay in the 'Data/Annotations' and 'Data/Images' directories
+    onto.create_split_manifest(0.1) 
 
     ### d : Populate the ontology with training images
     ontology = onto.get_ontology()
-    ontology = onto.populate_ontology(ontology)
+    ontology = onto.populate_ontology(ontology, onto.IMAGES_PATH, onto.ANNOT_PATH, split_manifest_path=onto.SPLIT_MANIFEST_PATH)
 
     # D : Train a model on the ontology
     # All the steps can be run at once using mt.image_recognition_model()
@@ -83,12 +92,14 @@ def full_commented_pipeline():
     
     ## 2 : Extract from every image a set of features
     # Save the result into a training and a testing datasets
-    x_train, x_test, y_train, y_test = mt.get_images_test_train()
+    # Features are float32 matrices, targets are the index of the ImageNet ID of each image in the inids list
+    inids = list(morph_features_df['inid'])
+    x_train, x_test, y_train, y_test = mt.get_images_test_train(inids=inids, split_manifest_path=onto.SPLIT_MANIFEST_PATH)
 
     ## 3 : Predict the morphological features of the test dataset
     # Result of the prediction is saved in the 'features_prediction.csv' file
     x_morph_features = morph_features_df[morph_features_df.columns.drop('inid')]
-    y_morph_features = morph_features_df['inid']
+    y_morph_features = morph_features_df['inid'].map(mt.get_inid_mapping(inids))
     x_test_morph_features = mt.predict_all_columns_df(x_test, x_train, y_train, x_morph_features, y_morph_features)
 
     ## 4 : Train a classifier using the class morph features
@@ -98,29 +109,319 @@ def full_commented_pipeline():
     animal_classifier.score(x_test_morph_features, y_test)
 
 
-def full_pipeline(pipeline_dir:str='Data/POC/'):
-    loc_mapping = pipeline_dir + 'LOC_synset_mapping.txt'
-    mapping_path = pipeline_dir + 'synset_mapping.json'
-    graph_path = pipeline_dir + 'graph_arcs.csv'
-    animal_features_path = pipeline_dir + 'animal_features.json'
-    animal_ontology_path = pipeline_dir + 'animal_ontology.ttl'
-    ontology_structure_path = pipeline_dir + 'animal_ontology_structure.ttl'
-    features_prediction_path = pipeline_dir + 'features_prediction.csv'
-    print('Automatically map synsets to WikiData object')
-    sm.generate_synset_full_mapping(loc_mapping, mapping_path)
-    print('Initialize manually the WikiData object of the remaining synsets')
-    sm.set_all_synsets_manual_wdid(mapping_path)
-    print('Get the label of every object from WikiData')
-    sm.set_all_labels(mapping_path)
+def get_pipeline_paths(pipeline_dir:str=DEFAULT_PIPELINE_DIR)->dict[str, str]:
+    """Get the paths of the files of a pipeline directory
+
+    Args:
+        pipeline_dir (str, optional): Directory of the inputs and outputs of the pipeline. Defaults to DEFAULT_PIPELINE_DIR.
+
+    Returns:
+        dict[str, str]: Path of each file (loc_mapping, mapping, graph, animal_features, ontology, ontology_structure, 
+            split_manifest, feature_store, features_prediction, model_bundle, report, profiles, state)
+    """
+    return {
+        'loc_mapping': pipeline_dir + 'LOC_synset_mapping.txt',
+        'mapping': pipeline_dir + 'synset_mapping.json',
+        'graph': pipeline_dir + 'graph_arcs.csv',
+        'animal_features': pipeline_dir + 'animal_features.json',
+        'ontology': pipeline_dir + 'animal_ontology.ttl',
+        'ontology_structure': pipeline_dir + 'animal_ontology_structure.ttl',
+        'split_manifest': pipeline_dir + 'split_manifest.csv',
+        'feature_store': pipeline_dir + 'FeatureStore/',
+        'features_prediction': pipeline_dir + 'features_prediction.csv',
+        'model_bundle': pipeline_dir + 'model_bundle.joblib',
+        'report': pipeline_dir + RUN_REPORT_FILE_NAME,
+        'profiles': pipeline_dir + PROFILE_DIR_NAME,
+        'state': pipeline_dir + PIPELINE_STATE_FILE_NAME
+    }
+
+def full_pipeline(pipeline_dir:str=DEFAULT_PIPELINE_DIR, report_file_path:str=None, profile:bool=False, trace_memory:bool=False,
+                  zip_file_path:str=None, test_rate:float=TEST_RATE, force:list[str]=[], workers:int=DAG_WORKERS,
+                  manual_mapping:bool=True):
+    """Run the steps of the pipeline on the synsets of a pipeline directory, as a DAG of stages linked by their files
+        (see PipelineDag). Stages whose inputs didn't change since their last run are skipped,
+        and the extraction of the images runs while the WikiData graph is built.
+        Each stage is measured (wall and CPU time, peak memory, items processed and throughput), 
+        the measures are saved in a JSON run report and summed up in a table at the end of the run
+
+    Args:
+        pipeline_dir (str, optional): Directory of the inputs and outputs of the pipeline. Defaults to DEFAULT_PIPELINE_DIR.
+        report_file_path (str, optional): Path of the run report. If None, the report is saved in the 
+            pipeline directory, in file RUN_REPORT_FILE_NAME. Defaults to None.
+        profile (bool, optional): if true, each stage is profiled with cProfile, and the profiles are saved in the
+            PROFILE_DIR_NAME directory of the pipeline directory. Stages then run one at a time. Defaults to False.
+        trace_memory (bool, optional): if true, the memory allocated by each stage is traced with tracemalloc. 
+            Stages then run one at a time. Defaults to False.
+        zip_file_path (str, optional): Path of the Kaggle Challenge zip file. If None, ZIP_FILE_PATH. Defaults to None.
+        test_rate (float, optional): Rate of images assigned to the testing split. Defaults to TEST_RATE.
+        force (list[str], optional): Names of the stages to run even if they are up to date 
+            (mapping, arcs, structure, unzip, split, populate, features, train). Defaults to [].
+        workers (int, optional): Maximum number of stages running at once. Defaults to DAG_WORKERS.
+        manual_mapping (bool, optional): if true, the WikiData objects of the synsets which couldn't be mapped automatically
+            are selected manually (see synset_mapper.set_all_synsets_manual_wdid). Set it to False to run the pipeline 
+            unattended. Defaults to True.
+    """
+    import synset_mapper as sm
+    import animal_graph as ag
+    import ontology as onto
+    import model_training as mt
+    from image_dataset import ZIP_FILE_PATH
+    from rdflib import Namespace, RDF
+
+    paths = get_pipeline_paths(pipeline_dir)
+    if report_file_path is None:
+        report_file_path = paths['report']
+    if zip_file_path is None:
+        zip_file_path = ZIP_FILE_PATH
+    if profile or trace_memory:
+        workers = 1
+    telemetry = PipelineTelemetry(paths['profiles'] if profile else None, trace_memory, concurrent=workers > 1)
+    ac = Namespace(onto.ONTOLOGY_IRI)
+
+    def mapping():
+        print('Automatically map synsets to WikiData object')
+        with telemetry.stage('mapping') as stage:
+            sm.generate_synset_full_mapping(paths['loc_mapping'], paths['mapping'])
+            stage['items'] = len(sm.get_synset_full_mapping(paths['mapping']))
+        if manual_mapping:
+            print('Initialize manually the WikiData object of the remaining synsets')
+            with telemetry.stage('manual mapping'):
+                sm.set_all_synsets_manual_wdid(paths['mapping'])
+        print('Get the label of every object from WikiData')
+        with telemetry.stage('labels') as stage:
+            sm.set_all_labels(paths['mapping'])
+            stage['items'] = len(sm.get_synset_full_mapping(paths['mapping']))
+        print('Set the pattern of each animal from his WikiData object to the animal class')
+        with telemetry.stage('patterns') as stage:
+            ag.set_all_animal_pattern(paths['mapping'])
+            stage['items'] = len(sm.get_synset_full_mapping(paths['mapping']))
+
+    def arcs():
+        print('Create the arc of the graph of the ontology')
+        with telemetry.stage('arcs') as stage:
+            synsets = ag.get_animal_mapping(paths['mapping'])
+            ag.create_graph_arcs(synsets, paths['graph'])
+            stage['items'] = len(synsets)
+
+    def structure():
+        print('Initialize the structure of the ontology')
+        with telemetry.stage('structure') as stage:
+            ontology = onto.initialize_ontology_structure(paths['graph'], paths['animal_features'], paths['mapping'])
+            ontology.serialize(paths['ontology_structure'])
+            stage['items'] = len(list(ontology.triples((None, ac.inid, None))))
+
+    def unzip():
+        print('Unzip the images and annotations of the animal classes')
+        inids = [s['inid'] for s in ag.get_animal_mapping(paths['mapping'])]
+        with telemetry.stage('unzip', len(inids)):
+            onto.unzip_images_annotations_files(inids, zip_file_path)
+
+    def split():
+        print('Split the images into train and test')
+        with telemetry.stage('split') as stage:
+            stage['items'] = len(onto.create_split_manifest(test_rate, manifest_path=paths['split_manifest']))
+
+    def populate():
+        print('Populate the ontology')
+        with telemetry.stage('populate') as stage:
+            ontology = onto.populate_ontology(onto.get_ontology(paths['ontology_structure']), onto.IMAGES_PATH, onto.ANNOT_PATH,
+                                              split_manifest_path=paths['split_manifest'])
+            ontology.serialize(paths['ontology'])
+            onto.reset_ontology_population(paths['ontology'])
+            stage['items'] = len(set(ontology.subjects(RDF.type, Namespace(onto.SCHEMA_IRI).ImageObject)))
+
+    def features():
+        print('Extract the features of the images into the feature store')
+        inids = [str(inid) for _, _, inid in onto.get_ontology(paths['ontology_structure']).triples((None, ac.inid, None))]
+        with telemetry.stage('feature store') as stage:
+            x_train, x_test, _, _ = mt.get_images_test_train(inids=inids, split_manifest_path=paths['split_manifest'],
+                                                            feature_store_path=paths['feature_store'])
+            stage['items'] = len(x_train) + len(x_test)
+
+    def train():
+        print('Train and evaluate the image recognition module')
+        mt.image_recognition_model(paths['ontology_structure'], features_prediction_file_path=paths['features_prediction'],
+                                   split_manifest_path=paths['split_manifest'], feature_store_path=paths['feature_store'],
+                                   model_bundle_file_path=paths['model_bundle'], telemetry=telemetry, 
+                                   recompute_prediction=True)
+
+    dag = PipelineDag([
+        PipelineStage('mapping', mapping, [paths['loc_mapping'], ag.ANIMAL_PATTERNS_PATH], [paths['mapping']]),
+        PipelineStage('arcs', arcs, [paths['mapping']], [paths['graph']]),
+        PipelineStage('structure', structure, [paths['graph'], paths['animal_features'], paths['mapping']], [paths['ontology_structure']]),
+        PipelineStage('unzip', unzip, [paths['mapping'], zip_file_path], [onto.IMAGES_PATH, onto.ANNOT_PATH]),
+        PipelineStage('split', split, [onto.IMAGES_PATH], [paths['split_manifest']]),
+        PipelineStage('populate', populate, [paths['ontology_structure'], paths['split_manifest'], onto.IMAGES_PATH, onto.ANNOT_PATH], 
+                      [paths['ontology']]),
+        PipelineStage('features', features, [paths['ontology_structure'], paths['split_manifest'], onto.IMAGES_PATH], 
+                      [paths['feature_store']]),
+        PipelineStage('train', train, [paths['ontology_structure'], paths['split_manifest'], paths['feature_store']], 
+                      [paths['features_prediction'], paths['model_bundle']])
+    ], paths['state'], workers)
+    try:
+        dag.run(force)
+    finally:
+        telemetry.write_report(report_file_path)
+        print('Run report saved to file "'+report_file_path+'"')
+        telemetry.print_summary()
+
+def map_command(args):
+    import synset_mapper as sm
+    paths = get_pipeline_paths(args.pipeline_dir)
+    if not args.skip_generate:
+        print('Automatically map synsets to WikiData object')
+        sm.generate_synset_full_mapping(paths['loc_mapping'], paths['mapping'])
+    if not args.skip_manual:
+        print('Initialize manually the WikiData object of the remaining synsets')
+        sm.set_all_synsets_manual_wdid(paths['mapping'], args.start_inid)
+    if not args.skip_labels:
+        print('Get the label of every object from WikiData')
+        sm.set_all_labels(paths['mapping'])
+
+def patterns_command(args):
+    import animal_graph as ag
     print('Set the pattern of each animal from his WikiData object to the animal class')
-    ag.set_all_animal_pattern(mapping_path)
+    ag.set_all_animal_pattern(get_pipeline_paths(args.pipeline_dir)['mapping'], args.start_wdid)
+
+def arcs_command(args):
+    import animal_graph as ag
+    paths = get_pipeline_paths(args.pipeline_dir)
     print('Create the arc of the graph of the ontology')
-    synsets = ag.get_animal_mapping(mapping_path)
-    ag.create_graph_arcs(synsets, graph_path)
-    print('Create the ontology')
-    onto.create_ontology(animal_ontology_path, ontology_structure_path, graph_path, animal_features_path, mapping_path)
-    print('Train and evaluate the image recognition module')
-    mt.image_recognition_model(ontology_structure_path, features_prediction_file_path=features_prediction_path)
+    ag.create_graph_arcs(ag.get_animal_mapping(paths['mapping']), paths['graph'])
+
+def structure_command(args):
+    import ontology as onto
+    paths = get_pipeline_paths(args.pipeline_dir)
+    onto.create_ontology(paths['ontology'], paths['ontology_structure'], paths['graph'], paths['animal_features'], paths['mapping'])
+
+def populate_command(args):
+    import ontology as onto
+    paths = get_pipeline_paths(args.pipeline_dir)
+    onto.populate_ontology_file(onto.get_ontology(paths['ontology_structure']), paths['ontology'], 
+                                args.split_manifest or paths['split_manifest'], args.zip, args.test_rate, 
+                                args.schema or onto.VERBOSE_SCHEMA)
+
+def features_command(args):
+    import ontology as onto
+    import model_training as mt
+    from rdflib import Namespace
+    paths = get_pipeline_paths(args.pipeline_dir)
+    ac = Namespace(onto.ONTOLOGY_IRI)
+    ontology = onto.get_ontology(paths['ontology_structure'])
+    inids = [str(inid) for _, _, inid in ontology.triples((None, ac.inid, None))]
+    x_train, x_test, _, _ = mt.get_images_test_train(inids=inids, split_manifest_path=args.split_manifest or paths['split_manifest'],
+                                                    workers=args.workers, feature_store_path=args.feature_store or paths['feature_store'],
+                                                    decode_scale=args.decode_scale, roi=args.roi, extractors=args.extractors)
+    print('Features of '+str(len(x_train)+len(x_test))+' images in the feature store')
+
+def train_command(args):
+    import model_training as mt
+    paths = get_pipeline_paths(args.pipeline_dir)
+    options = {
+        'morph_features_engine': args.engine,
+        'max_images_per_class': args.max_images_per_class,
+        'max_images_per_value': args.max_images_per_value,
+        'feature_reduction': args.feature_reduction,
+        'feature_store_path': args.feature_store or paths['feature_store'],
+        'extractors': args.extractors
+    }
+    mt.image_recognition_model(paths['ontology_structure'], features_prediction_file_path=paths['features_prediction'],
+                               split_manifest_path=args.split_manifest or paths['split_manifest'],
+                               model_bundle_file_path=paths['model_bundle'], decode_scale=args.decode_scale, roi=args.roi,
+                               recompute_prediction=args.recompute, 
+                               **{name: value for name, value in options.items() if value is not None})
+
+def predict_command(args):
+    import model_inference as mi
+    mi.classify_files(args.paths, args.bundle or get_pipeline_paths(args.pipeline_dir)['model_bundle'], 
+                      args.output or mi.PREDICTIONS_FILE_PATH, args.workers)
+
+def run_command(args):
+    full_pipeline(args.pipeline_dir, args.report, args.profile, args.trace_memory, args.zip, args.test_rate, 
+                  args.force, args.workers, not args.skip_manual)
+
+def build_parser()->ArgumentParser:
+    """Build the parser of the command line interface, with one subcommand per step of the pipeline.
+        Only the standard library is imported to build it
+
+    Returns:
+        ArgumentParser: Parser of the command line arguments
+    """
+    common = ArgumentParser(add_help=False)
+    common.add_argument('--pipeline-dir', default=DEFAULT_PIPELINE_DIR, 
+                        help='Directory of the inputs and outputs of the pipeline (default: %(default)s)')
+    images = ArgumentParser(add_help=False)
+    images.add_argument('--split-manifest', default=None, help='Train/test split manifest (default: split_manifest.csv in the pipeline directory)')
+    images.add_argument('--feature-store', default=None, help='Directory of the feature store (default: FeatureStore/ in the pipeline directory)')
+    images.add_argument('--decode-scale', type=int, default=1, choices=[1, 2, 4, 8], 
+                        help='Scale at which the images are decoded (default: %(default)s)')
+    images.add_argument('--roi', action='store_true', help='Compute the features of the bounding boxes only')
+    images.add_argument('--extractors', nargs='+', default=None, help='Feature extractors (default: hsv_histogram)')
+
+    parser = ArgumentParser(description='Build the animal ontology and train the image recognition model step by step. '
+                                        'The run subcommand runs the full pipeline')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run = subparsers.add_parser('run', parents=[common], help='Run all the stages which are not up to date')
+    run.add_argument('--zip', default=None, help='Kaggle Challenge zip file (default: the one of image_dataset.py)')
+    run.add_argument('--test-rate', type=float, default=TEST_RATE, help='Rate of testing images (default: %(default)s)')
+    run.add_argument('--force', nargs='+', default=[], help='Stages to run even if they are up to date')
+    run.add_argument('--workers', type=int, default=DAG_WORKERS, help='Maximum number of stages running at once (default: %(default)s)')
+    run.add_argument('--skip-manual', action='store_true', help='Don\'t select manually the WikiData objects of the unmapped synsets')
+    run.add_argument('--report', default=None, help='Run report file (default: '+RUN_REPORT_FILE_NAME+' in the pipeline directory)')
+    run.add_argument('--profile', action='store_true', help='Profile each stage with cProfile')
+    run.add_argument('--trace-memory', action='store_true', help='Trace the memory allocated by each stage with tracemalloc')
+    run.set_defaults(handler=run_command)
+
+    mapping = subparsers.add_parser('map', parents=[common], help='Map the synsets to WikiData objects and get their labels')
+    mapping.add_argument('--skip-generate', action='store_true', help='Keep the existing mapping instead of generating it again')
+    mapping.add_argument('--skip-manual', action='store_true', help='Don\'t select manually the WikiData objects of the unmapped synsets')
+    mapping.add_argument('--skip-labels', action='store_true', help='Don\'t get the labels of the WikiData objects')
+    mapping.add_argument('--start-inid', default=None, help='ImageNet ID to resume the manual selection from')
+    mapping.set_defaults(handler=map_command)
+
+    patterns = subparsers.add_parser('patterns', parents=[common], help='Set the pattern of each WikiData object to the animal class')
+    patterns.add_argument('--start-wdid', default=None, help='WikiData ID to resume from')
+    patterns.set_defaults(handler=patterns_command)
+
+    subparsers.add_parser('arcs', parents=[common], help='Create the arcs of the animal graph').set_defaults(handler=arcs_command)
+    subparsers.add_parser('structure', parents=[common], 
+                          help='Initialize the structure of the ontology').set_defaults(handler=structure_command)
+
+    populate = subparsers.add_parser('populate', parents=[common], help='Populate the ontology with the training images')
+    populate.add_argument('--zip', default=None, help='Extract the images from this Kaggle Challenge zip file first')
+    populate.add_argument('--test-rate', type=float, default=None, 
+                          help='Split the images with this testing rate first (default: use the existing split manifest)')
+    populate.add_argument('--split-manifest', default=None, help='Train/test split manifest (default: split_manifest.csv in the pipeline directory)')
+    populate.add_argument('--schema', default=None, help='Population schema, verbose or compact (default: verbose)')
+    populate.set_defaults(handler=populate_command)
+
+    features = subparsers.add_parser('features', parents=[common, images], 
+                                     help='Extract the features of the images into the feature store')
+    features.add_argument('--workers', type=int, default=None, help='Number of extraction processes (default: one per core)')
+    features.set_defaults(handler=features_command)
+
+    train = subparsers.add_parser('train', parents=[common, images], help='Train and evaluate the image recognition model')
+    train.add_argument('--engine', default=None, 
+                       help='Engine of the morphological features models: sequential, multilabel, parallel or streaming (default: sequential)')
+    train.add_argument('--max-images-per-class', type=int, default=None, help='Maximum training images per class of each model')
+    train.add_argument('--max-images-per-value', type=int, default=None, help='Maximum training images per target value of each model')
+    train.add_argument('--feature-reduction', default=None, help='Reduction of the image features: pca or random_projection')
+    train.add_argument('--recompute', action='store_true', help='Predict the features again if the prediction file exists')
+    train.set_defaults(handler=train_command)
+
+    predict = subparsers.add_parser('predict', parents=[common], help='Classify images with the saved model bundle')
+    predict.add_argument('paths', nargs='+', help='Image files or directories of images')
+    predict.add_argument('--bundle', default=None, help='Model bundle file (default: model_bundle.joblib in the pipeline directory)')
+    predict.add_argument('--output', default=None, help='Predictions CSV file (default: the one of model_inference.py)')
+    predict.add_argument('--workers', type=int, default=None, help='Number of extraction processes (default: one per core)')
+    predict.set_defaults(handler=predict_command)
+    return parser
 
 if __name__=='__main__':
-    full_pipeline()
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.command is None:
+        parser.print_help()
+    else:
+        args.handler(args)
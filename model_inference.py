@@ -0,0 +1,106 @@
+from model_training import load_model_bundle, predict_columns, MODEL_BUNDLE_FILE_PATH
+from feature_extraction import extract_features_parallel, read_file
+from feature_reduction import reduce_features
+from argparse import ArgumentParser
+from typing import Callable
+from pandas import DataFrame
+import numpy as np
+import os
+
+IMAGE_EXTENSIONS        = ['.jpeg', '.jpg', '.png']
+PREDICTIONS_FILE_PATH   = 'Data/KaggleChallenge/predictions.csv'
+
+def list_image_files(paths:list[str])->list[str]:
+    """List the image files of a list of paths. Directories are searched recursively for image files
+
+    Args:
+        paths (list[str]): Paths of image files or of directories
+
+    Raises:
+        ValueError: If a path doesn't exist
+
+    Returns:
+        list[str]: Paths of the image files, sorted within each directory
+    """
+    image_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                dir_names.sort()
+                image_paths += [os.path.join(dir_path, file_name) for file_name in sorted(file_names)
+                                if os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS]
+        elif os.path.isfile(path):
+            image_paths.append(path)
+        else:
+            raise ValueError('Path "'+path+'" not found')
+    return image_paths
+
+def predict_images(bundle:dict, items:list, read_item:Callable=read_file, workers:int=None, 
+                   progress_bar:bool=True)->tuple[list[str], DataFrame]:
+    """Classify images with a model bundle. The features of the images are extracted by the parallel extractor,
+        at the decoding scale and with the extractors of the training images. New images have no annotations, so their features are computed 
+        on the whole image
+
+    Args:
+        bundle (dict): Model bundle (see load_model_bundle)
+        items (list): Items to classify (ex: paths of the image files)
+        read_item (Callable, optional): Function returning the content of the image file of an item. Defaults to read_file.
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+        progress_bar (bool, optional): if true, displays a tqdm progress bar of the extraction. Defaults to True.
+
+    Returns:
+        tuple[list[str], DataFrame]: Predicted ImageNet ID of each image, and its predicted morphological features
+    """
+    extractors = bundle.get('extractors')
+    features = extract_features_parallel(items, read_item, workers, progress_bar=progress_bar, 
+                                         decode_scale=bundle.get('decode_scale', 1), extractors=extractors)
+    if extractors:
+        features = np.concatenate([features[extractor] for extractor in extractors], axis=1)
+    if bundle['reduction'] is not None:
+        features = reduce_features(bundle['reduction'], features)
+    morph_features_df = predict_columns(bundle['morph_features_models'], features)
+    if len(items) == 0:
+        return [], morph_features_df
+    codes = np.asarray(bundle['animal_classifier'].predict(morph_features_df), dtype=np.int64)
+    return [bundle['inids'][code] for code in codes], morph_features_df
+
+def write_predictions(predictions_file_path:str, items:list, inids:list[str], morph_features_df:DataFrame):
+    """Write the classification of images in a CSV file, with one row per image
+
+    Args:
+        predictions_file_path (str): Path of the CSV file
+        items (list): Classified items (ex: paths of the image files), written in the 'image' column
+        inids (list[str]): Predicted ImageNet ID of each image, written in the 'inid' column
+        morph_features_df (DataFrame): Predicted morphological features of the images, one column per feature
+    """
+    predictions_df = morph_features_df.copy()
+    predictions_df.insert(0, 'inid', inids)
+    predictions_df.insert(0, 'image', [str(item) for item in items])
+    os.makedirs(os.path.dirname(predictions_file_path) or '.', exist_ok=True)
+    predictions_df.to_csv(predictions_file_path, index=False)
+
+def classify_files(paths:list[str], model_bundle_file_path:str=MODEL_BUNDLE_FILE_PATH, 
+                   predictions_file_path:str=PREDICTIONS_FILE_PATH, workers:int=None):
+    """Classify image files with a model bundle and save the predictions in a CSV file
+
+    Args:
+        paths (list[str]): Image files or directories of images (see list_image_files)
+        model_bundle_file_path (str, optional): Path of the model bundle. Defaults to MODEL_BUNDLE_FILE_PATH.
+        predictions_file_path (str, optional): Path of the predictions CSV file. Defaults to PREDICTIONS_FILE_PATH.
+        workers (int, optional): Number of extraction processes. If None, one per core. Defaults to None.
+    """
+    bundle = load_model_bundle(model_bundle_file_path)
+    image_paths = list_image_files(paths)
+    print('Classifying '+str(len(image_paths))+' images...')
+    inids, morph_features_df = predict_images(bundle, image_paths, workers=workers)
+    write_predictions(predictions_file_path, image_paths, inids, morph_features_df)
+    print('Predictions saved at "'+predictions_file_path+'"')
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Classify images with a model bundle saved by image_recognition_model')
+    parser.add_argument('paths', nargs='+', help='Image files or directories of images')
+    parser.add_argument('--bundle', default=MODEL_BUNDLE_FILE_PATH, help='Model bundle file (default: %(default)s)')
+    parser.add_argument('--output', default=PREDICTIONS_FILE_PATH, help='Predictions CSV file (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of extraction processes (default: one per core)')
+    args = parser.parse_args()
+    classify_files(args.paths, args.bundle, args.output, args.workers)
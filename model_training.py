@@ -1,15 +1,38 @@
-from ontology import ONTOLOGY_IRI, get_ontology, IMAGES_TEST_PATH, IMAGES_TRAIN_PATH, ONTOLOGY_STRUCTURE_FILE_PATH
+from ontology import (ONTOLOGY_IRI, get_ontology, IMAGES_TEST_PATH, IMAGES_TRAIN_PATH, ONTOLOGY_STRUCTURE_FILE_PATH,
+                      IMAGES_PATH, ANNOT_PATH, get_split_manifest, split_dataset)
+from image_dataset import ImageDataset, DirectoryImageDataset
+from feature_extraction import (extract_image_features, extract_features_parallel, read_file, get_extractor_version, 
+                                get_extractor, get_feature_block, FEATURES_SIZE, DEFAULT_EXTRACTOR)
+from feature_store import (FeatureStore, extract_files_features, extract_dataset_features, extract_files_blocks, 
+                           extract_dataset_blocks, FEATURE_STORE_PATH)
+from pixel_cache import build_pixel_cache, extract_cached_features
+from feature_reduction import get_reduction, reduce_features, get_reduction_components, REDUCTION_COMPONENTS
+from pipeline_telemetry import PipelineTelemetry, measure_stage
 from rdflib import Graph, Namespace
 from rdflib.namespace import RDFS, RDF
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.neural_network import MLPClassifier
-from sklearn.base import BaseEstimator
-from pandas import DataFrame, Series, read_csv
-import cv2
+from sklearn.base import BaseEstimator, clone
+from joblib import Parallel, delayed
+from pandas import DataFrame, read_csv
+from scipy.sparse import csr_matrix
+import numpy as np
+import joblib
 import os
 from tqdm import tqdm
 
 FEATURES_PREDICTION_FILE_PATH = 'Data/KaggleChallenge/features_prediction.csv'
+MODEL_BUNDLE_FILE_PATH = 'Data/KaggleChallenge/model_bundle.joblib'
+MODEL_BUNDLE_VERSION = 1
+TEST_TARGETS_FILE_SUFFIX = '_targets.csv'
+SEQUENTIAL_ENGINE   = 'sequential'
+MULTILABEL_ENGINE   = 'multilabel'
+PARALLEL_ENGINE     = 'parallel'
+STREAMING_ENGINE    = 'streaming'
+ENGINES             = [SEQUENTIAL_ENGINE, MULTILABEL_ENGINE, PARALLEL_ENGINE, STREAMING_ENGINE]
+SAMPLING_SEED       = 0
+STREAMING_BATCH_SIZE = 1024
+STREAMING_EPOCHS    = 5
 
 def image_recognition_model(
         ontology_file_path:str=ONTOLOGY_STRUCTURE_FILE_PATH,
@@ -17,7 +40,24 @@ def image_recognition_model(
         images_test_dir_path:str=IMAGES_TEST_PATH,        
         features_prediction_file_path:str=FEATURES_PREDICTION_FILE_PATH,
         animal_classifier:BaseEstimator=None,
-        morph_features_prediction_classifier:BaseEstimator=None):
+        morph_features_prediction_classifier:BaseEstimator=None,
+        train_dataset:ImageDataset=None,
+        test_dataset:ImageDataset=None,
+        split_manifest_path:str=None,
+        dataset:ImageDataset=None,
+        feature_store_path:str=FEATURE_STORE_PATH,
+        morph_features_engine:str=SEQUENTIAL_ENGINE,
+        max_images_per_class:int=None,
+        max_images_per_value:int=None,
+        feature_reduction:str=None,
+        reduction_components:int=REDUCTION_COMPONENTS,
+        memmap_dir_path:str=None,
+        model_bundle_file_path:str=None,
+        decode_scale:int=1,
+        roi:bool=False,
+        extractors:list[str]=None,
+        telemetry:PipelineTelemetry=None,
+        recompute_prediction:bool=False):
     """Train and evaluate an image recognition model by predicting an DataFrame of morphological features for the test images
 
     Args:
@@ -30,52 +70,193 @@ def image_recognition_model(
             Defaults to MLPClassifier.
         morph_features_prediction_classifier (BaseEstimator, optional): Classifier used to predict the morphological features of the test images. 
             Defaults to MLPClassifier.
+        train_dataset (ImageDataset, optional): Dataset of training images, used instead of images_train_dir_path if set.
+            Defaults to None.
+        test_dataset (ImageDataset, optional): Dataset of testing images, used instead of images_test_dir_path if set.
+            Defaults to None.
+        split_manifest_path (str, optional): Path of a train/test split manifest. If set, the training and testing images
+            are taken from the unsplit dataset according to the manifest. Defaults to None.
+        dataset (ImageDataset, optional): Unsplit dataset used with split_manifest_path. 
+            If None, the images are read from IMAGES_PATH. Defaults to None.
+        feature_store_path (str, optional): Directory of the image feature store. If None, no store is used.
+            Defaults to FEATURE_STORE_PATH.
+        morph_features_engine (str, optional): Engine training the morphological features models 
+            (see predict_all_columns_df). Defaults to SEQUENTIAL_ENGINE.
+        max_images_per_class (int, optional): Maximum number of training images per class of each morphological features model.
+            If None, all the images are used. Defaults to None.
+        max_images_per_value (int, optional): Maximum number of training images per target value of each morphological 
+            features model. If None, all the images are used. Defaults to None.
+        feature_reduction (str, optional): Dimensionality reduction applied to the image features before training the
+            morphological features models (PCA_REDUCTION or RANDOM_PROJECTION_REDUCTION, see feature_reduction.py).
+            It is fitted once on the training features and cached in the feature store. If None, no reduction. Defaults to None.
+        reduction_components (int, optional): Number of image features after the reduction. Defaults to REDUCTION_COMPONENTS.
+        memmap_dir_path (str, optional): If set, the image features are memory-mapped arrays saved in this directory 
+            instead of in-memory arrays (see get_images_test_train). With the STREAMING_ENGINE, the training images 
+            don't have to fit in memory. Defaults to None.
+        model_bundle_file_path (str, optional): If set, the fitted models are saved in this file (see save_model_bundle),
+            to classify new images with model_inference.py. Only saved when the prediction is computed. Defaults to None.
+        decode_scale (int, optional): Scale at which the images are decoded (see get_images_test_train). Defaults to 1.
+        roi (bool, optional): if true, the features of the images are restricted to their bounding boxes 
+            (see get_images_test_train). Defaults to False.
+        extractors (list[str], optional): Names of the feature extractors of the images (see get_images_test_train). 
+            If None, the default HSV histogram. Defaults to None.
+        telemetry (PipelineTelemetry, optional): If set, the feature extraction, per-feature training and final scoring 
+            stages are measured in this telemetry. Defaults to None.
+        recompute_prediction (bool, optional): if true, the morphological features of the test images are predicted
+            even if the features prediction file already exists. Otherwise, the existing file is reused, with the classes
+            of the testing images saved next to it (see get_test_targets_file_path). Defaults to False.
+
+    Raises:
+        ValueError: If the classes of the testing images of a reused prediction aren't in the ontology
     """
     ontology = get_ontology(ontology_file_path)
     ac = Namespace(ONTOLOGY_IRI)
     inids = [str(inid) for _, _, inid in ontology.triples((None, ac.inid, None))]
-    inid_mapping = {inid: i+1 for i, inid in enumerate(inids)}
+    inid_mapping = get_inid_mapping(inids)
     
     morph_features_df = build_class_morph_features_df(ontology)
     x_morph_features = morph_features_df[morph_features_df.columns.drop('inid')]
-    y_morph_features = morph_features_df['inid'].map(inid_mapping)
+    y_morph_features = morph_features_df['inid'].map(inid_mapping).to_numpy()
 
-    compute_prediction = True
-    if os.path.exists(features_prediction_file_path):
-        compute_prediction = False
-        print('File "'+features_prediction_file_path+'" already exists')
-        comp_pred_input = input('Compute prediction again ? (y/N)')
-        if comp_pred_input == 'y':
-            compute_prediction = True
+    reduction = None
+    columns_models = None
+    test_targets_file_path = get_test_targets_file_path(features_prediction_file_path)
+    compute_prediction = (recompute_prediction or not os.path.exists(features_prediction_file_path) 
+                          or not os.path.exists(test_targets_file_path))
+    if not compute_prediction:
+        print('File "'+features_prediction_file_path+'" already exists, the prediction is reused')
+        if model_bundle_file_path:
+            print('Warning : the models aren\'t fitted when the prediction is reused, the model bundle "'+
+                  model_bundle_file_path+'" isn\'t saved (use recompute_prediction to save it)')
 
     if compute_prediction:
         print('Initialize a training and a testing dataset from the animal images')
-        x_train, x_test, y_train, y_test = get_images_test_train(
-            images_train_dir_path, images_test_dir_path, inids)
-
-        y_train_encoded = y_train.map(inid_mapping)
-        y_test_encoded = y_test.map(inid_mapping)      
+        with measure_stage(telemetry, 'feature extraction') as stage:
+            x_train, x_test, y_train, y_test = get_images_test_train(
+                images_train_dir_path, images_test_dir_path, inids, train_dataset, test_dataset, 
+                split_manifest_path, dataset, feature_store_path=feature_store_path, memmap_dir_path=memmap_dir_path,
+                decode_scale=decode_scale, roi=roi, extractors=extractors)
+            if feature_reduction:
+                block = get_feature_block(decode_scale, roi, '+'.join(extractors) if extractors else DEFAULT_EXTRACTOR)
+                reduction = get_reduction(x_train, feature_reduction, reduction_components, feature_store_path, block)
+                reduced = {'x_train': x_train, 'x_test': x_test}
+                for name, x in reduced.items():
+                    out = None
+                    if memmap_dir_path:
+                        out = np.lib.format.open_memmap(os.path.join(memmap_dir_path, name+'.'+feature_reduction+'.npy'), 
+                                                        mode='w+', dtype=np.float32, 
+                                                        shape=(len(x), get_reduction_components(reduction)))
+                    reduced[name] = reduce_features(reduction, x, out=out)
+                x_train, x_test = reduced['x_train'], reduced['x_test']
+            stage['items'] = len(x_train) + len(x_test)
 
         print('Predict the morphological features of the test dataset...')
-        x_test_morph_features = predict_all_columns_df(
-                                    x_test, x_train, y_train_encoded, 
-                                    x_morph_features, y_morph_features,
-                                    morph_features_prediction_classifier)
-        x_test_morph_features.to_csv(features_prediction_file_path, index=False)
+        with measure_stage(telemetry, 'per-feature training', x_morph_features.shape[1]):
+            x_test_morph_features, columns_models = predict_all_columns_df(
+                                        x_test, x_train, y_train, 
+                                        x_morph_features, y_morph_features,
+                                        morph_features_prediction_classifier, morph_features_engine,
+                                        max_images_per_class=max_images_per_class, 
+                                        max_images_per_value=max_images_per_value,
+                                        return_models=True)
+            x_test_morph_features.to_csv(features_prediction_file_path, index=False)
+            DataFrame({'inid': np.asarray(inids)[y_test]}).to_csv(test_targets_file_path, index=False)
     else: 
         x_test_morph_features = read_csv(features_prediction_file_path)
+        y_test = read_csv(test_targets_file_path, dtype=str)['inid'].map(inid_mapping)
+        if y_test.isna().any():
+            raise ValueError('Classes of the testing images in file "'+test_targets_file_path+'" are not in the ontology, '
+                             'the prediction must be recomputed')
+        y_test = y_test.astype(int).to_numpy()
 
     if not animal_classifier:
         animal_classifier = MLPClassifier(max_iter=1000, solver='lbfgs', alpha=1e-5)
     print('Training model...', end='')
-    animal_classifier.fit(x_morph_features, y_morph_features)
-    print('Done')
-    print('Model accuracy : {:.3f}'.format(animal_classifier.score(x_test_morph_features, y_test_encoded)))
+    with measure_stage(telemetry, 'final scoring', len(x_test_morph_features)):
+        animal_classifier.fit(x_morph_features, y_morph_features)
+        print('Done')
+        print('Model accuracy : {:.3f}'.format(animal_classifier.score(x_test_morph_features, y_test)))
+    if model_bundle_file_path and columns_models is not None:
+        save_model_bundle(model_bundle_file_path, columns_models, animal_classifier, inids, reduction, decode_scale, extractors)
+
+def get_test_targets_file_path(features_prediction_file_path:str)->str:
+    """Get the path of the file storing the ImageNet ID of each testing image, next to the features prediction file,
+        so that the model can be scored when the prediction is reused
+
+    Args:
+        features_prediction_file_path (str): Path of the features prediction file
+
+    Returns:
+        str: Path of the test targets file
+    """
+    return os.path.splitext(features_prediction_file_path)[0] + TEST_TARGETS_FILE_SUFFIX
+
+def save_model_bundle(model_bundle_file_path:str, columns_models:dict, animal_classifier:BaseEstimator, 
+                      inids:list[str], reduction:object=None, decode_scale:int=1, extractors:list[str]=None):
+    """Save everything needed to classify new images in a single versioned file: the preprocessing of the image features,
+        the morphological features models, the animal classifier and the vocabularies of the classes and of the features
+
+    Args:
+        model_bundle_file_path (str): Path of the bundle file
+        columns_models (dict): Morphological features models (see predict_all_columns_df)
+        animal_classifier (BaseEstimator): Classifier predicting the class code from the morphological features
+        inids (list[str]): ImageNet ID of each class code
+        reduction (object, optional): Fitted reduction of the image features (see feature_reduction.py). Defaults to None.
+        decode_scale (int, optional): Scale at which the training images were decoded. Defaults to 1.
+        extractors (list[str], optional): Feature extractors of the training images. If None, the default one. Defaults to None.
+    """
+    bundle = {
+        'version': MODEL_BUNDLE_VERSION,
+        'extractor_version': get_extractor_version(),
+        'features_size': FEATURES_SIZE,
+        'decode_scale': decode_scale,
+        'extractors': extractors,
+        'reduction': reduction,
+        'morph_features_models': columns_models,
+        'animal_classifier': animal_classifier,
+        'inids': list(inids),
+        'morph_features': columns_models['columns']
+    }
+    os.makedirs(os.path.dirname(model_bundle_file_path) or '.', exist_ok=True)
+    joblib.dump(bundle, model_bundle_file_path+'.tmp')
+    os.replace(model_bundle_file_path+'.tmp', model_bundle_file_path)
+    print('Model bundle saved at "'+model_bundle_file_path+'"')
+
+def load_model_bundle(model_bundle_file_path:str=MODEL_BUNDLE_FILE_PATH)->dict:
+    """Load a model bundle saved by save_model_bundle
+
+    Args:
+        model_bundle_file_path (str, optional): Path of the bundle file. Defaults to MODEL_BUNDLE_FILE_PATH.
+
+    Raises:
+        ValueError: If the bundle was saved by another version of save_model_bundle
+
+    Returns:
+        dict: Content of the bundle
+    """
+    bundle = joblib.load(model_bundle_file_path)
+    if bundle.get('version') != MODEL_BUNDLE_VERSION:
+        raise ValueError('Model bundle "'+model_bundle_file_path+'" has version '+str(bundle.get('version'))+
+                         ', expected version '+str(MODEL_BUNDLE_VERSION))
+    if bundle['extractor_version'] != get_extractor_version():
+        print('Warning : model bundle "'+model_bundle_file_path+'" was trained on features of another extractor version')
+    return bundle
 
 def get_images_test_train(train_dir_path:str=IMAGES_TRAIN_PATH,
                           test_dir_path:str=IMAGES_TEST_PATH,
-                          inids:list[str]= []
-                          )->tuple[DataFrame, DataFrame, Series, Series]:
+                          inids:list[str]= [],
+                          train_dataset:ImageDataset=None,
+                          test_dataset:ImageDataset=None,
+                          split_manifest_path:str=None,
+                          dataset:ImageDataset=None,
+                          workers:int=None,
+                          feature_store_path:str=FEATURE_STORE_PATH,
+                          memmap_dir_path:str=None,
+                          decode_scale:int=1,
+                          roi:bool=False,
+                          extractors:list[str]=None,
+                          pixel_cache_path:str=None
+                          )->tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """Extract a training and testing dataset from the images
 
     Args:
@@ -83,104 +264,576 @@ def get_images_test_train(train_dir_path:str=IMAGES_TRAIN_PATH,
         test_dir_path (str, optional): path of the directory containing the testing images. Defaults to IMAGES_TEST_PATH.
         inids (list[str], optional): List of ImageNet IDs to get the images of. 
             If empty, images are gathered from all of the sudirectories in the images directories are taken. Defaults to [].
+        train_dataset (ImageDataset, optional): Dataset to read the training images from instead of train_dir_path.
+            Defaults to None.
+        test_dataset (ImageDataset, optional): Dataset to read the testing images from instead of test_dir_path.
+            Defaults to None.
+        split_manifest_path (str, optional): Path of a train/test split manifest. If set, the training and testing 
+            datasets are the splits of 'dataset' described in the manifest. Defaults to None.
+        dataset (ImageDataset, optional): Unsplit dataset used with split_manifest_path. 
+            If None, the images are read from IMAGES_PATH. Defaults to None.
+        workers (int, optional): Number of processes extracting the features. If None, one per core. Defaults to None.
+        feature_store_path (str, optional): Directory of the feature store. Features already in the store are read from it,
+            the other ones are extracted and added to it. If None, all the features are extracted. Defaults to FEATURE_STORE_PATH.
+        memmap_dir_path (str, optional): If set, the feature matrices are memory-mapped arrays saved in this directory
+            (x_train.npy and x_test.npy) instead of in-memory arrays. Defaults to None.
+        decode_scale (int, optional): Scale at which the images are decoded: 1, 2, 4 or 8 (see extract_features_parallel). 
+            Defaults to 1.
+        roi (bool, optional): if true, the features of annotated images are restricted to their bounding boxes.
+            Requires the images to be read from datasets (train_dataset, test_dataset or split_manifest_path). Defaults to False.
+        extractors (list[str], optional): Names of the feature extractors (see feature_extraction.FEATURE_EXTRACTORS).
+            Each image is decoded once for all of them, their features are stored in separate blocks of the feature store 
+            and concatenated in the order of the list. If None, the default 512 features HSV histogram. Defaults to None.
+        pixel_cache_path (str, optional): Directory of a pixel cache (see pixel_cache.py). If set, the images are added 
+            to the cache if needed, and their features are computed from their cached thumbnails instead of the image files
+            (decode_scale is then ignored). Requires the images to be read from datasets. Defaults to None.
+
+    Raises:
+        ValueError: If roi is true and the images are read from directories
+        ValueError: If pixel_cache_path is set and the images are read from directories
 
     Returns:
-        tuple[DataFrame, DataFrame, Series, Series]: 
-            Features and target for the train and test datasets
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: 
+            Features (contiguous float32 matrices of shape (nb_images, nb_features), 512 features by default) 
+            and target for the train and test datasets.
+            The target is integer-coded: each value is the index of the ImageNet ID of the image in 'inids'
+            (or in the sorted list of the found ImageNet IDs if 'inids' is empty, see get_inid_mapping)
     """
-    def extract_image_dataset(images_dir_path:str, inids:list[str])->tuple[DataFrame, Series]:
-        features = []
+    def list_directory_images(images_dir_path:str, inids:list[str])->tuple[list[str], list[str]]:
+        image_paths = []
         target = []
-        for inid in tqdm((inids if inids else os.listdir(images_dir_path))):
+        for inid in (inids if inids else os.listdir(images_dir_path)):
             object_dir_path = os.path.join(images_dir_path, inid)
             if not os.path.exists(object_dir_path):
                 raise ValueError('ImageNet ID "'+inid+'" directory not found at path "'+object_dir_path+'"')
             for image in os.listdir(object_dir_path):
-                features.append(extract_image_features(os.path.join(object_dir_path, image)))
+                image_paths.append(os.path.join(object_dir_path, image))
                 target.append(inid)
-        return DataFrame(features), Series(target)
-    
+        return image_paths, target
+
+    def list_dataset_images(dataset:ImageDataset, inids:list[str])->tuple[list[str], list[str]]:
+        image_ids = []
+        target = []
+        for inid in (inids if inids else dataset.inids()):
+            images = dataset.image_ids(inid)
+            if not images:
+                raise ValueError('ImageNet ID "'+inid+'" has no images in the dataset')
+            image_ids += images
+            target += [inid]*len(images)
+        return image_ids, target
+
+    def extract_image_dataset(images:list[str], dataset:ImageDataset, name:str)->np.ndarray:
+        if dataset is None and roi:
+            raise ValueError('Bounding boxes are only available for images read from a dataset')
+        if dataset is None and pixel_cache_path:
+            raise ValueError('The pixel cache is only available for images read from a dataset')
+        features_size = sum(get_extractor(extractor)[1] for extractor in extractors) if extractors else FEATURES_SIZE
+        out = None
+        if memmap_dir_path:
+            os.makedirs(memmap_dir_path, exist_ok=True)
+            out = np.lib.format.open_memmap(os.path.join(memmap_dir_path, name+'.npy'), mode='w+', 
+                                            dtype=np.float32, shape=(len(images), features_size))
+        if pixel_cache_path:
+            cache = build_pixel_cache(dataset, images, pixel_cache_path, workers, roi)
+            blocks = extract_cached_features(cache, images, extractors if extractors else [DEFAULT_EXTRACTOR])
+            out = out if out is not None else np.empty((len(images), features_size), dtype=np.float32)
+            np.concatenate(list(blocks.values()), axis=1, out=out)
+            return out
+        if extractors:
+            if not feature_store_path:
+                blocks = extract_features_parallel(images, read_file if dataset is None else dataset.read_image, workers,
+                                                   decode_scale=decode_scale, extractors=extractors,
+                                                   read_region=dataset.image_region if roi else None)
+            elif dataset is None:
+                blocks = extract_files_blocks(feature_store_path, extractors, images, workers, decode_scale)
+            else:
+                blocks = extract_dataset_blocks(feature_store_path, extractors, dataset, images, workers, decode_scale, roi)
+            out = out if out is not None else np.empty((len(images), features_size), dtype=np.float32)
+            np.concatenate([blocks[extractor] for extractor in extractors], axis=1, out=out)
+            return out
+        if dataset is None:
+            if store:
+                return extract_files_features(store, images, workers, out, decode_scale)
+            return extract_features_parallel(images, read_file, workers, out=out, decode_scale=decode_scale)
+        if store:
+            return extract_dataset_features(store, dataset, images, workers, out, decode_scale, roi)
+        return extract_features_parallel(images, dataset.read_image, workers, out=out, decode_scale=decode_scale,
+                                         read_region=dataset.image_region if roi else None)
+
+    if split_manifest_path:
+        if dataset is None:
+            dataset = DirectoryImageDataset(IMAGES_PATH, ANNOT_PATH)
+        train_dataset, test_dataset = split_dataset(dataset, get_split_manifest(split_manifest_path))
+    store = FeatureStore(feature_store_path, get_feature_block(decode_scale, roi)) if feature_store_path else None
+
+    train_images, train_target = (list_directory_images(train_dir_path, inids) if train_dataset is None 
+                                  else list_dataset_images(train_dataset, inids))
+    test_images, test_target = (list_directory_images(test_dir_path, inids) if test_dataset is None 
+                                else list_dataset_images(test_dataset, inids))
+    inid_mapping = get_inid_mapping(inids if inids else sorted(set(train_target) | set(test_target)))
+
     print('Extract training dataset...')
-    x_train, y_train = extract_image_dataset(train_dir_path, inids)
+    x_train = extract_image_dataset(train_images, train_dataset, 'x_train')
     print('Extract testing dataset...')
-    x_test, y_test = extract_image_dataset(test_dir_path, inids)
+    x_test = extract_image_dataset(test_images, test_dataset, 'x_test')
+    y_train = np.array([inid_mapping[inid] for inid in train_target], dtype=np.int32)
+    y_test = np.array([inid_mapping[inid] for inid in test_target], dtype=np.int32)
     return x_train, x_test, y_train, y_test
 
-def build_class_morph_features_df(ontology: Graph)->DataFrame:
-    """Build a DataFrame containing all of the morphological features per animal class and the ImageNet ID of the animal
+def get_inid_mapping(inids:list[str])->dict[str, int]:
+    """Get the integer code of each ImageNet ID, used as target of the image datasets
+
+    Args:
+        inids (list[str]): ImageNet IDs
+
+    Returns:
+        dict[str, int]: Code of each ImageNet ID, which is its index in the list
+    """
+    return {str(inid): i for i, inid in enumerate(inids)}
+
+def build_class_morph_features_matrix(ontology: Graph)->tuple[csr_matrix, list[str], list[str]]:
+    """Build a sparse boolean matrix of the morphological features per animal class in a single pass over the
+        ac:hasMorphFeature triples. Classes and features get an integer id: their row and column in the matrix
 
     Args:
         ontology (Graph): Ontology to fetch the features and the animal classes into
 
     Returns:
-        DataFrame: DataFrame with one column per morphological feature and one column for the ImageNet ID named 'inid'.
-            There is one row per class containing a ac:inid property in the ontology
+        tuple[csr_matrix, list[str], list[str]]: Boolean CSR matrix of shape (nb classes, nb features), 
+            ImageNet ID of each row and name of each column. There is one row per ac:inid property in the ontology, 
+            and one column per ac:MorphFeature
     """
     ac = Namespace(ONTOLOGY_IRI)
-    morph_features = [feature for feature, _, _ in ontology.triples((None, RDF.type, ac.MorphFeature))]
-    all_animal_features = []
+    feature_ids = {}
+    for feature, _, _ in ontology.triples((None, RDF.type, ac.MorphFeature)):
+        feature_ids.setdefault(feature, len(feature_ids))
+    class_rows = {}
+    inids = []
     for animal_class, _, inid in ontology.triples((None, ac.inid, None)):
-        animal_row = { 'inid' : str(inid) }
-        animal_features = [feature for _, _, feature in ontology.triples((animal_class, ac.hasMorphFeature, None))]
-        for feature in morph_features:
-            animal_row[feature.replace(ONTOLOGY_IRI, '')] = (feature in animal_features)
-        all_animal_features.append(animal_row)
-    return DataFrame(all_animal_features)
+        class_rows.setdefault(animal_class, []).append(len(inids))
+        inids.append(str(inid))
+    rows = []
+    columns = []
+    for animal_class, _, feature in ontology.triples((None, ac.hasMorphFeature, None)):
+        if animal_class in class_rows and feature in feature_ids:
+            for row in class_rows[animal_class]:
+                rows.append(row)
+                columns.append(feature_ids[feature])
+    # Duplicated entries are summed by the constructor, which keeps them True as the matrix is boolean
+    matrix = csr_matrix((np.ones(len(rows), dtype=bool), (rows, columns)), shape=(len(inids), len(feature_ids)), dtype=bool)
+    features = [feature.replace(ONTOLOGY_IRI, '') for feature in feature_ids]
+    return matrix, inids, features
 
-def extract_image_features(image_path:str):
-    """Extract an array of features from an image
+def build_class_tree(ontology: Graph, inid_mapping:dict[str, int])->tuple[dict[object, list], object]:
+    """Build the tree of the animal classes from the rdfs:subClassOf properties, with the class codes as leaves.
+        The code of a class is a child of its class node, so classes having subclasses are leaves as well.
+        Used by animal_classifiers.HierarchicalClassifier
 
     Args:
-        image_path (str): Path of the image to get the features of
+        ontology (Graph): Ontology with the structure initialized
+        inid_mapping (dict[str, int]): Code of each ImageNet ID (see get_inid_mapping)
 
     Returns:
-        ndarray: array of shape(512, ) containing the features of the image
+        tuple[dict[object, list], object]: Children of each class node, and root of the tree. 
+            If the classes have several roots, the root is an added 'root' node
     """
-    image = cv2.imread(image_path)
-    hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    hist = cv2.calcHist([hsv_image], [0, 1, 2], None, [8, 8, 8], [0, 256, 0, 256, 0, 256])
-    hist = cv2.normalize(hist, hist).flatten()
-    return hist
+    ac = Namespace(ONTOLOGY_IRI)
+    tree = {}
+    children_nodes = set()
+    for child, _, parent in ontology.triples((None, RDFS.subClassOf, None)):
+        tree.setdefault(parent, []).append(child)
+        children_nodes.add(child)
+    for animal_class, _, inid in ontology.triples((None, ac.inid, None)):
+        if str(inid) in inid_mapping:
+            tree.setdefault(animal_class, []).append(inid_mapping[str(inid)])
+    for node in tree:
+        tree[node].sort(key=str)
+    roots = sorted([node for node in tree if node not in children_nodes], key=str)
+    if len(roots) == 1:
+        return tree, roots[0]
+    tree['root'] = roots
+    return tree, 'root'
 
-def predict_all_columns_df(x_to_predict:DataFrame,
-                           x_train:DataFrame, y_train:Series, 
-                           x_from_predict:DataFrame, y_from_predict:Series, 
-                           classifier:BaseEstimator=None)->DataFrame:
+def build_class_morph_features_df(ontology: Graph)->DataFrame:
+    """Build a DataFrame containing all of the morphological features per animal class and the ImageNet ID of the animal.
+        It is a dense view of build_class_morph_features_matrix
+
+    Args:
+        ontology (Graph): Ontology to fetch the features and the animal classes into
+
+    Returns:
+        DataFrame: DataFrame with one column per morphological feature and one column for the ImageNet ID named 'inid'.
+            There is one row per class containing a ac:inid property in the ontology
+    """
+    matrix, inids, features = build_class_morph_features_matrix(ontology)
+    morph_features_df = DataFrame(matrix.toarray(), columns=features)
+    morph_features_df.insert(0, 'inid', inids)
+    return morph_features_df
+
+def predict_all_columns_df(x_to_predict:np.ndarray,
+                           x_train:np.ndarray, y_train:np.ndarray, 
+                           x_from_predict:DataFrame, y_from_predict:np.ndarray, 
+                           classifier:BaseEstimator=None,
+                           engine:str=SEQUENTIAL_ENGINE,
+                           n_jobs:int=-1,
+                           max_images_per_class:int=None,
+                           max_images_per_value:int=None,
+                           sampling_seed:int=SAMPLING_SEED,
+                           batch_size:int=STREAMING_BATCH_SIZE,
+                           epochs:int=STREAMING_EPOCHS,
+                           return_models:bool=False)->DataFrame|tuple[DataFrame, dict]:
     """Create a Dataframe by predicting all the columns of another dataset ('from' dataset).
     Each prediction is made from a model trained by the features of a dataset and its target 
     mapped to a column of the 'from' dataset according to the 'from' target
     Target of the 'from' dataset and the training target has to have similar values
+    Columns with the same values for all the training classes share one model, and constant columns aren't trained
 
     Args:
-        x_to_predict (DataFrame): used to predict each column of the generated DataFrame
-        x_train (DataFrame): Features used for training the model predicting each column 
-        y_train (Series): Target to be mapped by y_from_predict to generate the training Target.
+        x_to_predict (np.ndarray): used to predict each column of the generated DataFrame
+        x_train (np.ndarray): Features used for training the model predicting each column 
+        y_train (np.ndarray): Target to be mapped by y_from_predict to generate the training Target.
             All of the distinct values must be included in y_from_predict.
         x_from_predict (DataFrame): Dataframe containing all the columns to predict into the new Dataframe.
             Each column is mapped to y_train using y_from_predict and used as the target of the training model
-        y_from_predict (Series): Target of the Dataframe to predict the columns of
+        y_from_predict (np.ndarray): Target of the Dataframe to predict the columns of
         classifier (BaseEstimator, optional): Classifier to use to generate the prediction. Defaults to None.
+        engine (str, optional): Training engine of the models:
+            SEQUENTIAL_ENGINE fits one model per pattern, one after the other,
+            MULTILABEL_ENGINE fits a single multi-label model on all the boolean patterns at once,
+            PARALLEL_ENGINE fits one model per pattern in parallel processes, sharing the training matrix by memory mapping,
+            STREAMING_ENGINE fits all the models with partial_fit on shuffled mini-batches of the training matrix, 
+            so that only one batch is in memory at once (see fit_predict_streaming). 
+            Defaults to SEQUENTIAL_ENGINE.
+        n_jobs (int, optional): Number of processes of the PARALLEL_ENGINE. -1 means one per core. Defaults to -1.
+        max_images_per_class (int, optional): Maximum number of training images of each class per model (see sample_balanced_rows).
+            If None, all the images of the class are used. Defaults to None.
+        max_images_per_value (int, optional): Maximum number of training images of each target value per model, 
+            shared evenly between the classes having this value. Ignored by the MULTILABEL_ENGINE.
+            If None, all the images are used. Defaults to None.
+        sampling_seed (int, optional): Seed of the random selection of the training images 
+            and of the order of the mini-batches. Defaults to SAMPLING_SEED.
+        batch_size (int, optional): Number of images per mini-batch of the STREAMING_ENGINE. Defaults to STREAMING_BATCH_SIZE.
+        epochs (int, optional): Number of passes over the training images of the STREAMING_ENGINE. Defaults to STREAMING_EPOCHS.
+        return_models (bool, optional): if true, the fitted models are returned with the prediction, 
+            to predict other datasets with predict_columns. Defaults to False.
 
     Raises:
         ValueError: If the target "y_train" contains a value which is not in the "y_from_predict" target
+        ValueError: If the engine isn't a recognized engine
+        ValueError: If the engine is STREAMING_ENGINE and the classifier has no partial_fit method
 
     Returns:
-        DataFrame: Prediction of every column of x_from_predict applied to every row of x_to_predict
+        DataFrame|tuple[DataFrame, dict]: Prediction of every column of x_from_predict applied to every row of x_to_predict,
+            and if return_models is true, the fitted models: a dict with the list of the columns ('columns'), 
+            the value of each constant column ('constant_columns'), the columns of each pattern ('patterns_columns'),
+            and the model of each pattern ('models', a single multi-label model if 'multilabel' is true)
     """
-    from_uniques = y_from_predict.unique()
-    for train_val in y_train.unique():
-        if train_val not in from_uniques:
-            raise ValueError('Target "y_train" contains a value ('+train_val+') which is not in the "y_from_predict" target')
+    if engine not in ENGINES:
+        raise ValueError('Engine "'+engine+'" is not a recognized engine ('+', '.join(ENGINES)+')')
+    train_rows = map_target_to_rows(y_train, y_from_predict)
     if not classifier:
-        classifier = MLPClassifier(max_iter=1000, solver='lbfgs', alpha=1e-5)
-    predicted_df = DataFrame()
-    progress_bar = tqdm(x_from_predict.columns)
-    for column in progress_bar:
-        progress_bar.set_description('Predicting "'+column+'"')
-        mapping_dict = dict(zip(y_from_predict, x_from_predict[column]))
-        y_to_predict_train = y_train.map(mapping_dict)
-        classifier.fit(x_train, y_to_predict_train)
-        column_prediction = classifier.predict(x_to_predict)
-        predicted_df[column] = column_prediction
-
-    return predicted_df 
+        if engine == STREAMING_ENGINE:
+            classifier = MLPClassifier(solver='adam', alpha=1e-5)
+        else:
+            classifier = MLPClassifier(max_iter=1000, solver='lbfgs', alpha=1e-5)
+    if engine == STREAMING_ENGINE and not hasattr(classifier, 'partial_fit'):
+        raise ValueError('Classifier '+type(classifier).__name__+' has no partial_fit method, it can\'t be used by the streaming engine')
+    class_rows, train_class_index = np.unique(train_rows, return_inverse=True)
+    constant_columns, patterns = group_columns_by_pattern(x_from_predict, class_rows)
+    print(str(len(x_from_predict.columns))+' columns to predict: '+str(len(constant_columns))+' constant, '+
+          str(len(patterns))+' distinct patterns to train')
+
+    sampling = max_images_per_class is not None or max_images_per_value is not None
+    if sampling:
+        class_ranks = get_class_ranks(train_class_index, sampling_seed)
+    if engine == MULTILABEL_ENGINE and len(patterns) > 1 and all(pattern.dtype == bool for pattern, _ in patterns):
+        rows = sample_balanced_rows(train_class_index, class_ranks, max_images_per_class) if sampling else slice(None)
+        targets = np.column_stack([pattern[train_class_index[rows]] for pattern, _ in patterns])
+        models = classifier.fit(x_train[rows], targets)
+        patterns_prediction = list(np.asarray(classifier.predict(x_to_predict), dtype=bool).T)
+    else:
+        class_patterns = [pattern for pattern, _ in patterns]
+        # Sampling is applied through the rank of each image in its class and a cap per class and pattern,
+        # so that no row selection of the size of the training images is kept per pattern
+        classes_caps = [get_class_caps(len(class_rows), max_images_per_class, max_images_per_value, pattern) if sampling else None
+                        for pattern in class_patterns]
+        if sampling:
+            class_counts = np.bincount(train_class_index, minlength=len(class_rows))
+            nb_samples = sum(np.minimum(class_counts, class_caps).sum() for class_caps in classes_caps)
+            print('Training images per model: {:.0f} on average out of {}'.format(nb_samples/max(len(patterns), 1), len(x_train)))
+
+        def get_sample(pattern:np.ndarray, class_caps:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+            rows = np.flatnonzero(class_ranks < class_caps[train_class_index]) if sampling else slice(None)
+            return rows, pattern[train_class_index[rows]]
+
+        if engine == STREAMING_ENGINE:
+            models = [clone(classifier) for _ in patterns]
+            patterns_prediction = fit_predict_streaming(models, x_train, train_class_index, class_patterns, x_to_predict, 
+                                                        batch_size, epochs, sampling_seed,
+                                                        class_ranks if sampling else None, classes_caps)
+        elif engine == PARALLEL_ENGINE:
+            fitted = Parallel(n_jobs=n_jobs, mmap_mode='r', verbose=5)(
+                delayed(fit_predict)(clone(classifier), x_train[rows], target, x_to_predict) 
+                for rows, target in (get_sample(pattern, caps) for pattern, caps in zip(class_patterns, classes_caps)))
+            models = [model for model, _ in fitted]
+            patterns_prediction = [prediction for _, prediction in fitted]
+        else:
+            if engine == MULTILABEL_ENGINE and len(patterns) > 1:
+                print('Warning : non boolean columns can\'t be predicted by a multi-label model, models are trained sequentially')
+            models = []
+            patterns_prediction = []
+            progress_bar = tqdm(zip(patterns, classes_caps), total=len(patterns))
+            for (pattern, columns), class_caps in progress_bar:
+                progress_bar.set_description('Predicting "'+columns[0][0]+'" ('+str(len(columns))+' columns)')
+                rows, target = get_sample(pattern, class_caps)
+                model, prediction = fit_predict(clone(classifier), x_train[rows], target, x_to_predict)
+                models.append(model)
+                patterns_prediction.append(prediction)
+
+    columns_models = {
+        'columns': list(x_from_predict.columns),
+        'constant_columns': constant_columns,
+        'patterns_columns': [columns for _, columns in patterns],
+        'multilabel': not isinstance(models, list),
+        'models': models
+    }
+    prediction_df = assemble_columns_prediction(columns_models, patterns_prediction, len(x_to_predict))
+    if return_models:
+        return prediction_df, columns_models
+    return prediction_df
+
+def predict_columns(columns_models:dict, x_to_predict:np.ndarray, batch_size:int=STREAMING_BATCH_SIZE)->DataFrame:
+    """Predict all the columns of a DataFrame with models fitted by predict_all_columns_df
+
+    Args:
+        columns_models (dict): Fitted models returned by predict_all_columns_df with return_models=True
+        x_to_predict (np.ndarray): Features to predict the columns of
+        batch_size (int, optional): Number of rows predicted at once. Defaults to STREAMING_BATCH_SIZE.
+
+    Returns:
+        DataFrame: Prediction of every column applied to every row of x_to_predict
+    """
+    models = columns_models['models']
+    patterns_prediction = [[] for _ in columns_models['patterns_columns']]
+    for start in range(0, len(x_to_predict), batch_size):
+        x_batch = np.asarray(x_to_predict[start:start+batch_size])
+        if columns_models['multilabel']:
+            batch_prediction = list(np.asarray(models.predict(x_batch), dtype=bool).T)
+        else:
+            batch_prediction = [model.predict(x_batch) for model in models]
+        for pattern_prediction, prediction in zip(patterns_prediction, batch_prediction):
+            pattern_prediction.append(prediction)
+    patterns_prediction = [np.concatenate(prediction) if prediction else np.empty(0) for prediction in patterns_prediction]
+    return assemble_columns_prediction(columns_models, patterns_prediction, len(x_to_predict))
+
+def assemble_columns_prediction(columns_models:dict, patterns_prediction:list[np.ndarray], nb_rows:int)->DataFrame:
+    """Build the DataFrame of predicted columns from the prediction of each pattern of columns
+
+    Args:
+        columns_models (dict): Models of the columns (see predict_all_columns_df)
+        patterns_prediction (list[np.ndarray]): Prediction of each pattern
+        nb_rows (int): Number of predicted rows
+
+    Returns:
+        DataFrame: Prediction of every column, in the original column order
+    """
+    predictions = {}
+    for column, value in columns_models['constant_columns'].items():
+        predictions[column] = np.full(nb_rows, value)
+    for columns, pattern_prediction in zip(columns_models['patterns_columns'], patterns_prediction):
+        for column, inverted in columns:
+            predictions[column] = np.logical_not(pattern_prediction) if inverted else pattern_prediction
+    return DataFrame(predictions, columns=columns_models['columns'])
+
+def fit_predict(classifier:BaseEstimator, x_train:np.ndarray, y_train:np.ndarray, 
+                x_to_predict:np.ndarray)->tuple[BaseEstimator, np.ndarray]:
+    """Fit a classifier and predict a dataset with it
+
+    Args:
+        classifier (BaseEstimator): Classifier to fit
+        x_train (np.ndarray): Training features
+        y_train (np.ndarray): Training target
+        x_to_predict (np.ndarray): Features to predict the target of
+
+    Returns:
+        tuple[BaseEstimator, np.ndarray]: Fitted classifier and prediction of the target of x_to_predict
+    """
+    classifier.fit(x_train, y_train)
+    return classifier, classifier.predict(x_to_predict)
+
+def fit_predict_streaming(classifiers:list[BaseEstimator], x_train:np.ndarray, class_index:np.ndarray, 
+                          class_targets:list[np.ndarray], x_to_predict:np.ndarray, batch_size:int=STREAMING_BATCH_SIZE, 
+                          epochs:int=STREAMING_EPOCHS, seed:int=SAMPLING_SEED, class_ranks:np.ndarray=None, 
+                          classes_caps:list[np.ndarray]=None)->list[np.ndarray]:
+    """Fit classifiers out-of-core, by calling partial_fit on shuffled mini-batches of the training features.
+        Each mini-batch is read once (ex: from a memory-mapped array) and fed to every classifier, 
+        so the memory used only depends on the batch size and not on the number of training images.
+        The targets and the sampling of the classifiers are given per class, and mapped to the images of each batch.
+        The prediction is made batch by batch as well
+
+    Args:
+        classifiers (list[BaseEstimator]): Classifiers to fit, supporting partial_fit (ex: SGDClassifier, MLPClassifier)
+        x_train (np.ndarray): Training features
+        class_index (np.ndarray): Class of each training image
+        class_targets (list[np.ndarray]): For each classifier, the target of each class
+        x_to_predict (np.ndarray): Features to predict the target of
+        batch_size (int, optional): Number of training images per mini-batch. Defaults to STREAMING_BATCH_SIZE.
+        epochs (int, optional): Number of passes over the training images. Defaults to STREAMING_EPOCHS.
+        seed (int, optional): Seed of the order of the mini-batches. Defaults to SAMPLING_SEED.
+        class_ranks (np.ndarray, optional): Rank of each image in its class (see get_class_ranks), 
+            required by classes_caps. Defaults to None.
+        classes_caps (list[np.ndarray], optional): For each classifier, the maximum number of images of each class 
+            (see get_class_caps), or None to train it on all the images. If None, all the classifiers are trained 
+            on all the images. Defaults to None.
+
+    Returns:
+        list[np.ndarray]: Prediction of each classifier on x_to_predict
+    """
+    nb_rows = len(x_train)
+    if classes_caps is None:
+        classes_caps = [None] * len(classifiers)
+    classes = [np.unique(class_target) for class_target in class_targets]
+
+    rng = np.random.default_rng(seed)
+    with tqdm(total=epochs*nb_rows, desc='Streaming training') as progress_bar:
+        for _ in range(epochs):
+            order = rng.permutation(nb_rows)
+            for start in range(0, nb_rows, batch_size):
+                # Sorted rows are read sequentially from a memory-mapped array
+                batch_rows = np.sort(order[start:start+batch_size])
+                x_batch = np.asarray(x_train[batch_rows])
+                batch_classes = class_index[batch_rows]
+                for classifier, class_target, class_caps, model_classes in zip(classifiers, class_targets, classes_caps, classes):
+                    if class_caps is None:
+                        classifier.partial_fit(x_batch, class_target[batch_classes], classes=model_classes)
+                        continue
+                    selection = class_ranks[batch_rows] < class_caps[batch_classes]
+                    if selection.any():
+                        classifier.partial_fit(x_batch[selection], class_target[batch_classes[selection]], classes=model_classes)
+                progress_bar.update(len(batch_rows))
+
+    predictions = [[] for _ in classifiers]
+    for start in range(0, len(x_to_predict), batch_size):
+        x_batch = np.asarray(x_to_predict[start:start+batch_size])
+        for classifier, prediction in zip(classifiers, predictions):
+            prediction.append(classifier.predict(x_batch))
+    return [np.concatenate(prediction) if prediction else np.empty(0) for prediction in predictions]
+
+def get_class_ranks(class_index:np.ndarray, seed:int=SAMPLING_SEED)->np.ndarray:
+    """Rank the images of each class in a random order. Selecting the images of rank lower than n 
+        selects n random images of the class, and the selections are nested when n grows
+
+    Args:
+        class_index (np.ndarray): Class of each image
+        seed (int, optional): Seed of the random order. Defaults to SAMPLING_SEED.
+
+    Returns:
+        np.ndarray: Rank of each image in its class
+    """
+    order = np.random.default_rng(seed).permutation(len(class_index))
+    order = order[np.argsort(class_index[order], kind='stable')]
+    sorted_classes = class_index[order]
+    class_starts = np.flatnonzero(np.r_[True, sorted_classes[1:] != sorted_classes[:-1]])
+    class_sizes = np.diff(np.r_[class_starts, len(order)])
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - np.repeat(class_starts, class_sizes)
+    return ranks
+
+def get_class_caps(nb_classes:int, max_images_per_class:int=None, max_images_per_value:int=None, 
+                   class_target:np.ndarray=None)->np.ndarray:
+    """Compute the maximum number of training images of each class of a model.
+        As the target of an image only depends on its class, the max_images_per_value images of a target value 
+        are shared evenly between the classes having this value (at least one image per class)
+
+    Args:
+        nb_classes (int): Number of classes
+        max_images_per_class (int, optional): Maximum number of images per class. Defaults to None.
+        max_images_per_value (int, optional): Maximum number of images per target value. Defaults to None.
+        class_target (np.ndarray, optional): Target value of each class, required by max_images_per_value. Defaults to None.
+
+    Returns:
+        np.ndarray: Maximum number of images of each class
+    """
+    class_caps = np.full(nb_classes, np.iinfo(np.int64).max, dtype=np.int64)
+    if max_images_per_class is not None:
+        class_caps[:] = max_images_per_class
+    if max_images_per_value is not None:
+        _, value_index, value_counts = np.unique(class_target, return_inverse=True, return_counts=True)
+        class_caps = np.minimum(class_caps, np.maximum(max_images_per_value // value_counts[value_index], 1))
+    return class_caps
+
+def sample_balanced_rows(class_index:np.ndarray, class_ranks:np.ndarray, max_images_per_class:int=None,
+                         max_images_per_value:int=None, class_target:np.ndarray=None)->np.ndarray:
+    """Select the training images of a model, with at most max_images_per_class images of each class
+        and max_images_per_value images of each target value (see get_class_caps)
+
+    Args:
+        class_index (np.ndarray): Class of each image
+        class_ranks (np.ndarray): Rank of each image in its class (see get_class_ranks)
+        max_images_per_class (int, optional): Maximum number of images per class. Defaults to None.
+        max_images_per_value (int, optional): Maximum number of images per target value. Defaults to None.
+        class_target (np.ndarray, optional): Target value of each class, required by max_images_per_value. Defaults to None.
+
+    Returns:
+        np.ndarray: Sorted rows of the selected images
+    """
+    nb_classes = class_index.max() + 1 if len(class_index) else 0
+    class_caps = get_class_caps(nb_classes, max_images_per_class, max_images_per_value, class_target)
+    return np.flatnonzero(class_ranks < class_caps[class_index])
+
+def group_columns_by_pattern(x_from_predict:DataFrame, class_rows:np.ndarray
+                             )->tuple[dict[str, object], list[tuple[np.ndarray, list[tuple[str, bool]]]]]:
+    """Group the columns of the 'from' dataset by their values on a selection of rows (the classes of the training images).
+        Columns having the same values on these rows produce the same training target, so they only need one model.
+        Boolean columns which are the negation of each other also share their model, the prediction being inverted.
+
+    Args:
+        x_from_predict (DataFrame): Dataframe containing the columns to group
+        class_rows (np.ndarray): Rows of x_from_predict to compare the columns on
+
+    Raises:
+        ValueError: If no row is selected (ex: no training image, or no training image of a class of x_from_predict)
+
+    Returns:
+        tuple[dict[str, object], list[tuple[np.ndarray, list[tuple[str, bool]]]]]: 
+            Value of each constant column, and list of distinct patterns with the columns sharing them.
+            Each column of a pattern is in format (column name, inverted)
+    """
+    if len(class_rows) == 0:
+        raise ValueError('No training image belongs to a class of the \'from\' dataset, the columns can\'t be trained '
+                         '(check the training split and the ImageNet IDs of the images)')
+    constant_columns = {}
+    patterns = {}
+    for column in x_from_predict.columns:
+        values = x_from_predict[column].to_numpy()[class_rows]
+        if (values == values[0]).all():
+            constant_columns[column] = values[0]
+            continue
+        inverted = values.dtype == bool and bool(values[0])
+        pattern = np.logical_not(values) if inverted else values
+        key = (pattern.dtype.str, pattern.tobytes()) if pattern.dtype != object else tuple(pattern)
+        if key not in patterns:
+            patterns[key] = (pattern, [])
+        patterns[key][1].append((column, inverted))
+    return constant_columns, list(patterns.values())
+
+def map_target_to_rows(y_train:np.ndarray, y_from_predict:np.ndarray)->np.ndarray:
+    """Map each value of a target to the row of the 'from' dataset having this value as target
+
+    Args:
+        y_train (np.ndarray): Target to map
+        y_from_predict (np.ndarray): Target of the 'from' dataset
+
+    Raises:
+        ValueError: If the target "y_train" contains a value which is not in the "y_from_predict" target
+
+    Returns:
+        np.ndarray: Row of y_from_predict of each value of y_train
+    """
+    y_from_predict = np.asarray(y_from_predict)
+    from_rows = {value: row for row, value in enumerate(y_from_predict)}
+    train_uniques, train_inverse = np.unique(np.asarray(y_train), return_inverse=True)
+    for train_val in train_uniques:
+        if train_val not in from_rows:
+            raise ValueError('Target "y_train" contains a value ('+str(train_val)+') which is not in the "y_from_predict" target')
+    return np.array([from_rows[value] for value in train_uniques], dtype=np.int64)[train_inverse]
@@ -1,6 +1,8 @@
 from tqdm import tqdm
-from zipfile import ZipFile
-from shutil import rmtree
+from zipfile import ZipFile, ZipInfo
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
+from threading import Lock
 import os
 from Tools.sparql_tools import WD_ENTITY_URI
 from animal_graph import get_graph_arcs, get_animal_mapping, GRAPH_ARCS_PATH
@@ -8,12 +10,13 @@ from synset_mapper import FULL_MAPPING_PATH
 from rdflib import Graph, Namespace, Literal, URIRef
 from rdflib.namespace import RDFS, RDF, XSD, FOAF
 from rdflib.term import Node, BNode
+from image_dataset import (ImageDataset, DirectoryImageDataset, index_zip_members, image_id_to_inid, parse_annotation,
+                           ZIP_FILE_PATH, ZIP_ANNOT_PATH, ZIP_IMAGES_PATH, IMAGE_FILE_EXT, ANNOT_FILE_EXT)
+from csv import reader, writer
+from pipeline_telemetry import PipelineTelemetry, measure_stage
+from hashlib import blake2b
 import json
-import xmltodict
-from tqdm import tqdm
-import random
 
-ZIP_FILE_PATH       = 'imagenet-object-localization-challenge.zip'
 IMAGES_PATH         = 'Data/Images/'
 ANNOT_PATH          = 'Data/Annotations/' 
 TEST_DIR            = 'Test/'
@@ -28,63 +31,114 @@ MORPH_FEATURES_PATH = 'Data/KaggleChallenge/animal_features.json'
 SCHEMA_IRI          = 'http://schema.org/'
 ONTOLOGY_IRI        = 'http://www.semanticweb.org/youri/ontologies/2023/5/animal-challenge/'
 ANIMAL_LABEL        = 'Animal'
-IMAGE_FILE_EXT      = '.JPEG'
-ANNOT_FILE_EXT      = '.xml'
+UNZIP_WORKERS       = 4
+UNZIP_CHUNK_SIZE    = 1024*1024
+SPLIT_MANIFEST_PATH = 'Data/split_manifest.csv'
+TRAIN_SPLIT         = 'train'
+TEST_SPLIT          = 'test'
+VERBOSE_SCHEMA      = 'verbose'
+COMPACT_SCHEMA      = 'compact'
+POPULATION_MANIFEST_SUFFIX = '_population_manifest.json'
+DELTA_FILE_SUFFIX   = '_delta.nt'
 
 def create_ontology(output_file_path:str=ONTOLOGY_FILE_PATH,
                     structure_output_file_path:str=ONTOLOGY_STRUCTURE_FILE_PATH,
                     graph_file_path:str=GRAPH_ARCS_PATH,
                     morph_features_file_path:str=MORPH_FEATURES_PATH,
                     mapping_file_path:str=FULL_MAPPING_PATH,
-                    master_node_label:str=ANIMAL_LABEL)->Graph:
-    """User interface to create the ontology. it is saved in Turtle format in an output file 
+                    master_node_label:str=ANIMAL_LABEL,
+                    split_manifest_path:str=SPLIT_MANIFEST_PATH,
+                    telemetry:PipelineTelemetry=None,
+                    populate:bool=False,
+                    zip_file_path:str=None,
+                    test_rate:float=None)->Graph:
+    """Create the ontology structure, and optionally populate it. Both are saved in Turtle format in output files 
 
     Args:
         output_file_path (str, optional): Path to store the ontology file at. Defaults to ONTOLOGY_FILE_PATH.
         graph_file_path (str, optional): Path of the csv file containing the graph arcs. Defaults to GRAPH_ARCS_PATH.
         morph_features_file_path (str, optional): Path of the json file containing the features per animal class. Defaults to MORPH_FEATURES_PATH.
         master_node_label (str, optional): Label of the master node of the ontology. Defaults to 'Animal'.
+        split_manifest_path (str, optional): Path of the train/test split manifest. Defaults to SPLIT_MANIFEST_PATH.
+        telemetry (PipelineTelemetry, optional): If set, the structure, unzip, split and populate stages are measured 
+            in this telemetry. Defaults to None.
+        populate (bool, optional): if true, the ontology is populated with the training images (5 minutes per 100 animal classes)
+            and saved at output_file_path. Defaults to False.
+        zip_file_path (str, optional): If set, the images and annotations of the classes are first extracted from this 
+            Kaggle Challenge zip file (see unzip_images_annotations_files). Defaults to None.
+        test_rate (float, optional): If set, the images are first split into a training and a testing datasets 
+            with this rate (0<rate<1), and the split manifest is written. Otherwise, the existing manifest is used. 
+            Defaults to None.
+
+    Raises:
+        ValueError: If the ontology is populated without test_rate and the split manifest doesn't exist
 
     Returns:
         Graph: Created ontology
     """
+    if populate and test_rate is None and not os.path.exists(split_manifest_path):
+        raise ValueError('Split manifest "'+split_manifest_path+'" not found\n'+
+                         'Set test_rate to split the images, and zip_file_path to extract them from the challenge zip file first')
+    ac = Namespace(ONTOLOGY_IRI)
     print('Initializing the structure...', end='')
-    ontology = initialize_ontology_structure(graph_file_path, morph_features_file_path, mapping_file_path, master_node_label)
+    with measure_stage(telemetry, 'structure') as stage:
+        ontology = initialize_ontology_structure(graph_file_path, morph_features_file_path, mapping_file_path, master_node_label)
+        ontology.serialize(structure_output_file_path)
+        stage['items'] = len(list(ontology.triples((None, ac.inid, None))))
     print('Done')
-    ontology.serialize(structure_output_file_path)
     print('Structure ontology saved to file "'+structure_output_file_path+'"')
-    populate = input('Populate the ontology (5 minutes per 100 animal classes)? (y/N)')
-    if populate == 'y':
-        splitted = input('Have you splitted the Images/Annotations files into train and test ? (y/N)')
-        if splitted != 'y':
-            unzipped = input('Have you unzipped the challenge images zip file ? (y/N)')
-            if unzipped != 'y':  
-                downloaded = input('Have you downloaded the challenge images zip file ? (y/N)')
-                if downloaded != 'y':
-                    print('Ontology can not be populated without the challenge zip file, please download it before going any further')
-                    print('\nTo download the zip file containing the animal_images :')
-                    print('\t1) Go to https://www.kaggle.com/competitions/imagenet-object-localization-challenge/rules and accept the rules')
-                    print('\t2) Go to https://www.kaggle.com/settings/account and generate an API token')
-                    print('\t3) Place the generated kaggle.json file in this diectory')
-                    print('\t4) execute this command : kaggle competitions download -c imagenet-object-localization-challenge')
-                    return ontology
-                zip_file_path = input(f'Zip file path (default: {ZIP_FILE_PATH}) : ')
-                if zip_file_path == 'default':
-                    zip_file_path = ZIP_FILE_PATH
-                ac = Namespace(ONTOLOGY_IRI)
-                ontology_inids = [inid for _, _, inid in ontology.triples((None, ac.inid, None))]
-                print('Unzipping images and annotations...')
-                unzip_images_annotations_files(ontology_inids, zip_file_path)
-
-            rate = input('Test splitting rate (0<rate<1): ')            
-            print('Splitting files into train and test')
-            train_test_split(float(rate))
-
-        print('Populating the ontology...')
-        ontology = populate_ontology(ontology)
+    if populate:
+        ontology = populate_ontology_file(ontology, output_file_path, split_manifest_path, zip_file_path, test_rate, 
+                                          telemetry=telemetry)
+    return ontology
+
+def populate_ontology_file(ontology:Graph, output_file_path:str=ONTOLOGY_FILE_PATH, 
+                           split_manifest_path:str=SPLIT_MANIFEST_PATH, zip_file_path:str=None, test_rate:float=None,
+                           population_schema:str=VERBOSE_SCHEMA, telemetry:PipelineTelemetry=None)->Graph:
+    """Populate an ontology structure with the training images and save it in Turtle format.
+        The images can first be extracted from the challenge zip file and split into a training and a testing datasets
+
+    Args:
+        ontology (Graph): Ontology with the structure initialized
+        output_file_path (str, optional): Path to store the populated ontology file at. Defaults to ONTOLOGY_FILE_PATH.
+        split_manifest_path (str, optional): Path of the train/test split manifest. Defaults to SPLIT_MANIFEST_PATH.
+        zip_file_path (str, optional): If set, the images and annotations of the classes are first extracted from this 
+            Kaggle Challenge zip file (see unzip_images_annotations_files). Defaults to None.
+        test_rate (float, optional): If set, the images are first split with this rate (see create_split_manifest). 
+            Otherwise, the existing manifest is used. Defaults to None.
+        population_schema (str, optional): Schema of the instances (see populate_ontology). Defaults to VERBOSE_SCHEMA.
+        telemetry (PipelineTelemetry, optional): If set, the unzip, split and populate stages are measured 
+            in this telemetry. Defaults to None.
+
+    Raises:
+        ValueError: If test_rate isn't set and the split manifest doesn't exist
+
+    Returns:
+        Graph: Populated ontology
+    """
+    if test_rate is None and not os.path.exists(split_manifest_path):
+        raise ValueError('Split manifest "'+split_manifest_path+'" not found\n'+
+                         'Set test_rate to split the images, and zip_file_path to extract them from the challenge zip file first')
+    ac = Namespace(ONTOLOGY_IRI)
+    if zip_file_path:
+        ontology_inids = [inid for _, _, inid in ontology.triples((None, ac.inid, None))]
+        print('Unzipping images and annotations...')
+        with measure_stage(telemetry, 'unzip', len(ontology_inids)):
+            unzip_images_annotations_files(ontology_inids, zip_file_path)
+    if test_rate is not None:
+        print('Splitting files into train and test')
+        with measure_stage(telemetry, 'split') as stage:
+            stage['items'] = len(create_split_manifest(test_rate, manifest_path=split_manifest_path))
+
+    print('Populating the ontology...')
+    with measure_stage(telemetry, 'populate') as stage:
+        ontology = populate_ontology(ontology, IMAGES_PATH, ANNOT_PATH, split_manifest_path=split_manifest_path,
+                                     population_schema=population_schema)
         print('Saving the ontology to file "'+output_file_path+'"...', end='')
         ontology.serialize(output_file_path)
-        print('Done')
+        reset_ontology_population(output_file_path)
+        stage['items'] = len(set(ontology.subjects(RDF.type, Namespace(SCHEMA_IRI).ImageObject)))
+    print('Done')
     return ontology
 
 def initialize_ontology_structure(graph_file_path:str=GRAPH_ARCS_PATH,
@@ -158,7 +212,117 @@ def get_ontology(ontology_file_path:str=ONTOLOGY_FILE_PATH)->Graph:
         return create_ontology(ontology_file_path)
     ontology = Graph()
     ontology.parse(ontology_file_path)
+    delta_file_path = get_delta_file_path(ontology_file_path)
+    if os.path.exists(delta_file_path):
+        apply_ontology_delta(ontology, delta_file_path)
+    return ontology
+
+def get_delta_file_path(ontology_file_path:str=ONTOLOGY_FILE_PATH)->str:
+    """Get the path of the delta file of an ontology file (ex: animal_ontology.ttl -> animal_ontology_delta.nt)
+
+    Args:
+        ontology_file_path (str, optional): Path of the ontology file. Defaults to ONTOLOGY_FILE_PATH.
+
+    Returns:
+        str: Path of the delta file
+    """
+    return os.path.splitext(ontology_file_path)[0]+DELTA_FILE_SUFFIX
+
+def get_population_manifest_path(ontology_file_path:str=ONTOLOGY_FILE_PATH)->str:
+    """Get the path of the population manifest of an ontology file 
+        (ex: animal_ontology.ttl -> animal_ontology_population_manifest.json)
+
+    Args:
+        ontology_file_path (str, optional): Path of the ontology file. Defaults to ONTOLOGY_FILE_PATH.
+
+    Returns:
+        str: Path of the population manifest
+    """
+    return os.path.splitext(ontology_file_path)[0]+POPULATION_MANIFEST_SUFFIX
+
+def reset_ontology_population(ontology_file_path:str=ONTOLOGY_FILE_PATH):
+    """Delete the delta file and the population manifest of an ontology file. Called when the ontology file is
+        populated again from scratch, so that the delta of the previous population isn't applied to the new file 
+        and the next incremental population starts from the instances of the new file
+
+    Args:
+        ontology_file_path (str, optional): Path of the ontology file. Defaults to ONTOLOGY_FILE_PATH.
+    """
+    for path in [get_delta_file_path(ontology_file_path), get_population_manifest_path(ontology_file_path)]:
+        if os.path.exists(path):
+            os.remove(path)
+
+def append_ontology_delta(delta_file_path:str, added:Graph, removed_subjects:list[URIRef]):
+    """Append the changes of an ontology to its delta file.
+        Each line of the file is either '- <subject>' (remove the subject, its triples and its blank nodes) 
+        or '+ triple' (add a triple in N-Triples format). Lines are applied in order
+
+    Args:
+        delta_file_path (str): Path of the delta file
+        added (Graph): Triples added to the ontology
+        removed_subjects (list[URIRef]): Subjects removed from the ontology. Removals are written before the additions
+    """
+    with open(delta_file_path, 'a', encoding='utf-8') as delta_file:
+        for subject in removed_subjects:
+            delta_file.write('- '+subject.n3()+'\n')
+        for line in added.serialize(format='nt').splitlines():
+            if line.strip():
+                delta_file.write('+ '+line+'\n')
+
+def apply_ontology_delta(ontology:Graph, delta_file_path:str)->Graph:
+    """Apply the changes of a delta file to an ontology
+
+    Args:
+        ontology (Graph): Ontology loaded from the file the delta file refers to
+        delta_file_path (str): Path of the delta file
+
+    Returns:
+        Graph: Updated ontology
+    """
+    added_lines = []
+    def flush_added_lines():
+        if added_lines:
+            ontology.parse(data='\n'.join(added_lines), format='nt')
+            added_lines.clear()
+
+    with open(delta_file_path, encoding='utf-8') as delta_file:
+        for line in delta_file:
+            operation, content = line[:1], line[2:].strip()
+            if operation == '+':
+                added_lines.append(content)
+            elif operation == '-':
+                flush_added_lines()
+                remove_subject(ontology, URIRef(content[1:-1]))
+    flush_added_lines()
+    return ontology
+
+def merge_ontology_delta(ontology_file_path:str=ONTOLOGY_FILE_PATH)->Graph:
+    """Merge the delta file of an ontology into the ontology file, then delete the delta file
+
+    Args:
+        ontology_file_path (str, optional): Path of the ontology file. Defaults to ONTOLOGY_FILE_PATH.
+
+    Returns:
+        Graph: Merged ontology
+    """
+    ontology = get_ontology(ontology_file_path)
+    ontology.serialize(ontology_file_path)
+    delta_file_path = get_delta_file_path(ontology_file_path)
+    if os.path.exists(delta_file_path):
+        os.remove(delta_file_path)
     return ontology
+
+def remove_subject(ontology:Graph, subject:Node):
+    """Remove a subject from an ontology, with all of its triples and the blank nodes it is the only one to reference
+
+    Args:
+        ontology (Graph): Ontology to remove the subject from
+        subject (Node): Subject to remove
+    """
+    for _, _, object in list(ontology.triples((subject, None, None))):
+        if isinstance(object, BNode):
+            remove_subject(ontology, object)
+    ontology.remove((subject, None, None))
     
 def define_properties(ontology:Graph, ns:Namespace)->Graph:
     """Define all the required properties into a ontology
@@ -186,6 +350,22 @@ def define_properties(ontology:Graph, ns:Namespace)->Graph:
 
     return ontology
 
+def define_compact_properties(ontology:Graph, ns:Namespace)->Graph:
+    """Define the properties and datatypes of the compact population schema into an ontology.
+        In this schema, bounding boxes and image sizes are typed literals instead of blank nodes:
+        'xMin yMin xMax yMax' for a bounding box and 'width height' for a size
+
+    Args:
+        ontology (Graph): ontology of the properties
+        ns (Namespace): Namespace to define the properties in
+    """
+    for datatype in ['BoundingBoxLiteral', 'SizeLiteral']:
+        ontology.add((getattr(ns, datatype), RDF.type, RDFS.Datatype))
+    for property, datatype in [('bndBox', ns.BoundingBoxLiteral), ('imageSize', ns.SizeLiteral)]:
+        ontology.add((getattr(ns, property), RDF.type, RDF.Property))
+        ontology.add((getattr(ns, property), RDFS.range, datatype))
+    return ontology
+
 def define_morphological_features(ontology:Graph, morph_features_path=MORPH_FEATURES_PATH)->Graph:
     """Define the morphological features of all the nodes
 
@@ -273,7 +453,9 @@ def get_subclasses_set(ontology:Graph, subclass_node_set:set[URIRef], node:Node)
             subclass_node_set = get_subclasses_set(ontology, subclass_node_set, subject)
     return subclass_node_set
 
-def populate_ontology(ontology:Graph, images_dir_path:str=IMAGES_TRAIN_PATH, annot_dir_path:str=ANNOT_TRAIN_PATH)->Graph: 
+def populate_ontology(ontology:Graph, images_dir_path:str=IMAGES_TRAIN_PATH, annot_dir_path:str=ANNOT_TRAIN_PATH,
+                      dataset:ImageDataset=None, split_manifest_path:str=None,
+                      population_schema:str=VERBOSE_SCHEMA)->Graph: 
     """Populate the ontology with objects from the images of each class
         The link from images to ontology class is made through the Image Net ID
 
@@ -281,50 +463,235 @@ def populate_ontology(ontology:Graph, images_dir_path:str=IMAGES_TRAIN_PATH, ann
         ontology (Graph): Ontology with the structure initialized
         images_dir_path (str, optional): Path of the directory containing the images. Defaults to IMAGES_TRAIN_PATH.
         annot_dir_path (str, optional): Path of the directory containing the annotations. Defaults to ANNOT_TRAIN_PATH.
+        dataset (ImageDataset, optional): Dataset to read the images and annotations from (ex: a ZipImageDataset). 
+            If None, they are read from images_dir_path and annot_dir_path. Defaults to None.
+        split_manifest_path (str, optional): Path of a train/test split manifest. If set, only the training images
+            of the manifest are added to the ontology, and the directories (or dataset) must contain the unsplit images. 
+            Defaults to None.
+        population_schema (str, optional): Schema of the instances, VERBOSE_SCHEMA (blank nodes for bounding boxes, 
+            URLs and sizes) or COMPACT_SCHEMA (typed literals, about 2 times less triples). 
+            Both schemas can be converted into each other with compact_to_verbose and verbose_to_compact.
+            Defaults to VERBOSE_SCHEMA.
+
+    Raises:
+        ValueError: If the population schema isn't VERBOSE_SCHEMA or COMPACT_SCHEMA
 
     Returns:
         Graph: Populated ontology
     """
     ac = Namespace(ONTOLOGY_IRI)
-    schema = Namespace(SCHEMA_IRI)
+    if population_schema not in [VERBOSE_SCHEMA, COMPACT_SCHEMA]:
+        raise ValueError('Population schema "'+population_schema+'" is not a recognized schema ('+
+                         VERBOSE_SCHEMA+', '+COMPACT_SCHEMA+')')
+    compact = population_schema == COMPACT_SCHEMA
+    if compact:
+        define_compact_properties(ontology, ac)
+    if dataset is None:
+        dataset = DirectoryImageDataset(images_dir_path, annot_dir_path)
+    if split_manifest_path:
+        dataset, _ = split_dataset(dataset, get_split_manifest(split_manifest_path))
 
     nb_classes = len([inid for _, _, inid in ontology.triples((None, ac.inid, None))])
     pbar = tqdm(ontology.triples((None, ac.inid, None)), total=nb_classes)
     for class_node, _, inid in pbar:
-        animal_img_dir_path = images_dir_path+inid
-        animal_annot_dir_path = os.path.join(annot_dir_path, inid)
-        if not os.path.exists(animal_img_dir_path):
+        images = dataset.image_ids(str(inid))
+        if not images:
             print('Warning : no images for class '+str(class_node).replace(ONTOLOGY_IRI,'')+" ("+inid+')')
         else:        
-            im = Namespace('file:///'+os.path.abspath(animal_img_dir_path).replace('\\', '/')+'/')
-            images = os.listdir(animal_img_dir_path)
             nb_img = len(images)
             for img_index, image in enumerate(images):
                 pbar.set_description(f"Processing {inid} ({img_index}/{nb_img})")
-                image_path_node = getattr(im, image)
-                image_node = getattr(ac, 'IMG_'+image.replace(IMAGE_FILE_EXT, ''))
-                annotation_path = os.path.join(animal_annot_dir_path, image.replace(IMAGE_FILE_EXT, ANNOT_FILE_EXT))
-                if os.path.exists(annotation_path):
-                    with open(annotation_path) as annotation_file:
-                        annotation = xmltodict.parse(annotation_file.read())['annotation']
-                    define_image_node(ontology, image_node, image_path_node, ac, schema, annotation['size'])
-
-                    if 'object' in annotation:
-                        if type(annotation['object'])==list:
-                            for i, object in enumerate(annotation['object']):
-                                animal_node = getattr(ac, image.replace(IMAGE_FILE_EXT, '_'+str(i)))
-                                define_animal_node(ontology, animal_node, class_node, image_node, ac, object)
-                        else :
-                            animal_node = getattr(ac, image.replace(IMAGE_FILE_EXT,''))
-                            define_animal_node(ontology, animal_node, class_node, image_node, ac, annotation['object'])
-                else:
-                    define_image_node(ontology, image_node, image_path_node, ac, schema)
-                    animal_node = getattr(ac, image.replace(IMAGE_FILE_EXT,''))
-                    define_animal_node(ontology, animal_node, class_node, image_node, ac)
+                define_image_instances(ontology, image, URIRef(dataset.image_uri(image)), class_node, 
+                                       dataset.load_annotation(image), compact)
     return ontology
 
+def define_image_instances(ontology:Graph, image:str, image_path_node:Node, class_node:Node, 
+                           annotation:dict=None, compact:bool=False)->list[URIRef]:
+    """Define an image and the animals appearing on it in the ontology. 
+        One animal is created per object of the annotation, or a single one if the image isn't annoted
+
+    Args:
+        ontology (Graph): Ontology to define the nodes in
+        image (str): ID of the image
+        image_path_node (Node): URI of the image file
+        class_node (Node): Node of the class of the animals
+        annotation (dict, optional): 'annotation' element of the xml file annoting the image. Defaults to None.
+        compact (bool, optional): If True, nodes are defined with the compact schema. Defaults to False.
+
+    Returns:
+        list[URIRef]: Created nodes (the image node, then the animal nodes)
+    """
+    ac = Namespace(ONTOLOGY_IRI)
+    schema = Namespace(SCHEMA_IRI)
+    image_node = getattr(ac, 'IMG_'+image)
+    nodes = [image_node]
+    if annotation:
+        define_image_node(ontology, image_node, image_path_node, ac, schema, annotation['size'], compact)
+
+        if 'object' in annotation:
+            if type(annotation['object'])==list:
+                for i, object in enumerate(annotation['object']):
+                    animal_node = getattr(ac, image+'_'+str(i))
+                    define_animal_node(ontology, animal_node, class_node, image_node, ac, object, compact)
+                    nodes.append(animal_node)
+            else :
+                animal_node = getattr(ac, image)
+                define_animal_node(ontology, animal_node, class_node, image_node, ac, annotation['object'], compact)
+                nodes.append(animal_node)
+    else:
+        define_image_node(ontology, image_node, image_path_node, ac, schema, compact=compact)
+        animal_node = getattr(ac, image)
+        define_animal_node(ontology, animal_node, class_node, image_node, ac, compact=compact)
+        nodes.append(animal_node)
+    return nodes
+
+def populate_ontology_incremental(ontology_file_path:str=ONTOLOGY_FILE_PATH, 
+                                  structure_file_path:str=ONTOLOGY_STRUCTURE_FILE_PATH,
+                                  images_dir_path:str=IMAGES_TRAIN_PATH, annot_dir_path:str=ANNOT_TRAIN_PATH,
+                                  dataset:ImageDataset=None, split_manifest_path:str=None,
+                                  population_schema:str=VERBOSE_SCHEMA,
+                                  manifest_path:str=None)->Graph:
+    """Populate the ontology with the images which were added or modified since the last population, 
+        and remove the instances of the images which disappeared.
+        Populated images are recorded in a manifest file per ImageNet ID, with the hash of their annotation.
+        If the ontology is already populated but has no manifest (ex: after a full population), the manifest is 
+        first seeded from its instances (see seed_population_manifest). Changes are appended to the delta file of the ontology, which is merged by get_ontology.
+        Use merge_ontology_delta to consolidate the delta file into the ontology file.
+
+    Args:
+        ontology_file_path (str, optional): Path of the populated ontology file. 
+            If it doesn't exist, it is initialized with the ontology structure. Defaults to ONTOLOGY_FILE_PATH.
+        structure_file_path (str, optional): Path of the ontology structure file. Defaults to ONTOLOGY_STRUCTURE_FILE_PATH.
+        images_dir_path (str, optional): Path of the directory containing the images. Defaults to IMAGES_TRAIN_PATH.
+        annot_dir_path (str, optional): Path of the directory containing the annotations. Defaults to ANNOT_TRAIN_PATH.
+        dataset (ImageDataset, optional): Dataset to read the images and annotations from. Defaults to None.
+        split_manifest_path (str, optional): Path of a train/test split manifest. Defaults to None.
+        population_schema (str, optional): Schema of the instances (VERBOSE_SCHEMA or COMPACT_SCHEMA). 
+            Defaults to VERBOSE_SCHEMA.
+        manifest_path (str, optional): Path of the population manifest. 
+            If None, the one of the ontology file (see get_population_manifest_path). Defaults to None.
+
+    Raises:
+        ValueError: If the population schema isn't VERBOSE_SCHEMA or COMPACT_SCHEMA
+
+    Returns:
+        Graph: Populated ontology
+    """
+    ac = Namespace(ONTOLOGY_IRI)
+    if population_schema not in [VERBOSE_SCHEMA, COMPACT_SCHEMA]:
+        raise ValueError('Population schema "'+population_schema+'" is not a recognized schema ('+
+                         VERBOSE_SCHEMA+', '+COMPACT_SCHEMA+')')
+    delta_file_path = get_delta_file_path(ontology_file_path)
+    if manifest_path is None:
+        manifest_path = get_population_manifest_path(ontology_file_path)
+    if not os.path.exists(ontology_file_path):
+        ontology = get_ontology(structure_file_path)
+        ontology.serialize(ontology_file_path)
+        for path in [delta_file_path, manifest_path]:
+            if os.path.exists(path):
+                os.remove(path)
+    else:
+        ontology = get_ontology(ontology_file_path)
+    if dataset is None:
+        dataset = DirectoryImageDataset(images_dir_path, annot_dir_path)
+    if split_manifest_path:
+        dataset, _ = split_dataset(dataset, get_split_manifest(split_manifest_path))
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    else:
+        manifest = seed_population_manifest(ontology, dataset)
+
+    compact = population_schema == COMPACT_SCHEMA
+    added = Graph()
+    if compact and (ac.bndBox, RDF.type, RDF.Property) not in ontology:
+        define_compact_properties(added, ac)
+    removed_subjects = []
+
+    classes = [(class_node, str(inid)) for class_node, _, inid in ontology.triples((None, ac.inid, None))]
+    nb_added, nb_removed = 0, 0
+    for class_node, inid in tqdm(classes):
+        populated_images = manifest.get(inid, {})
+        current_images = {}
+        for image in dataset.image_ids(inid):
+            image_uri = dataset.image_uri(image)
+            annotation = dataset.read_annotation(image)
+            annotation_hash = get_annotation_hash(image_uri, annotation)
+            if image in populated_images and populated_images[image]['annotation'] == annotation_hash:
+                current_images[image] = populated_images[image]
+                continue
+            if image in populated_images:
+                removed_subjects += [URIRef(node) for node in populated_images[image]['nodes']]
+            nodes = define_image_instances(added, image, URIRef(image_uri), class_node, 
+                                           parse_annotation(annotation), compact)
+            current_images[image] = {'annotation': annotation_hash, 'nodes': [str(node) for node in nodes]}
+            nb_added += 1
+        for image in set(populated_images) - set(current_images):
+            removed_subjects += [URIRef(node) for node in populated_images[image]['nodes']]
+            nb_removed += 1
+        if current_images:
+            manifest[inid] = current_images
+        elif inid in manifest:
+            del manifest[inid]
+
+    for subject in removed_subjects:
+        remove_subject(ontology, subject)
+    ontology += added
+    if removed_subjects or len(added) > 0:
+        append_ontology_delta(delta_file_path, added, removed_subjects)
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    print(str(nb_added)+' images added or updated, '+str(nb_removed)+' images removed')
+    return ontology
+
+def get_annotation_hash(image_uri:str, annotation:bytes)->str:
+    """Hash of an image in the population manifest: an image is populated again if its URI or its annotation changes
+
+    Args:
+        image_uri (str): URI of the image file
+        annotation (bytes): Content of the annotation file of the image, None if it isn't annotated
+
+    Returns:
+        str: Hexadecimal hash
+    """
+    return blake2b(image_uri.encode()+(annotation or b''), digest_size=16).hexdigest()
+
+def seed_population_manifest(ontology:Graph, dataset:ImageDataset)->dict:
+    """Build the population manifest of an ontology populated without manifest (ex: by populate_ontology),
+        so that an incremental population doesn't add its images a second time.
+        Instances of images which are still in the dataset are considered up to date, 
+        the other ones are recorded with an empty hash and removed by the incremental population
+
+    Args:
+        ontology (Graph): Populated ontology
+        dataset (ImageDataset): Dataset of the images to populate the ontology with
+
+    Returns:
+        dict: Manifest in format { inid: { image: { annotation:str, nodes:list[str] } } }
+    """
+    ac = Namespace(ONTOLOGY_IRI)
+    image_prefix = str(ac)+'IMG_'
+    manifest = {}
+    dataset_images = {}
+    for image_node in ontology.subjects(RDF.type, Namespace(SCHEMA_IRI).ImageObject):
+        if not str(image_node).startswith(image_prefix):
+            continue
+        image = str(image_node)[len(image_prefix):]
+        inid = image_id_to_inid(image)
+        if inid not in dataset_images:
+            dataset_images[inid] = set(dataset.image_ids(inid))
+        annotation_hash = ''
+        if image in dataset_images[inid]:
+            annotation_hash = get_annotation_hash(dataset.image_uri(image), dataset.read_annotation(image))
+        nodes = [image_node] + list(ontology.subjects(FOAF.img, image_node))
+        manifest.setdefault(inid, {})[image] = {'annotation': annotation_hash, 'nodes': [str(node) for node in nodes]}
+    if manifest:
+        print('Population manifest seeded from the '+str(sum(len(images) for images in manifest.values()))+
+              ' images of the ontology')
+    return manifest
+
 def define_animal_node(ontology:Graph, node:Node, class_node:Node, 
-                  image_node:Node, prop_ns:Namespace, annotations:dict=None):
+                  image_node:Node, prop_ns:Namespace, annotations:dict=None, compact:bool=False):
     """define an animal node in the ontology
 
     Args:
@@ -335,22 +702,42 @@ def define_animal_node(ontology:Graph, node:Node, class_node:Node,
         prop_ns (Namespace): Namespace of the properties
         annotations (dict, optional): Object in the xml file annoting the image and defining the instance animal on the image. 
             Defaults to None.
+        compact (bool, optional): If True, the bounding box is defined as a literal of the compact schema. Defaults to False.
     """
     ontology.add((node, RDF.type, class_node))
     ontology.add((node,FOAF.img,image_node))
     if annotations :
-        bndbox_node = BNode()
         bndbox = annotations['bndbox']
+        coordinates = [int(bndbox[key]) for key in ['xmin', 'ymin', 'xmax', 'ymax']]
+        if compact:
+            ontology.add((node, prop_ns.bndBox, bounding_box_literal(coordinates, prop_ns)))
+            return
+        bndbox_node = BNode()
         ontology.add((node, prop_ns.boundingBox, bndbox_node))
-        ontology.add((bndbox_node, prop_ns.xMin, Literal(int(bndbox['xmin']))))
-        ontology.add((bndbox_node, prop_ns.yMin, Literal(int(bndbox['ymin']))))
-        ontology.add((bndbox_node, prop_ns.xMax, Literal(int(bndbox['xmax']))))
-        ontology.add((bndbox_node, prop_ns.yMax, Literal(int(bndbox['ymax']))))
+        for bnd_prop, coordinate in zip(['xMin', 'yMin', 'xMax', 'yMax'], coordinates):
+            ontology.add((bndbox_node, getattr(prop_ns, bnd_prop), Literal(coordinate)))
 
 def define_image_node(ontology:Graph, image_node:Node, image_path_node:Node, 
-                      ac:Namespace, schema:Namespace, size:dict=None):
+                      ac:Namespace, schema:Namespace, size:dict=None, compact:bool=False):
+    """define an image node in the ontology
 
+    Args:
+        ontology (Graph): Ontology to define the node in
+        image_node (Node): URI Ref of the node to create
+        image_path_node (Node): URI of the image file
+        ac (Namespace): Namespace of the properties
+        schema (Namespace): schema.org namespace
+        size (dict, optional): 'size' element of the xml file annoting the image. Defaults to None.
+        compact (bool, optional): If True, the URI of the file is directly linked to the image (schema:contentUrl)
+            and the size is defined as a literal of the compact schema. Defaults to False.
+    """
     ontology.add((image_node, RDF.type, schema.ImageObject))
+    if compact:
+        ontology.add((image_node, schema.contentUrl, image_path_node))
+        if size:
+            ontology.add((image_node, ac.imageSize, size_literal(int(size['width']), int(size['height']), ac)))
+        return
+
     image_url = BNode()
     ontology.add((image_node, schema.image, image_url))
     ontology.add((image_url, RDF.type, schema.URL))
@@ -362,15 +749,106 @@ def define_image_node(ontology:Graph, image_node:Node, image_path_node:Node,
         ontology.add((size_node, ac.width, Literal(int(size['width']))))
         ontology.add((size_node, ac.height, Literal(int(size['height']))))
 
+def bounding_box_literal(coordinates:list[int], ns:Namespace)->Literal:
+    """Build the compact schema literal of a bounding box
+
+    Args:
+        coordinates (list[int]): Coordinates of the box in format [xMin, yMin, xMax, yMax]
+        ns (Namespace): Namespace of the ontology
+
+    Returns:
+        Literal: Literal 'xMin yMin xMax yMax' of type BoundingBoxLiteral
+    """
+    return Literal(' '.join(str(c) for c in coordinates), datatype=ns.BoundingBoxLiteral)
+
+def size_literal(width:int, height:int, ns:Namespace)->Literal:
+    """Build the compact schema literal of an image size
+
+    Args:
+        width (int): Width of the image in pixels
+        height (int): Height of the image in pixels
+        ns (Namespace): Namespace of the ontology
+
+    Returns:
+        Literal: Literal 'width height' of type SizeLiteral
+    """
+    return Literal(str(width)+' '+str(height), datatype=ns.SizeLiteral)
+
+def verbose_to_compact(ontology:Graph)->Graph:
+    """Convert the populated instances of an ontology from the verbose schema to the compact schema.
+        URL, size and bounding box blank nodes are replaced by direct values
+
+    Args:
+        ontology (Graph): Ontology populated with the verbose schema
+
+    Returns:
+        Graph: Ontology populated with the compact schema
+    """
+    ac = Namespace(ONTOLOGY_IRI)
+    schema = Namespace(SCHEMA_IRI)
+    define_compact_properties(ontology, ac)
+    for image_node, _, url_node in list(ontology.triples((None, schema.image, None))):
+        path_node = ontology.value(url_node, schema.value)
+        ontology.remove((image_node, schema.image, url_node))
+        ontology.remove((url_node, None, None))
+        ontology.add((image_node, schema.contentUrl, path_node))
+    for image_node, _, size_node in list(ontology.triples((None, ac.size, None))):
+        width, height = int(ontology.value(size_node, ac.width)), int(ontology.value(size_node, ac.height))
+        ontology.remove((image_node, ac.size, size_node))
+        ontology.remove((size_node, None, None))
+        ontology.add((image_node, ac.imageSize, size_literal(width, height, ac)))
+    for animal_node, _, bndbox_node in list(ontology.triples((None, ac.boundingBox, None))):
+        coordinates = [int(ontology.value(bndbox_node, getattr(ac, prop))) for prop in ['xMin', 'yMin', 'xMax', 'yMax']]
+        ontology.remove((animal_node, ac.boundingBox, bndbox_node))
+        ontology.remove((bndbox_node, None, None))
+        ontology.add((animal_node, ac.bndBox, bounding_box_literal(coordinates, ac)))
+    return ontology
+
+def compact_to_verbose(ontology:Graph)->Graph:
+    """Convert the populated instances of an ontology from the compact schema to the verbose schema
+
+    Args:
+        ontology (Graph): Ontology populated with the compact schema
+
+    Returns:
+        Graph: Ontology populated with the verbose schema
+    """
+    ac = Namespace(ONTOLOGY_IRI)
+    schema = Namespace(SCHEMA_IRI)
+    for image_node, _, path_node in list(ontology.triples((None, schema.contentUrl, None))):
+        ontology.remove((image_node, schema.contentUrl, path_node))
+        image_url = BNode()
+        ontology.add((image_node, schema.image, image_url))
+        ontology.add((image_url, RDF.type, schema.URL))
+        ontology.add((image_url, schema.value, path_node))
+    for image_node, _, size in list(ontology.triples((None, ac.imageSize, None))):
+        width, height = str(size).split()
+        ontology.remove((image_node, ac.imageSize, size))
+        size_node = BNode()
+        ontology.add((image_node, ac.size, size_node))
+        ontology.add((size_node, ac.width, Literal(int(width))))
+        ontology.add((size_node, ac.height, Literal(int(height))))
+    for animal_node, _, bndbox in list(ontology.triples((None, ac.bndBox, None))):
+        ontology.remove((animal_node, ac.bndBox, bndbox))
+        bndbox_node = BNode()
+        ontology.add((animal_node, ac.boundingBox, bndbox_node))
+        for bnd_prop, coordinate in zip(['xMin', 'yMin', 'xMax', 'yMax'], str(bndbox).split()):
+            ontology.add((bndbox_node, getattr(ac, bnd_prop), Literal(int(coordinate))))
+    return ontology
+
 def unzip_images_annotations_files(inids:list[str], zip_file_path:str=ZIP_FILE_PATH, 
-                                   images_dest_path:str=IMAGES_PATH, annotations_dest_path:str=ANNOT_PATH):
+                                   images_dest_path:str=IMAGES_PATH, annotations_dest_path:str=ANNOT_PATH,
+                                   workers:int=UNZIP_WORKERS):
     """Unzip the images and annotations files of the selected ids from the Kaggle Challenge Zip file
+        The central directory of the zip file is indexed once, then the classes are extracted in parallel.
+        Files already extracted with the right size are skipped, which allows to resume an interrupted extraction.
 
     Args:
         inids (list[str]): list of ImageNet IDs of the resources to extract
         zip_file_path (str, optional): path of the Kaggle Challenge Zip file. Defaults to ZIP_FILE_PATH.
         images_dest_path (str, optional): Path of the Images destination directory. Defaults to IMAGES_PATH.
         annotations_dest_path (str, optional): Path of the Images destination directory. Defaults to ANNOT_PATH.
+        workers (int, optional): Number of classes extracted simultaneously. Defaults to UNZIP_WORKERS.
 
     Raises:
         ValueError: Raised if the path 'zip_file_path' doesn't exist. If so, the procedure to download the zip file is explained
@@ -382,20 +860,60 @@ def unzip_images_annotations_files(inids:list[str], zip_file_path:str=ZIP_FILE_P
                          '\t2) Go to https://www.kaggle.com/settings/account and generate an API token'+
                          '\t3) Place the generated kaggle.json file in this diectory'+ 
                          '\t4) execute this command : kaggle competitions download -c imagenet-object-localization-challenge')
-    zip_annot_path = 'ILSVRC/Annotations/CLS-LOC/train/'
-    zip_images_path =  'ILSVRC/Data/CLS-LOC/train/'
     with ZipFile(zip_file_path, 'r') as zip_file:
-        for inid in tqdm(inids):
-            for zip_subdirectory, destination_path in [
-                    (os.path.join(zip_annot_path,inid), os.path.join(annotations_dest_path,inid)),
-                    (os.path.join(zip_images_path, inid), os.path.join(images_dest_path,inid))                    
-                ]:
-                if not os.path.exists(destination_path):
-                    for file_name in [name for name in zip_file.namelist() if name.startswith(zip_subdirectory)]:
-                        extracted_path = os.path.join(destination_path, os.path.basename(file_name))
-                        zip_file.extract(file_name, destination_path)
-                        os.rename(os.path.join(destination_path, file_name), extracted_path)
-                    rmtree(os.path.join(destination_path, 'ILSVRC')) 
+        members_index = index_zip_members(zip_file, inids)
+    jobs = []
+    for zip_subdirectory, destination_path in [(ZIP_ANNOT_PATH, annotations_dest_path), (ZIP_IMAGES_PATH, images_dest_path)]:
+        for inid, members in members_index[zip_subdirectory].items():
+            jobs.append((members, os.path.join(destination_path, inid)))
+    extract_zip_members(zip_file_path, jobs, workers)
+
+def extract_zip_members(zip_file_path:str, jobs:list[tuple[list[ZipInfo], str]], 
+                        workers:int=UNZIP_WORKERS, chunk_size:int=UNZIP_CHUNK_SIZE):
+    """Stream members of a zip file directly to their destination directory, using several workers.
+        Each worker opens its own handle on the zip file and extracts one job at a time. 
+        The progress is displayed in bytes.
+
+    Args:
+        zip_file_path (str): Path of the zip file
+        jobs (list[tuple[list[ZipInfo], str]]): list of jobs in format (members to extract, destination directory).
+            Members are extracted flat into the destination directory
+        workers (int, optional): Number of workers extracting jobs simultaneously. Defaults to UNZIP_WORKERS.
+        chunk_size (int, optional): Size of the chunks read from the zip file, in bytes. Defaults to UNZIP_CHUNK_SIZE.
+    """
+    job_queue = Queue()
+    for job in sorted(jobs, key=lambda job: -sum(member.file_size for member in job[0])):
+        job_queue.put(job)
+    total_size = sum(member.file_size for members, _ in jobs for member in members)
+    progress_lock = Lock()
+
+    with tqdm(total=total_size, unit='B', unit_scale=True, unit_divisor=1024) as progress_bar:
+        def update_progress(size:int):
+            with progress_lock:
+                progress_bar.update(size)
+
+        def extract_jobs():
+            with ZipFile(zip_file_path, 'r') as zip_file:
+                while True:
+                    try:
+                        members, destination_path = job_queue.get_nowait()
+                    except Empty:
+                        return
+                    os.makedirs(destination_path, exist_ok=True)
+                    for member in members:
+                        extracted_path = os.path.join(destination_path, os.path.basename(member.filename))
+                        if os.path.exists(extracted_path) and os.path.getsize(extracted_path) == member.file_size:
+                            update_progress(member.file_size)
+                            continue
+                        with zip_file.open(member) as source, open(extracted_path, 'wb') as destination:
+                            while chunk := source.read(chunk_size):
+                                destination.write(chunk)
+                                update_progress(len(chunk))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(extract_jobs) for _ in range(max(1, workers))]
+            for future in futures:
+                future.result()
 
 def train_test_split(
             test_rate           :float,
@@ -407,6 +925,7 @@ def train_test_split(
             annot_test_path     :str=ANNOT_TEST_PATH
         ):
     """Split the annotations and images into train and test directories according to a test_rate  
+        Files are moved: create_split_manifest produces the same kind of split without moving any file
 
     Args:
         test_rate (float): Rate according to which an image is added to the test directory. 0 < test_size < 1. 
@@ -447,7 +966,7 @@ def train_test_split(
             except FileExistsError:
                 None
             for image in os.listdir(animal_image_dir):
-                if random.random() > test_rate:
+                if split_hash(image.replace(IMAGE_FILE_EXT, '')) >= test_rate:
                     image_dest_path = os.path.join(images_train_path, inid, image)
                     annot_dest_path = os.path.join(annot_train_path, inid, image.replace(IMAGE_FILE_EXT, ANNOT_FILE_EXT))
                 else:
@@ -460,6 +979,140 @@ def train_test_split(
             os.rmdir(animal_image_dir)
             os.rmdir(animal_annot_dir)
 
+def split_hash(image_id:str, seed:str='')->float:
+    """Stable pseudo-random value of an image ID, uniformly distributed between 0 and 1
+
+    Args:
+        image_id (str): ID of the image
+        seed (str, optional): Seed of the hash. Changing it changes all of the values. Defaults to ''.
+
+    Returns:
+        float: value in [0, 1)
+    """
+    digest = blake2b((seed+':'+image_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2**64
+
+def assign_splits(image_ids:list[str], test_rate:float, stratify:bool=False, seed:str='')->dict[str, str]:
+    """Assign each image to the training or the testing split from a stable hash of its ID.
+        The assignment only depends on the image ID, the rate and the seed, which makes it reproducible
+
+    Args:
+        image_ids (list[str]): IDs of the images to split
+        test_rate (float): Rate of images assigned to the testing split. 0 < test_rate < 1.
+        stratify (bool, optional): If True, the rate is applied exactly within each ImageNet ID 
+            (the images with the lowest hashes of each class are used for testing). Defaults to False.
+        seed (str, optional): Seed of the hash. Defaults to ''.
+
+    Returns:
+        dict[str, str]: Split of each image in format { image_id: TRAIN_SPLIT | TEST_SPLIT }
+    """
+    hashes = {image_id: split_hash(image_id, seed) for image_id in image_ids}
+    if not stratify:
+        return {image_id: TEST_SPLIT if value < test_rate else TRAIN_SPLIT for image_id, value in hashes.items()}
+    inid_images = {}
+    for image_id in image_ids:
+        inid_images.setdefault(image_id_to_inid(image_id), []).append(image_id)
+    splits = {}
+    for images in inid_images.values():
+        images.sort(key=hashes.get)
+        nb_test = round(len(images)*test_rate)
+        for i, image_id in enumerate(images):
+            splits[image_id] = TEST_SPLIT if i < nb_test else TRAIN_SPLIT
+    return splits
+
+def create_split_manifest(test_rate:float, dataset:ImageDataset=None, 
+                          images_dir_path:str=IMAGES_PATH, annot_dir_path:str=ANNOT_PATH,
+                          manifest_path:str=SPLIT_MANIFEST_PATH, stratify:bool=False, seed:str='')->dict[str, str]:
+    """Split the images into a training and a testing datasets and save the split in a manifest file.
+        Files aren't moved: the manifest is read by populate_ontology and model_training.get_images_test_train.
+        The manifest is a CSV file with format (image_id,split)
+
+    Args:
+        test_rate (float): Rate of images assigned to the testing split. 0 < test_rate < 1.
+        dataset (ImageDataset, optional): Dataset containing the images to split. 
+            If None, the images are listed in images_dir_path. Defaults to None.
+        images_dir_path (str, optional): Path of the directory containing the images. Defaults to IMAGES_PATH.
+        annot_dir_path (str, optional): Path of the directory containing the annotations. Defaults to ANNOT_PATH.
+        manifest_path (str, optional): Path of the manifest file to write. Defaults to SPLIT_MANIFEST_PATH.
+        stratify (bool, optional): If True, the rate is applied exactly within each ImageNet ID. Defaults to False.
+        seed (str, optional): Seed of the hash. Defaults to ''.
+
+    Raises:
+        ValueError: if the dataset doesn't contain any image
+
+    Returns:
+        dict[str, str]: Split of each image in format { image_id: TRAIN_SPLIT | TEST_SPLIT }
+    """
+    if dataset is None:
+        dataset = DirectoryImageDataset(images_dir_path, annot_dir_path)
+    image_ids = dataset.all_image_ids()
+    if not image_ids:
+        raise ValueError('No images found to split\n'+
+                'If you haven\'t done it, unzip the required images from the challenge Zip file\n'+
+                'You can do so by running the function "unzip_images_annotations_files"')
+    splits = assign_splits(image_ids, test_rate, stratify, seed)
+    with open(manifest_path, 'w', newline='') as manifest_file:
+        manifest_writer = writer(manifest_file, lineterminator='\n')
+        manifest_writer.writerow(['image_id', 'split'])
+        manifest_writer.writerows(splits.items())
+    return splits
+
+def get_split_manifest(manifest_path:str=SPLIT_MANIFEST_PATH)->dict[str, str]:
+    """Load a train/test split manifest
+
+    Args:
+        manifest_path (str, optional): Path of the manifest file. Defaults to SPLIT_MANIFEST_PATH.
+
+    Raises:
+        ValueError: If the manifest file doesn't exist
+
+    Returns:
+        dict[str, str]: Split of each image in format { image_id: TRAIN_SPLIT | TEST_SPLIT }
+    """
+    if not os.path.exists(manifest_path):
+        raise ValueError('Split manifest "'+manifest_path+'" not found\n'+
+                         'Create it by running the function "create_split_manifest"')
+    with open(manifest_path, newline='') as manifest_file:
+        manifest_reader = reader(manifest_file)
+        next(manifest_reader)
+        return {image_id: split for image_id, split in manifest_reader}
+
+def split_dataset(dataset:ImageDataset, splits:dict[str, str])->tuple[ImageDataset, ImageDataset]:
+    """Split a dataset into a training and a testing dataset, without moving any file.
+        Images of the dataset which aren't in the splits are left out
+
+    Args:
+        dataset (ImageDataset): Dataset to split (ex: a ZipImageDataset)
+        splits (dict[str, str]): Split of each image in format { image_id: TRAIN_SPLIT | TEST_SPLIT }
+
+    Returns:
+        tuple[ImageDataset, ImageDataset]: Training and testing datasets
+    """
+    train_images = []
+    test_images = []
+    for image_id in dataset.all_image_ids():
+        split = splits.get(image_id)
+        if split == TRAIN_SPLIT:
+            train_images.append(image_id)
+        elif split == TEST_SPLIT:
+            test_images.append(image_id)
+    return dataset.subset(train_images), dataset.subset(test_images)
+
+def train_test_split_dataset(dataset:ImageDataset, test_rate:float, 
+                             stratify:bool=False, seed:str='')->tuple[ImageDataset, ImageDataset]:
+    """Split a dataset into a training and a testing dataset according to a test_rate, without moving any file
+
+    Args:
+        dataset (ImageDataset): Dataset to split (ex: a ZipImageDataset)
+        test_rate (float): Rate according to which an image is added to the testing dataset. 0 < test_size < 1.
+        stratify (bool, optional): If True, the rate is applied exactly within each ImageNet ID. Defaults to False.
+        seed (str, optional): Seed of the hash. Defaults to ''.
+
+    Returns:
+        tuple[ImageDataset, ImageDataset]: Training and testing datasets
+    """
+    return split_dataset(dataset, assign_splits(dataset.all_image_ids(), test_rate, stratify, seed))
+
 def graphs():
     # TODO Display the ontology into graphs
     # export the results into a directory called 'Exports'
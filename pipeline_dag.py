@@ -0,0 +1,244 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable
+from hashlib import blake2b
+from threading import Lock
+import json
+import os
+
+PIPELINE_STATE_FILE_NAME    = 'pipeline_state.json'
+DAG_WORKERS                 = 4
+HASH_CHUNK_SIZE             = 1024*1024
+# Files bigger than this (ex: the challenge zip file) are fingerprinted by their size and modification time
+CONTENT_HASH_MAX_SIZE       = 256*1024*1024
+DONE_STATUS     = 'done'
+SKIPPED_STATUS  = 'skipped'
+RUNNING_STATUS  = 'running'
+FAILED_STATUS   = 'failed'
+
+def path_fingerprint(path:str)->str:
+    """Compute the fingerprint of a file or of a directory.
+        Files are hashed by content, except the ones bigger than CONTENT_HASH_MAX_SIZE.
+        Directories (ex: extracted images, feature store) are hashed by the name, size and modification time 
+        of their direct entries, a subdirectory changing when files are added to it, removed from it or replaced in it.
+        Stat-ing every file of the extracted images would take longer than most stages, 
+        so a file edited in place inside a subdirectory isn't detected
+
+    Args:
+        path (str): Path of the file or directory
+
+    Returns:
+        str: Hexadecimal fingerprint, None if the path doesn't exist
+    """
+    if not os.path.exists(path):
+        return None
+    hasher = blake2b(digest_size=16)
+    if os.path.isdir(path):
+        for entry in sorted(os.scandir(path), key=lambda entry: entry.name):
+            stat = entry.stat()
+            size = 0 if entry.is_dir() else stat.st_size
+            hasher.update((entry.name+':'+str(size)+':'+str(stat.st_mtime_ns)+'\n').encode())
+    elif os.path.getsize(path) > CONTENT_HASH_MAX_SIZE:
+        stat = os.stat(path)
+        hasher.update((str(stat.st_size)+':'+str(stat.st_mtime_ns)).encode())
+    else:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+class PipelineStage:
+    """Stage of a pipeline DAG: a function reading its input files and writing its output files
+
+    Args:
+        name (str): Name of the stage
+        function (Callable): Function running the stage, without arguments
+        inputs (list[str]): Paths of the files or directories read by the stage
+        outputs (list[str]): Paths of the files or directories written by the stage
+    """
+
+    def __init__(self, name:str, function:Callable, inputs:list[str], outputs:list[str]):
+        self.name = name
+        self.function = function
+        self.inputs = [os.path.normpath(path) for path in inputs]
+        self.outputs = [os.path.normpath(path) for path in outputs]
+
+class PipelineDag:
+    """Pipeline of stages linked by their files: a stage depends on the stages writing its inputs.
+        A stage is skipped when all its outputs exist and its inputs have the same fingerprints as when it last ran,
+        so that deleting an output or changing an input (ex: editing animal_features.json) reruns the stage
+        and the stages depending on it. Stages whose outputs exist but that never ran in the DAG are considered
+        up to date if none of the stages they depend on ran.
+        Independent stages run concurrently in threads (ex: the extraction of the images while the WikiData graph is built).
+        The status of each stage is saved in a state file before and after it runs, so that the partial outputs
+        of a stage which failed or was interrupted are never considered up to date.
+
+    Args:
+        stages (list[PipelineStage]): Stages of the pipeline
+        state_file_path (str): Path of the JSON state file
+        workers (int, optional): Maximum number of stages running at once. Defaults to DAG_WORKERS.
+
+    Raises:
+        ValueError: If two stages have the same name or write the same output, or if stages depend on each other in a cycle
+    """
+
+    def __init__(self, stages:list[PipelineStage], state_file_path:str, workers:int=DAG_WORKERS):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file_path = state_file_path
+        self.workers = workers
+        self.state_lock = Lock()
+        if len(self.stages) != len(stages):
+            raise ValueError('Stage names of the pipeline are not unique')
+        producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError('Output "'+output+'" is written by stages "'+producers[output]+'" and "'+stage.name+'"')
+                producers[output] = stage.name
+        self.dependencies = {stage.name: set([producers[i] for i in stage.inputs if i in producers]) - {stage.name}
+                             for stage in stages}
+        self.order = self.topological_order()
+
+    def topological_order(self)->list[str]:
+        """Order the stages so that each stage comes after the stages it depends on
+
+        Raises:
+            ValueError: If stages depend on each other in a cycle
+
+        Returns:
+            list[str]: Names of the stages
+        """
+        order = []
+        remaining = dict(self.dependencies)
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies - set(order)]
+            if not ready:
+                raise ValueError('Stages '+', '.join(remaining)+' depend on each other in a cycle')
+            order += ready
+            for name in ready:
+                del remaining[name]
+        return order
+
+    def load_state(self)->dict:
+        """Load the input fingerprints of the stages at their last run
+
+        Returns:
+            dict: State in format { stage: { status:str, inputs: { input path: fingerprint } } }
+        """
+        if not os.path.exists(self.state_file_path):
+            return {}
+        with open(self.state_file_path) as state_file:
+            return json.load(state_file)
+
+    def save_stage_state(self, state:dict, name:str, status:str, fingerprints:dict[str, str]):
+        """Record the status and the input fingerprints of a stage and save the state file
+
+        Args:
+            state (dict): State of the stages (see load_state)
+            name (str): Name of the stage
+            status (str): Status of the last attempt of the stage (RUNNING_STATUS, FAILED_STATUS or DONE_STATUS)
+            fingerprints (dict[str, str]): Fingerprint of each input of the stage
+        """
+        with self.state_lock:
+            state[name] = {'status': status, 'inputs': fingerprints}
+            tmp_path = self.state_file_path+'.tmp'
+            with open(tmp_path, 'w') as state_file:
+                json.dump(state, state_file, indent=4)
+            os.replace(tmp_path, self.state_file_path)
+
+    def is_up_to_date(self, stage:PipelineStage, state:dict, fingerprints:dict[str, str], upstream_done:bool=False)->bool:
+        """Check whether a stage can be skipped
+
+        Args:
+            stage (PipelineStage): Stage to check
+            state (dict): State of the stages (see load_state)
+            fingerprints (dict[str, str]): Current fingerprint of each input of the stage
+            upstream_done (bool, optional): if true, a stage this one depends on ran during this run. Defaults to False.
+
+        Returns:
+            bool: True if all the outputs exist, and all the inputs exist and didn't change since the last run of the stage,
+                which finished. Outputs of a stage which never ran in the DAG are only kept if the stages it depends on didn't run
+        """
+        if not all(os.path.exists(output) for output in stage.outputs):
+            return False
+        missing = [path for path, fingerprint in fingerprints.items() if fingerprint is None]
+        if missing:
+            print('Warning : inputs '+', '.join(missing)+' of stage "'+stage.name+'" are missing')
+            return False
+        if stage.name not in state:
+            return not upstream_done
+        if state[stage.name].get('status') != DONE_STATUS:
+            print('Warning : the last run of stage "'+stage.name+'" did not finish')
+            return False
+        return state[stage.name]['inputs'] == fingerprints
+
+    def run_stage(self, stage:PipelineStage, state:dict, force:bool, upstream_done:bool=False)->str:
+        """Run a stage if it isn't up to date, and record its status and its input fingerprints.
+            The stage is recorded as running before it runs, and as failed if it raises an error
+
+        Args:
+            stage (PipelineStage): Stage to run
+            state (dict): State of the stages (see load_state)
+            force (bool): if true, the stage runs even if it is up to date
+            upstream_done (bool, optional): if true, a stage this one depends on ran during this run. Defaults to False.
+
+        Returns:
+            str: DONE_STATUS if the stage ran, SKIPPED_STATUS otherwise
+        """
+        fingerprints = {path: path_fingerprint(path) for path in stage.inputs}
+        if not force and self.is_up_to_date(stage, state, fingerprints, upstream_done):
+            print('Stage "'+stage.name+'" is up to date')
+            if stage.name not in state:
+                self.save_stage_state(state, stage.name, DONE_STATUS, fingerprints)
+            return SKIPPED_STATUS
+        print('Running stage "'+stage.name+'"...')
+        self.save_stage_state(state, stage.name, RUNNING_STATUS, fingerprints)
+        try:
+            stage.function()
+        except BaseException:
+            self.save_stage_state(state, stage.name, FAILED_STATUS, fingerprints)
+            raise
+        self.save_stage_state(state, stage.name, DONE_STATUS, fingerprints)
+        return DONE_STATUS
+
+    def run(self, force:list[str]=[])->dict[str, str]:
+        """Run the stages of the pipeline which aren't up to date.
+            A stage starts as soon as the stages it depends on are finished.
+            If a stage fails, the running stages are finished, no other stage is started and the error is raised
+
+        Args:
+            force (list[str], optional): Names of the stages to run even if they are up to date.
+                The stages depending on them run if their outputs change. Defaults to [].
+
+        Raises:
+            ValueError: If a forced stage isn't a stage of the pipeline
+
+        Returns:
+            dict[str, str]: Status of each stage (DONE_STATUS or SKIPPED_STATUS)
+        """
+        unknown = [name for name in force if name not in self.stages]
+        if unknown:
+            raise ValueError('Unknown stages: '+', '.join(unknown)+' (stages: '+', '.join(self.order)+')')
+        state = self.load_state()
+        statuses = {}
+        running = {}
+        error = None
+        with ThreadPoolExecutor(self.workers) as executor:
+            while True:
+                if error is None:
+                    for name in self.order:
+                        if name not in statuses and name not in running.values() and self.dependencies[name] <= set(statuses):
+                            upstream_done = any(statuses[d] == DONE_STATUS for d in self.dependencies[name])
+                            future = executor.submit(self.run_stage, self.stages[name], state, name in force, upstream_done)
+                            running[future] = name
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                    else:
+                        statuses[name] = future.result()
+        if error is not None:
+            raise error
+        return statuses
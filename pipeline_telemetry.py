@@ -0,0 +1,191 @@
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+import tracemalloc
+import platform
+import cProfile
+import json
+import time
+import sys
+import os
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the peak RSS isn't measured
+    resource = None
+
+RUN_REPORT_FILE_NAME    = 'run_report.json'
+PROFILE_DIR_NAME        = 'Profiles'
+
+def peak_rss_mb()->float:
+    """Get the peak resident set size of the current process and of its terminated child processes
+
+    Returns:
+        float: Peak RSS in MB, NaN if it can't be measured on this platform
+    """
+    if resource is None:
+        return float('nan')
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024*1024 if sys.platform == 'darwin' else 1024)
+
+def cpu_time()->float:
+    """Get the CPU time of the current process and of its terminated child processes (ex: extraction processes)
+
+    Returns:
+        float: User and system CPU time in seconds
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+class PipelineTelemetry:
+    """Measures of the stages of a pipeline run: wall time, CPU time, peak memory and throughput of each stage.
+        The peak RSS of a stage is the peak of the process since the start of the run, as the operating system
+        doesn't reset it between stages. With trace_memory, the peak of the memory allocated by the stage itself
+        (Python objects and numpy arrays) is measured with tracemalloc, which slows the run down.
+        Stages must not be nested. If stages run at the same time (concurrent), their CPU time and peak RSS
+        are process-wide measures which overlap: the report flags them, and its totals are measured over the whole run
+        instead of summed over the stages.
+
+    Args:
+        profile_dir_path (str, optional): If set, each stage is profiled with cProfile and its statistics are saved
+            in this directory, in file '<stage>.prof' (readable with pstats or snakeviz). Defaults to None.
+        trace_memory (bool, optional): if true, the peak memory allocated by each stage is traced. Defaults to False.
+        concurrent (bool, optional): if true, stages may run at the same time in threads. 
+            Profiling and memory tracing require sequential stages. Defaults to False.
+
+    Raises:
+        ValueError: If stages are concurrent and profiled or traced
+
+    Example:
+        telemetry = PipelineTelemetry()
+        with telemetry.stage('arcs') as stage:
+            create_graph_arcs(synsets, graph_path)
+            stage['items'] = len(synsets)
+        telemetry.print_summary()
+    """
+
+    def __init__(self, profile_dir_path:str=None, trace_memory:bool=False, concurrent:bool=False):
+        if concurrent and (profile_dir_path or trace_memory):
+            raise ValueError('Stages can\'t be profiled nor traced when they run concurrently')
+        self.profile_dir_path = profile_dir_path
+        self.trace_memory = trace_memory
+        self.concurrent = concurrent
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.stages = []
+        self.run_start = None
+        self.run_end = None
+
+    @contextmanager
+    def stage(self, name:str, items:int=None):
+        """Measure a stage of the run. The number of items processed can be set in the yielded dict, key 'items'
+
+        Args:
+            name (str): Name of the stage
+            items (int, optional): Number of items processed by the stage, if known before it runs. Defaults to None.
+
+        Yields:
+            dict: Record of the stage, completed at the end of the stage
+        """
+        record = {'stage': name, 'items': items}
+        profiler = cProfile.Profile() if self.profile_dir_path else None
+        if self.trace_memory:
+            tracemalloc.start()
+        start_cpu = cpu_time()
+        start = time.perf_counter()
+        if self.run_start is None:
+            self.run_start = (start, start_cpu)
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+            record['status'] = 'done'
+        except BaseException:
+            record['status'] = 'failed'
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            record['wall_time'] = time.perf_counter() - start
+            record['cpu_time'] = cpu_time() - start_cpu
+            self.run_end = (time.perf_counter(), cpu_time())
+            record['peak_rss_mb'] = peak_rss_mb()
+            if self.trace_memory:
+                record['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / (1024*1024)
+                tracemalloc.stop()
+            record['items_per_second'] = (record['items'] / record['wall_time']
+                                          if record['items'] is not None and record['wall_time'] else None)
+            if profiler:
+                os.makedirs(self.profile_dir_path, exist_ok=True)
+                record['profile_path'] = os.path.join(self.profile_dir_path, name.replace(' ', '_')+'.prof')
+                profiler.dump_stats(record['profile_path'])
+            self.stages.append(record)
+
+    def report(self)->dict:
+        """Build the report of the run
+
+        Returns:
+            dict: Start time, platform, totals and records of the stages of the run.
+                With concurrent stages, 'overlapping_measures' lists the measures of the stages which are process-wide
+        """
+        if self.concurrent and self.run_end is not None:
+            wall_time = self.run_end[0] - self.run_start[0]
+            total_cpu_time = self.run_end[1] - self.run_start[1]
+        else:
+            wall_time = sum(s['wall_time'] for s in self.stages)
+            total_cpu_time = sum(s['cpu_time'] for s in self.stages)
+        report = {
+            'started': self.started,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'wall_time': wall_time,
+            'cpu_time': total_cpu_time,
+            'peak_rss_mb': max([s['peak_rss_mb'] for s in self.stages], default=float('nan')),
+            'stages': self.stages
+        }
+        if self.concurrent:
+            report['overlapping_measures'] = ['cpu_time', 'peak_rss_mb']
+        return report
+
+    def write_report(self, report_file_path:str):
+        """Save the report of the run in a JSON file
+
+        Args:
+            report_file_path (str): Path of the report file
+        """
+        with open(report_file_path, 'w') as report_file:
+            json.dump(self.report(), report_file, indent=4)
+
+    def print_summary(self):
+        """Print a table of the measures of each stage and of the whole run"""
+        columns = [('stage', 'Stage', '{}'), ('status', 'Status', '{}'), ('wall_time', 'Wall (s)', '{:.2f}'),
+                   ('cpu_time', 'CPU (s)', '{:.2f}'), ('peak_rss_mb', 'Peak RSS (MB)', '{:.0f}'),
+                   ('items', 'Items', '{}'), ('items_per_second', 'Items/s', '{:.1f}')]
+        if self.trace_memory:
+            columns.insert(5, ('traced_peak_mb', 'Traced peak (MB)', '{:.1f}'))
+        report = self.report()
+        total = {'stage': 'total', 'status': '', 'wall_time': report['wall_time'], 'cpu_time': report['cpu_time'],
+                 'peak_rss_mb': report['peak_rss_mb']}
+        rows = [[title for _, title, _ in columns]]
+        for record in self.stages + [total]:
+            rows.append([form.format(record[key]) if record.get(key) is not None else '' for key, _, form in columns])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+        for row in rows:
+            print('  '.join(value.ljust(width) if i == 0 else value.rjust(width)
+                            for i, (value, width) in enumerate(zip(row, widths))))
+        if self.concurrent:
+            print('Stages ran concurrently: their CPU time and peak RSS are process-wide and overlap')
+
+def measure_stage(telemetry:PipelineTelemetry, name:str, items:int=None):
+    """Measure a stage with a telemetry, or don't measure it if there is none
+
+    Args:
+        telemetry (PipelineTelemetry): Telemetry of the run. If None, the stage isn't measured
+        name (str): Name of the stage
+        items (int, optional): Number of items processed by the stage, if known before it runs. Defaults to None.
+
+    Returns:
+        ContextManager: Context of the stage, yielding its record (a dict)
+    """
+    if telemetry is None:
+        return nullcontext({'stage': name, 'items': items})
+    return telemetry.stage(name, items)
@@ -0,0 +1,135 @@
+from feature_extraction import (extract_features_parallel, get_extractor, get_extractor_version, get_feature_block, 
+                                ImageFrame, BATCH_EXTRACTORS, THUMBNAIL_SIZE, DEFAULT_EXTRACTOR)
+from feature_store import FeatureStore
+from image_dataset import ImageDataset, image_id_to_inid
+from tqdm import tqdm
+import numpy as np
+
+PIXEL_CACHE_PATH        = 'Data/PixelCache/'
+THUMBNAIL_EXTRACTOR     = 'hsv_thumbnail'
+THUMBNAIL_DECODE_SCALE  = 4
+CACHE_BATCH_SIZE        = 4096
+CACHED_EXTRACTION_BATCH_SIZE = 1024
+
+class PixelCache(FeatureStore):
+    """Memory-mapped cache of downscaled images. Each image is stored once as a THUMBNAIL_SIZE x THUMBNAIL_SIZE 
+        uint8 HSV thumbnail in a single array, and indexed by its image ID (and so by ImageNet ID).
+        Experiments read the thumbnails from the cache instead of decoding the original JPEG files again
+
+    Args:
+        cache_dir_path (str, optional): Directory of the cache. Defaults to PIXEL_CACHE_PATH.
+        roi (bool, optional): if true, the thumbnails are made of the bounding boxes of the annotated images.
+            Defaults to False.
+    """
+
+    def __init__(self, cache_dir_path:str=PIXEL_CACHE_PATH, roi:bool=False):
+        super().__init__(cache_dir_path, get_feature_block(1, roi, THUMBNAIL_EXTRACTOR), get_extractor_version(THUMBNAIL_EXTRACTOR),
+                         get_extractor(THUMBNAIL_EXTRACTOR)[1], (THUMBNAIL_SIZE, THUMBNAIL_SIZE, 3), np.uint8)
+        self.roi = roi
+
+    def image_ids(self, inid:str=None)->list[str]:
+        """Get the IDs of the cached images
+
+        Args:
+            inid (str, optional): If set, only the images of this ImageNet ID. Defaults to None.
+
+        Returns:
+            list[str]: IDs of the images
+        """
+        return [image_id for image_id in self.rows if inid is None or image_id_to_inid(image_id) == inid]
+
+    def image_rows(self, image_ids:list[str])->np.ndarray:
+        """Get the rows of cached images
+
+        Args:
+            image_ids (list[str]): IDs of the images
+
+        Raises:
+            ValueError: If an image isn't in the cache
+
+        Returns:
+            np.ndarray: int64 array with the row of each image
+        """
+        missing = [image_id for image_id in image_ids if image_id not in self.rows]
+        if missing:
+            raise ValueError(str(len(missing))+' images are not in the pixel cache (ex: "'+missing[0]+'")')
+        return np.array([self.rows[image_id][0] for image_id in image_ids], dtype=np.int64)
+
+    def read_pixels(self, image_ids:list[str], out:np.ndarray=None)->np.ndarray:
+        """Read the thumbnails of images
+
+        Args:
+            image_ids (list[str]): IDs of the images
+            out (np.ndarray, optional): Preallocated array to read the thumbnails into. Defaults to None.
+
+        Returns:
+            np.ndarray: uint8 array of shape (len(image_ids), THUMBNAIL_SIZE, THUMBNAIL_SIZE, 3) of HSV thumbnails
+        """
+        return self.read(self.image_rows(image_ids), out)
+
+def build_pixel_cache(dataset:ImageDataset, image_ids:list[str]=None, cache_dir_path:str=PIXEL_CACHE_PATH, 
+                      workers:int=None, roi:bool=False)->PixelCache:
+    """Add the thumbnails of images of a dataset to the pixel cache. Images already cached and unmodified are skipped,
+        so this one-time preprocessing is only paid again for new images. Images are decoded at a reduced scale
+        (THUMBNAIL_DECODE_SCALE) and processed by batches, so the memory used doesn't depend on the number of images
+
+    Args:
+        dataset (ImageDataset): Dataset containing the images
+        image_ids (list[str], optional): IDs of the images. If None, all the images of the dataset. Defaults to None.
+        cache_dir_path (str, optional): Directory of the cache. Defaults to PIXEL_CACHE_PATH.
+        workers (int, optional): Number of decoding processes. If None, one per core. Defaults to None.
+        roi (bool, optional): if true, the thumbnails are made of the bounding boxes of the annotated images.
+            Defaults to False.
+
+    Returns:
+        PixelCache: Cache containing the images
+    """
+    cache = PixelCache(cache_dir_path, roi)
+    image_ids = image_ids if image_ids is not None else dataset.all_image_ids()
+    stats = [dataset.image_stat(image_id) for image_id in image_ids]
+    rows = cache.lookup(image_ids, stats)
+    missing = np.flatnonzero(rows < 0)
+    if missing.size:
+        print('Adding '+str(missing.size)+' images to the pixel cache "'+cache.matrix_path+'"...')
+    for start in range(0, missing.size, CACHE_BATCH_SIZE):
+        batch = missing[start:start+CACHE_BATCH_SIZE]
+        thumbnails = extract_features_parallel([image_ids[i] for i in batch], dataset.read_image, workers, 
+                                               decode_scale=THUMBNAIL_DECODE_SCALE, extractors=[THUMBNAIL_EXTRACTOR],
+                                               read_region=dataset.image_region if roi else None)[THUMBNAIL_EXTRACTOR]
+        cache.add([image_ids[i] for i in batch], [stats[i] for i in batch], thumbnails)
+    return cache
+
+def extract_cached_features(cache:PixelCache, image_ids:list[str], extractors:list[str]=[DEFAULT_EXTRACTOR],
+                            batch_size:int=CACHED_EXTRACTION_BATCH_SIZE, progress_bar:bool=True)->dict[str, np.ndarray]:
+    """Compute the features of images from their cached thumbnails, without reading nor decoding the image files.
+        Extractors having a vectorized version (see feature_extraction.BATCH_EXTRACTORS) compute a whole batch at once
+
+    Args:
+        cache (PixelCache): Pixel cache containing the images
+        image_ids (list[str]): IDs of the images
+        extractors (list[str], optional): Names of the extractors (see feature_extraction.FEATURE_EXTRACTORS). 
+            Defaults to [DEFAULT_EXTRACTOR].
+        batch_size (int, optional): Number of thumbnails read at once. Defaults to CACHED_EXTRACTION_BATCH_SIZE.
+        progress_bar (bool, optional): if true, displays a tqdm progress bar of the task. Defaults to True.
+
+    Returns:
+        dict[str, np.ndarray]: float32 array of shape (len(image_ids), size of the extractor) per extractor
+    """
+    functions = [get_extractor(name) for name in extractors]
+    blocks = {name: np.empty((len(image_ids), size), dtype=np.float32) for name, (_, size) in zip(extractors, functions)}
+    rows = cache.image_rows(image_ids)
+    with tqdm(total=len(image_ids), disable=not progress_bar) as pbar:
+        for start in range(0, len(image_ids), batch_size):
+            thumbnails = cache.read(rows[start:start+batch_size])
+            for name in extractors:
+                if name in BATCH_EXTRACTORS:
+                    blocks[name][start:start+len(thumbnails)] = BATCH_EXTRACTORS[name](thumbnails)
+            frame_extractors = [(name, function) for name, (function, _) in zip(extractors, functions) 
+                                if name not in BATCH_EXTRACTORS]
+            if frame_extractors:
+                for i, thumbnail in enumerate(thumbnails):
+                    frame = ImageFrame(None, hsv=thumbnail)
+                    for name, function in frame_extractors:
+                        blocks[name][start+i] = function(frame)
+            pbar.update(len(thumbnails))
+    return blocks
@@ -1,7 +1,5 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
 import Tools.list_dict_tools as LDtools
 import Tools.sparql_tools as sp
-from nltk.corpus import wordnet as wn
 import os
 import json
 
@@ -32,6 +30,8 @@ def generate_synset_full_mapping(input_path=SYNSET_INID_PATH, output_path=FULL_M
         input_path (str, optional): path of the file containing a list of synsets and ImageNet IDs. Defaults to SYNSET_INID_PATH.
         output_path (str, optional): path of the file to generate the json mapping into. Defaults to FULL_MAPPING_PATH.
     """
+    # nltk loads the WordNet corpus, which is only needed by this step of the pipeline
+    from nltk.corpus import wordnet as wn
     input_file = open(input_path)
     lines = input_file.readlines()
     input_file.close()
@@ -79,6 +79,7 @@ def get_new_wnid(synset:list[str], wn_version=None):
     Returns:
         str: WordNet ID of the synset in format WordNet 3.1
     """
+    from nltk.corpus import wordnet as wn
     if (wn.get_version() if not wn_version else wn_version) < '3.1':
         raise ImportError('Current WordNet version does not provide the requested operation\n'+
                     '\tWordNet IDs compatible with WikiData only are available in versions 3.1 or higher\n'+
@@ -0,0 +1,83 @@
+import json
+import sys
+import os
+import pytest
+
+# The tests import the top-level modules of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ANIMAL_WDID         = 'Q729'
+NB_GROUPS           = 2
+CLASSES_PER_GROUP   = 3
+IMAGES_PER_CLASS    = 2
+NB_MORPH_FEATURES   = 12
+IMAGE_SIZE          = (32, 24)
+
+def annotation_xml(image_id:str, inid:str, box:list[int])->str:
+    """Annotation of an image in the XML format of the ImageNet annotations"""
+    coordinates = ''.join('<'+key+'>'+str(value)+'</'+key+'>' for key, value in zip(['xmin', 'ymin', 'xmax', 'ymax'], box))
+    return ('<annotation><folder>'+inid+'</folder><filename>'+image_id+'</filename>'
+            '<size><width>'+str(IMAGE_SIZE[0])+'</width><height>'+str(IMAGE_SIZE[1])+'</height><depth>3</depth></size>'
+            '<object><name>'+inid+'</name><bndbox>'+coordinates+'</bndbox></object></annotation>')
+
+def write_ontology_inputs(dir_path:str)->dict:
+    """Write the inputs of the ontology for a small tree of classes: NB_GROUPS classes under the animal class,
+        each one with CLASSES_PER_GROUP ImageNet classes of IMAGES_PER_CLASS annotated images.
+        The images aren't decoded by the ontology, so their files only hold placeholder bytes
+
+    Args:
+        dir_path (str): Directory to write the files in
+
+    Returns:
+        dict: Paths of the files (mapping, arcs, morph_features, images, annotations) and IDs of the images (image_ids)
+    """
+    paths = {
+        'mapping': os.path.join(dir_path, 'synset_mapping.json'),
+        'arcs': os.path.join(dir_path, 'graph_arcs.csv'),
+        'morph_features': os.path.join(dir_path, 'animal_features.json'),
+        'images': os.path.join(dir_path, 'Images', ''),
+        'annotations': os.path.join(dir_path, 'Annotations', ''),
+        'image_ids': []
+    }
+    synsets = []
+    arcs = ['parent,child,parentLabel,childLabel']
+    labels = []
+    for group in range(NB_GROUPS):
+        group_wdid, group_label = 'Q9'+str(group), 'Test Group '+str(group)
+        arcs.append(ANIMAL_WDID+','+group_wdid+',Animal,'+group_label)
+        labels.append(group_label)
+        for index in range(CLASSES_PER_GROUP):
+            number = group*CLASSES_PER_GROUP + index
+            wdid, label, inid = 'Q8'+str(number), 'Test Class '+str(number), 'n0000000'+str(number)
+            arcs.append(group_wdid+','+wdid+','+group_label+','+label)
+            labels.append(label)
+            synsets.append({'synset': [label.lower()], 'inid': inid, 'wnid': '0000000'+str(number)+'-n', 
+                            'wdid': wdid, 'label': label, 'animal_pattern': 'subclass'})
+            os.makedirs(os.path.join(paths['images'], inid))
+            os.makedirs(os.path.join(paths['annotations'], inid))
+            for image in range(IMAGES_PER_CLASS):
+                image_id = inid+'_'+str(image)
+                with open(os.path.join(paths['images'], inid, image_id+'.JPEG'), 'wb') as image_file:
+                    image_file.write(b'\xff\xd8'+image_id.encode()+b'\xff\xd9')
+                with open(os.path.join(paths['annotations'], inid, image_id+'.xml'), 'w') as annot_file:
+                    annot_file.write(annotation_xml(image_id, inid, [image, image+1, IMAGE_SIZE[0]-number, IMAGE_SIZE[1]-1]))
+                paths['image_ids'].append(image_id)
+    with open(paths['mapping'], 'w') as mapping_file:
+        json.dump(synsets, mapping_file)
+    with open(paths['arcs'], 'w') as arcs_file:
+        arcs_file.write('\n'.join(arcs)+'\n')
+    morph_features = {label: [] for label in labels}
+    for feature in range(NB_MORPH_FEATURES):
+        morph_features[labels[(feature*5) % len(labels)]].append('test feature '+str(feature))
+    with open(paths['morph_features'], 'w') as morph_features_file:
+        json.dump(morph_features, morph_features_file)
+    return paths
+
+@pytest.fixture(scope='module')
+def ontology_inputs(tmp_path_factory)->dict:
+    return write_ontology_inputs(str(tmp_path_factory.mktemp('ontology_inputs')))
+
+@pytest.fixture
+def ontology_structure(ontology_inputs):
+    from ontology import initialize_ontology_structure
+    return initialize_ontology_structure(ontology_inputs['arcs'], ontology_inputs['morph_features'], ontology_inputs['mapping'])
@@ -0,0 +1,72 @@
+from animal_classifiers import pack_bits, popcount, HammingClassifier, HierarchicalClassifier
+from sklearn.tree import DecisionTreeClassifier
+import numpy as np
+import pytest
+
+SEED         = 0
+NB_CLASSES   = 12
+NB_FEATURES  = 100
+# Shark has no training images, its subtree is pruned, and bird has a single child, it is skipped
+CLASS_TREE   = {'animal': ['mammal', 'bird', 'fish'], 'mammal': ['cat', 'dog', 'horse'], 'bird': ['eagle'], 'fish': ['shark']}
+TREE_CLASSES = ['cat', 'dog', 'horse', 'eagle']
+
+@pytest.fixture
+def prototypes()->np.ndarray:
+    return np.random.default_rng(SEED).random((NB_CLASSES, NB_FEATURES)) < 0.5
+
+@pytest.fixture
+def rows()->np.ndarray:
+    return np.random.default_rng(SEED+1).random((50, NB_FEATURES)) < 0.5
+
+@pytest.mark.parametrize('nb_bits', [1, 8, 63, 64, 65, NB_FEATURES])
+def test_popcount_of_packed_bits(nb_bits):
+    x = np.random.default_rng(SEED).random((20, nb_bits)) < 0.5
+    packed = pack_bits(x)
+    assert packed.dtype == np.uint64 and packed.shape == (20, (nb_bits + 63) // 64)
+    np.testing.assert_array_equal(popcount(packed).sum(axis=1), x.sum(axis=1))
+
+def test_hamming_distances_match_brute_force(prototypes, rows):
+    classifier = HammingClassifier(batch_size=16).fit(prototypes, np.arange(NB_CLASSES))
+    expected = (rows[:, None, :] != prototypes[None, :, :]).sum(axis=-1)
+    np.testing.assert_array_equal(classifier.distances(rows), expected)
+    np.testing.assert_array_equal(classifier.predict(rows), np.argmin(expected, axis=1))
+
+def test_weighted_distances_match_brute_force(prototypes, rows):
+    rng = np.random.default_rng(SEED+2)
+    feature_weights = rng.random(NB_FEATURES)
+    confidence = rng.random(rows.shape)
+    classifier = HammingClassifier(feature_weights, batch_size=16).fit(prototypes, np.arange(NB_CLASSES))
+    expected = ((rows[:, None, :] != prototypes[None, :, :]) * (feature_weights*confidence)[:, None, :]).sum(axis=-1)
+    np.testing.assert_allclose(classifier.distances(rows, confidence), expected, rtol=1e-5, atol=1e-4)
+
+def test_prototypes_are_classified_as_their_class(prototypes):
+    classes = np.array(['n0000000'+str(i).zfill(2) for i in range(NB_CLASSES)])
+    np.testing.assert_array_equal(HammingClassifier().fit(prototypes, classes).predict(prototypes), classes)
+
+def test_ties_go_to_the_first_class():
+    prototypes = np.array([[True, False], [False, True]])
+    classifier = HammingClassifier().fit(prototypes, np.array(['a', 'b']))
+    assert classifier.predict(np.array([[True, True], [False, False]])).tolist() == ['a', 'a']
+
+@pytest.fixture
+def class_blobs()->tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(SEED)
+    centers = 10*np.eye(len(TREE_CLASSES))
+    y = np.repeat(TREE_CLASSES, 20)
+    x = centers[np.repeat(np.arange(len(TREE_CLASSES)), 20)] + rng.normal(0, 0.5, (len(y), len(TREE_CLASSES)))
+    return x, y
+
+@pytest.mark.parametrize('beam_width', [1, 2])
+def test_hierarchical_classifier_routes_rows_to_their_class(class_blobs, beam_width):
+    x, y = class_blobs
+    classifier = HierarchicalClassifier(CLASS_TREE, 'animal', DecisionTreeClassifier(random_state=SEED), beam_width, n_jobs=1)
+    classifier.fit(x, y)
+    assert sorted(classifier.classes_.tolist()) == sorted(TREE_CLASSES)
+    # Local classifiers at the root and at mammal only
+    assert sum(model is not None for model in classifier.node_model_) == 2
+    np.testing.assert_array_equal(classifier.predict(x), y)
+
+def test_hierarchical_classifier_without_leaf_classes(class_blobs):
+    x, _ = class_blobs
+    with pytest.raises(ValueError):
+        HierarchicalClassifier(CLASS_TREE, 'animal', n_jobs=1).fit(x, np.repeat(['shark_cub'], len(x)))
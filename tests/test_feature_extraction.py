@@ -0,0 +1,24 @@
+from feature_extraction import hsv_histogram, batch_hsv_histograms, THUMBNAIL_SIZE
+import numpy as np
+import pytest
+
+SEED    = 0
+FRAMES  = 16
+
+@pytest.fixture
+def hsv_frames()->np.ndarray:
+    return np.random.default_rng(SEED).integers(0, 256, (FRAMES, THUMBNAIL_SIZE, THUMBNAIL_SIZE, 3), dtype=np.uint8)
+
+@pytest.mark.parametrize('bins', [4, 8, 16])
+def test_batch_hsv_histograms_match_calc_hist(hsv_frames, bins):
+    expected = np.array([hsv_histogram(frame, None, bins) for frame in hsv_frames], dtype=np.float32)
+    np.testing.assert_allclose(batch_hsv_histograms(hsv_frames, bins), expected, rtol=1e-5, atol=1e-7)
+
+@pytest.mark.parametrize('bins', [4, 8, 16])
+def test_batch_hsv_histograms_match_calc_hist_with_masks(hsv_frames, bins):
+    masks = np.zeros(hsv_frames.shape[:3], dtype=np.uint8)
+    for i, mask in enumerate(masks):
+        mask[i:THUMBNAIL_SIZE//2+i, THUMBNAIL_SIZE//4:] = 255
+    masks[0] = 0
+    expected = np.array([hsv_histogram(frame, mask, bins) for frame, mask in zip(hsv_frames, masks)], dtype=np.float32)
+    np.testing.assert_allclose(batch_hsv_histograms(hsv_frames, bins, masks), expected, rtol=1e-5, atol=1e-7)
@@ -0,0 +1,54 @@
+from feature_store import FeatureStore, INITIAL_CAPACITY
+import numpy as np
+import pytest
+
+FEATURES_SIZE   = 8
+SEED            = 0
+
+@pytest.fixture
+def features()->np.ndarray:
+    return np.random.default_rng(SEED).random((INITIAL_CAPACITY + 10, FEATURES_SIZE), dtype=np.float32)
+
+def get_keys(nb_keys:int)->tuple[list[str], list[tuple[int, float]]]:
+    return ['image_'+str(i) for i in range(nb_keys)], [(100 + i, 1.0) for i in range(nb_keys)]
+
+def test_lookup_and_read_added_features(tmp_path, features):
+    store = FeatureStore(str(tmp_path), 'block', 'v1', FEATURES_SIZE)
+    keys, stats = get_keys(10)
+    assert (store.lookup(keys, stats) == -1).all()
+    rows = store.add(keys, stats, features[:10])
+    np.testing.assert_array_equal(store.lookup(keys, stats), rows)
+    np.testing.assert_array_equal(store.read(rows[::-1]), features[:10][::-1])
+
+def test_modified_image_reuses_its_row(tmp_path, features):
+    store = FeatureStore(str(tmp_path), 'block', 'v1', FEATURES_SIZE)
+    keys, stats = get_keys(10)
+    rows = store.add(keys, stats, features[:10])
+    modified_stats = [(stats[3][0], 2.0)]
+    assert store.lookup(keys[3:4], modified_stats)[0] == -1
+    assert store.add(keys[3:4], modified_stats, features[10:11])[0] == rows[3]
+    assert store.nb_rows == 10
+    np.testing.assert_array_equal(store.read(rows[3:4]), features[10:11])
+    np.testing.assert_array_equal(store.read(rows[4:]), features[4:10])
+
+def test_growth_keeps_the_stored_rows(tmp_path, features):
+    store = FeatureStore(str(tmp_path), 'block', 'v1', FEATURES_SIZE)
+    keys, stats = get_keys(len(features))
+    first_rows = store.add(keys[:10], stats[:10], features[:10])
+    rows = store.add(keys[10:], stats[10:], features[10:])
+    assert store.matrix.shape[0] >= len(features)
+    np.testing.assert_array_equal(store.read(np.concatenate([first_rows, rows])), features)
+
+def test_store_is_reopened_with_the_same_version(tmp_path, features):
+    keys, stats = get_keys(10)
+    rows = FeatureStore(str(tmp_path), 'block', 'v1', FEATURES_SIZE).add(keys, stats, features[:10])
+    store = FeatureStore(str(tmp_path), 'block', 'v1', FEATURES_SIZE)
+    np.testing.assert_array_equal(store.lookup(keys, stats), rows)
+    np.testing.assert_array_equal(store.read(rows), features[:10])
+
+def test_store_is_reset_by_another_version(tmp_path, features):
+    keys, stats = get_keys(10)
+    FeatureStore(str(tmp_path), 'block', 'v1', FEATURES_SIZE).add(keys, stats, features[:10])
+    store = FeatureStore(str(tmp_path), 'block', 'v2', FEATURES_SIZE)
+    assert store.nb_rows == 0
+    assert (store.lookup(keys, stats) == -1).all()
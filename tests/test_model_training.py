@@ -0,0 +1,63 @@
+from model_training import (build_class_morph_features_matrix, build_class_morph_features_df, get_class_ranks, 
+                            get_class_caps, sample_balanced_rows)
+from ontology import ONTOLOGY_IRI
+from rdflib import Graph, Namespace
+from rdflib.namespace import RDF
+from pandas import DataFrame
+from pandas.testing import assert_frame_equal
+import numpy as np
+
+def dense_class_morph_features_df(ontology:Graph)->DataFrame:
+    """Reference DataFrame of the morphological features per class, built triple by triple"""
+    ac = Namespace(ONTOLOGY_IRI)
+    morph_features = [feature for feature, _, _ in ontology.triples((None, RDF.type, ac.MorphFeature))]
+    rows = []
+    for animal_class, _, inid in ontology.triples((None, ac.inid, None)):
+        animal_features = set(ontology.objects(animal_class, ac.hasMorphFeature))
+        row = {'inid': str(inid)}
+        for feature in morph_features:
+            row[feature.replace(ONTOLOGY_IRI, '')] = feature in animal_features
+        rows.append(row)
+    return DataFrame(rows)
+
+def test_sparse_matrix_matches_dense_features(ontology_structure):
+    matrix, inids, features = build_class_morph_features_matrix(ontology_structure)
+    expected = dense_class_morph_features_df(ontology_structure)
+    assert inids == list(expected['inid'])
+    assert_frame_equal(DataFrame(matrix.toarray(), columns=features), expected.drop(columns='inid'), check_like=True)
+
+def test_class_morph_features_df_matches_dense_features(ontology_structure):
+    assert_frame_equal(build_class_morph_features_df(ontology_structure), dense_class_morph_features_df(ontology_structure), 
+                       check_like=True)
+
+def unbalanced_class_index()->np.ndarray:
+    """Class of 100 images: 50 images of class 0, 30 of class 1, 15 of class 2 and 5 of class 3, shuffled"""
+    return np.random.default_rng(0).permutation(np.repeat(np.arange(4), [50, 30, 15, 5]))
+
+def test_class_ranks_order_each_class():
+    class_index = unbalanced_class_index()
+    ranks = get_class_ranks(class_index)
+    for c in range(4):
+        assert sorted(ranks[class_index == c].tolist()) == list(range((class_index == c).sum()))
+    np.testing.assert_array_equal(get_class_ranks(class_index), ranks)
+
+def test_balanced_samples_are_capped_and_nested():
+    class_index = unbalanced_class_index()
+    ranks = get_class_ranks(class_index)
+    previous = set()
+    for max_images_per_class in [1, 5, 10, 20, 100]:
+        rows = sample_balanced_rows(class_index, ranks, max_images_per_class)
+        assert np.bincount(class_index[rows], minlength=4).tolist() == \
+            np.minimum(np.bincount(class_index), max_images_per_class).tolist()
+        assert previous <= set(rows.tolist())
+        previous = set(rows.tolist())
+
+def test_value_caps_are_shared_between_classes():
+    # Classes 0, 1 and 2 share the target value True, class 3 is the only one with False
+    class_target = np.array([True, True, True, False])
+    assert get_class_caps(4, max_images_per_value=12, class_target=class_target).tolist() == [4, 4, 4, 12]
+    assert get_class_caps(4, 3, 12, class_target).tolist() == [3, 3, 3, 3]
+    assert get_class_caps(4, max_images_per_value=2, class_target=class_target).tolist() == [1, 1, 1, 2]
+    class_index = unbalanced_class_index()
+    rows = sample_balanced_rows(class_index, get_class_ranks(class_index), max_images_per_value=12, class_target=class_target)
+    assert np.bincount(class_index[rows], minlength=4).tolist() == [4, 4, 4, 5]
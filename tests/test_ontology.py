@@ -0,0 +1,119 @@
+from ontology import (initialize_ontology_structure, populate_ontology, verbose_to_compact, compact_to_verbose, 
+                      define_compact_properties, populate_ontology_incremental, get_ontology, merge_ontology_delta,
+                      reset_ontology_population, get_delta_file_path, get_population_manifest_path,
+                      split_hash, assign_splits, create_split_manifest, get_split_manifest, split_dataset,
+                      ONTOLOGY_IRI, VERBOSE_SCHEMA, COMPACT_SCHEMA, TRAIN_SPLIT, TEST_SPLIT)
+from image_dataset import DirectoryImageDataset
+from rdflib import Graph, Namespace
+from rdflib.compare import isomorphic
+import pytest
+import shutil
+import json
+import os
+
+def copy_graph(graph:Graph)->Graph:
+    copy = Graph()
+    for triple in graph:
+        copy.add(triple)
+    return copy
+
+@pytest.fixture(scope='module')
+def populated(ontology_inputs)->dict[str, Graph]:
+    populated = {}
+    for schema in [VERBOSE_SCHEMA, COMPACT_SCHEMA]:
+        structure = initialize_ontology_structure(ontology_inputs['arcs'], ontology_inputs['morph_features'], 
+                                                  ontology_inputs['mapping'])
+        populated[schema] = populate_ontology(structure, ontology_inputs['images'], ontology_inputs['annotations'], 
+                                              population_schema=schema)
+    return populated
+
+def test_verbose_to_compact_matches_compact_population(populated):
+    compact = verbose_to_compact(copy_graph(populated[VERBOSE_SCHEMA]))
+    assert isomorphic(compact, populated[COMPACT_SCHEMA])
+
+def test_compact_to_verbose_matches_verbose_population(populated):
+    verbose = compact_to_verbose(copy_graph(populated[COMPACT_SCHEMA]))
+    # The definitions of the compact properties are kept by the conversion
+    expected = define_compact_properties(copy_graph(populated[VERBOSE_SCHEMA]), Namespace(ONTOLOGY_IRI))
+    assert isomorphic(verbose, expected)
+
+def test_verbose_compact_round_trip(populated):
+    round_trip = compact_to_verbose(verbose_to_compact(copy_graph(populated[VERBOSE_SCHEMA])))
+    expected = define_compact_properties(copy_graph(populated[VERBOSE_SCHEMA]), Namespace(ONTOLOGY_IRI))
+    assert isomorphic(round_trip, expected)
+
+def populate_files(structure:Graph, ontology_inputs:dict, images_dir_path:str=None)->Graph:
+    return populate_ontology(copy_graph(structure), images_dir_path or ontology_inputs['images'], 
+                             ontology_inputs['annotations'])
+
+def test_incremental_population_matches_full_population(tmp_path, ontology_structure, ontology_inputs):
+    structure_file_path = str(tmp_path / 'structure.ttl')
+    ontology_file_path = str(tmp_path / 'ontology.ttl')
+    ontology_structure.serialize(structure_file_path)
+    populate_ontology_incremental(ontology_file_path, structure_file_path, ontology_inputs['images'], ontology_inputs['annotations'])
+    assert os.path.exists(get_delta_file_path(ontology_file_path))
+    assert isomorphic(get_ontology(ontology_file_path), populate_files(ontology_structure, ontology_inputs))
+
+def test_delta_round_trip(tmp_path, ontology_structure, ontology_inputs):
+    structure_file_path = str(tmp_path / 'structure.ttl')
+    ontology_file_path = str(tmp_path / 'ontology.ttl')
+    ontology_structure.serialize(structure_file_path)
+    images_dir_path = str(tmp_path / 'Images')
+    shutil.copytree(ontology_inputs['images'], images_dir_path)
+    populate_ontology_incremental(ontology_file_path, structure_file_path, images_dir_path, ontology_inputs['annotations'])
+    os.remove(os.path.join(images_dir_path, ontology_inputs['image_ids'][0][:9], ontology_inputs['image_ids'][0]+'.JPEG'))
+    populate_ontology_incremental(ontology_file_path, structure_file_path, images_dir_path, ontology_inputs['annotations'])
+    expected = populate_files(ontology_structure, ontology_inputs, images_dir_path)
+    assert isomorphic(get_ontology(ontology_file_path), expected)
+    merge_ontology_delta(ontology_file_path)
+    assert not os.path.exists(get_delta_file_path(ontology_file_path))
+    assert isomorphic(get_ontology(ontology_file_path), expected)
+
+def test_incremental_population_after_full_population(tmp_path, ontology_structure, ontology_inputs):
+    ontology_file_path = str(tmp_path / 'ontology.ttl')
+    populated = populate_files(ontology_structure, ontology_inputs)
+    # Delta file and manifest left by the incremental populations of a previous ontology file
+    with open(get_delta_file_path(ontology_file_path), 'w') as delta_file:
+        delta_file.write('- <'+ONTOLOGY_IRI+'IMG_'+ontology_inputs['image_ids'][0]+'>\n')
+    with open(get_population_manifest_path(ontology_file_path), 'w') as manifest_file:
+        json.dump({}, manifest_file)
+    populated.serialize(ontology_file_path)
+    reset_ontology_population(ontology_file_path)
+    assert isomorphic(get_ontology(ontology_file_path), populated)
+    ontology = populate_ontology_incremental(ontology_file_path, None, ontology_inputs['images'], ontology_inputs['annotations'])
+    assert not os.path.exists(get_delta_file_path(ontology_file_path))
+    assert isomorphic(ontology, populated)
+
+def test_split_hash_is_stable():
+    # Pinned values: a change of the hash would silently move images between the splits of existing manifests
+    assert split_hash('n01440764_10026') == pytest.approx(0.4955492335446849)
+    assert split_hash('n01440764_10026', '1') == pytest.approx(0.2699530493371574)
+    assert all(0 <= split_hash('n01440764_'+str(i)) < 1 for i in range(100))
+
+def test_assign_splits_keeps_existing_images():
+    image_ids = ['n0000000'+str(c)+'_'+str(i) for c in range(4) for i in range(50)]
+    splits = assign_splits(image_ids[:100], 0.2)
+    assert {image: split for image, split in assign_splits(image_ids, 0.2).items() if image in splits} == splits
+    assert set(splits.values()) == {TRAIN_SPLIT, TEST_SPLIT}
+
+def test_assign_splits_stratified_rate():
+    image_ids = ['n0000000'+str(c)+'_'+str(i) for c in range(4) for i in range(50)]
+    splits = assign_splits(image_ids, 0.2, stratify=True)
+    for c in range(4):
+        assert sum(splits[image] == TEST_SPLIT for image in image_ids if image.startswith('n0000000'+str(c))) == 10
+
+def test_split_manifest_round_trip(tmp_path, ontology_inputs):
+    manifest_path = str(tmp_path / 'split_manifest.csv')
+    splits = create_split_manifest(0.5, images_dir_path=ontology_inputs['images'], annot_dir_path=ontology_inputs['annotations'],
+                                   manifest_path=manifest_path)
+    assert sorted(splits) == sorted(ontology_inputs['image_ids'])
+    assert get_split_manifest(manifest_path) == splits
+    with open(manifest_path) as manifest_file:
+        content = manifest_file.read()
+    create_split_manifest(0.5, images_dir_path=ontology_inputs['images'], annot_dir_path=ontology_inputs['annotations'],
+                          manifest_path=manifest_path)
+    with open(manifest_path) as manifest_file:
+        assert manifest_file.read() == content
+    train, test = split_dataset(DirectoryImageDataset(ontology_inputs['images'], ontology_inputs['annotations']), splits)
+    assert sorted(train.all_image_ids()) == sorted(image for image, split in splits.items() if split == TRAIN_SPLIT)
+    assert sorted(test.all_image_ids()) == sorted(image for image, split in splits.items() if split == TEST_SPLIT)
@@ -0,0 +1,84 @@
+from pipeline_dag import PipelineDag, PipelineStage, DONE_STATUS, SKIPPED_STATUS, FAILED_STATUS
+import pytest
+import os
+
+def write_file(path:str, content:str):
+    with open(path, 'w') as file:
+        file.write(content)
+
+def read_file(path:str)->str:
+    with open(path) as file:
+        return file.read()
+
+@pytest.fixture
+def pipeline(tmp_path)->dict:
+    """Two stages: upper copies source.txt in upper case, count writes the number of characters of upper"""
+    paths = {name: str(tmp_path / (name+'.txt')) for name in ['source', 'upper', 'count']}
+    paths['state'] = str(tmp_path / 'pipeline_state.json')
+    write_file(paths['source'], 'abc')
+    runs = {'upper': 0, 'count': 0}
+    def upper():
+        runs['upper'] += 1
+        write_file(paths['upper'], read_file(paths['source']).upper())
+    def count():
+        runs['count'] += 1
+        write_file(paths['count'], str(len(read_file(paths['upper']))))
+    stages = [PipelineStage('count', count, [paths['upper']], [paths['count']]),
+              PipelineStage('upper', upper, [paths['source']], [paths['upper']])]
+    return {'paths': paths, 'runs': runs, 'stages': stages, 'dag': PipelineDag(stages, paths['state'], workers=2)}
+
+def test_order_follows_dependencies(pipeline):
+    assert pipeline['dag'].order == ['upper', 'count']
+
+def test_up_to_date_stages_are_skipped(pipeline):
+    assert pipeline['dag'].run() == {'upper': DONE_STATUS, 'count': DONE_STATUS}
+    assert pipeline['dag'].run() == {'upper': SKIPPED_STATUS, 'count': SKIPPED_STATUS}
+    assert pipeline['runs'] == {'upper': 1, 'count': 1}
+    assert read_file(pipeline['paths']['count']) == '3'
+
+def test_changed_input_reruns_downstream_stages(pipeline):
+    pipeline['dag'].run()
+    write_file(pipeline['paths']['source'], 'abcd')
+    assert pipeline['dag'].run() == {'upper': DONE_STATUS, 'count': DONE_STATUS}
+    assert read_file(pipeline['paths']['count']) == '4'
+
+def test_deleted_output_reruns_stage(pipeline):
+    pipeline['dag'].run()
+    os.remove(pipeline['paths']['count'])
+    assert pipeline['dag'].run() == {'upper': SKIPPED_STATUS, 'count': DONE_STATUS}
+
+def test_forced_stage_reruns(pipeline):
+    pipeline['dag'].run()
+    assert pipeline['dag'].run(force=['upper']) == {'upper': DONE_STATUS, 'count': SKIPPED_STATUS}
+    with pytest.raises(ValueError):
+        pipeline['dag'].run(force=['unknown'])
+
+def test_existing_outputs_are_adopted(pipeline):
+    write_file(pipeline['paths']['upper'], 'ABC')
+    write_file(pipeline['paths']['count'], '3')
+    assert pipeline['dag'].run() == {'upper': SKIPPED_STATUS, 'count': SKIPPED_STATUS}
+    assert pipeline['runs'] == {'upper': 0, 'count': 0}
+
+def test_failed_stage_outputs_are_not_adopted(pipeline):
+    paths = pipeline['paths']
+    def failing_count():
+        write_file(paths['count'], 'partial')
+        raise RuntimeError('count failed')
+    stages = [PipelineStage('upper', lambda: write_file(paths['upper'], 'ABC'), [paths['source']], [paths['upper']]),
+              PipelineStage('count', failing_count, [paths['upper']], [paths['count']])]
+    with pytest.raises(RuntimeError):
+        PipelineDag(stages, paths['state']).run()
+    assert PipelineDag(stages, paths['state']).load_state()['count']['status'] == FAILED_STATUS
+    assert pipeline['dag'].run() == {'upper': SKIPPED_STATUS, 'count': DONE_STATUS}
+    assert read_file(paths['count']) == '3'
+
+def test_missing_input_reruns_stage(pipeline):
+    pipeline['dag'].run()
+    os.remove(pipeline['paths']['source'])
+    with pytest.raises(FileNotFoundError):
+        pipeline['dag'].run()
+
+def test_duplicate_output_is_rejected(pipeline):
+    paths = pipeline['paths']
+    with pytest.raises(ValueError):
+        PipelineDag(pipeline['stages']+[PipelineStage('other', lambda: None, [], [paths['count']])], paths['state'])